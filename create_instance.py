@@ -1,35 +1,130 @@
-"""Was used for creating the instances."""
+"""Contains functions for creating the instances in bulk.
 
-from pathlib import Path
+Every instance is generated from a seed derived from one base seed and
+its dimension and number, so it does not depend on which other instances
+are created with it or in which order. Instances whose CSVs already
+exist are skipped, so an interrupted run can simply be started again.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 
 import problem_data
+from instance_loader import instance_filepaths
+from settings import InstanceSettings
+
+
+def instance_seed(seed: int, num_projects: int, num_students: int, instance_number: int) -> int:
+    """Returns the seed an instance is generated from.
+
+    Args:
+        seed: The base seed of all instances.
+        num_projects: The number of projects of the instance.
+        num_students: The number of students of the instance.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+    """
+    return int(np.random.SeedSequence([seed, num_projects, num_students, instance_number]).generate_state(1)[0])
+
+
+def create_instance(num_projects: int, num_students: int, instance_number: int, seed: int, vectorized: bool = False):
+    """Generates one instance and saves its CSVs.
+
+    Both CSVs are written to temporary files first and then moved into
+    place, so a CSV is either complete or not there at all.
+
+    Args:
+        num_projects: The number of projects of the instance.
+        num_students: The number of students of the instance.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+        seed: The seed the instance is generated from.
+        vectorized: Whether the students are generated with NumPy, see
+            generate_projects_and_students_data.
+    """
+    filepaths = instance_filepaths(f"{num_projects}_{num_students}", instance_number)
+    filepaths_temporary = [filepath.with_name(f"{filepath.name}.{os.getpid()}.tmp") for filepath in filepaths]
+    for filepath in filepaths:
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+    problem_data.save_projects_and_students_instance(
+        num_projects=num_projects,
+        num_students=num_students,
+        filepath_projects=filepaths_temporary[0],
+        filepath_students=filepaths_temporary[1],
+        seed=seed,
+        vectorized=vectorized,
+    )
+    for filepath_temporary, filepath in zip(filepaths_temporary, filepaths):
+        os.replace(filepath_temporary, filepath)
+
+
+def create_instances(
+    project_quantities: list[int],
+    student_quantities: list[int],
+    instances_per_combination: int = 10,
+    seed: int = 0,
+    num_workers: int = 1,
+    vectorized: bool = False,
+) -> int:
+    """Generates the instances of every combination of dimensions.
+
+    Args:
+        project_quantities: The numbers of projects of the instances.
+        student_quantities: The numbers of students of the instances.
+        instances_per_combination: How many instances are generated for each
+            combination of number of projects and number of students.
+        seed: The base seed the seeds of all instances are derived from.
+        num_workers: How many instances are generated at the same time.
+        vectorized: Whether the students are generated with NumPy, see
+            generate_projects_and_students_data.
+
+    Returns:
+        The number of instances generated. Instances whose CSVs already
+        existed are not generated again.
+
+    Raises:
+        ValueError: num_workers is smaller than 1.
+    """
+    if num_workers < 1:
+        raise ValueError("At least one worker is needed.")
+    missing_instances = [
+        (
+            project_quantity,
+            student_quantity,
+            instance_number,
+            instance_seed(seed, project_quantity, student_quantity, instance_number),
+            vectorized,
+        )
+        for project_quantity in project_quantities
+        for student_quantity in student_quantities
+        for instance_number in range(instances_per_combination)
+        if not all(
+            filepath.is_file()
+            for filepath in instance_filepaths(f"{project_quantity}_{student_quantity}", instance_number)
+        )
+    ]
+    if num_workers == 1:
+        for instance in missing_instances:
+            create_instance(*instance)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for future in as_completed(
+                [executor.submit(create_instance, *instance) for instance in missing_instances]
+            ):
+                future.result()
+    return len(missing_instances)
+
 
-folder_projects = Path("instances_projects")
-folder_students = Path("instances_students")
-folder_projects.mkdir()
-folder_students.mkdir()
-
-
-project_quantities = [3, 4, 5]
-student_quantities = [30, 40, 50]
-instances_per_combination = 10
-
-for project_quantity in project_quantities:
-    for student_quantity in student_quantities:
-        subfolder_dimension_projects = folder_projects / f"{project_quantity}_{student_quantity}_instances"
-        subfolder_dimension_students = folder_students / f"{project_quantity}_{student_quantity}_instances"
-        subfolder_dimension_projects.mkdir()
-        subfolder_dimension_students.mkdir()
-        for instance_number in range(instances_per_combination):
-            filename_projects = f"generic_{project_quantity}_{student_quantity}_projects_{instance_number}.csv"
-            filename_students = f"generic_{project_quantity}_{student_quantity}_students_{instance_number}.csv"
-
-            filepath_projects = subfolder_dimension_projects / filename_projects
-            filepath_students = subfolder_dimension_students / filename_students
-
-            problem_data.save_projects_and_students_instance(
-                num_projects=project_quantity,
-                num_students=student_quantity,
-                filepath_projects=filepath_projects,
-                filepath_students=filepath_students,
-            )
+if __name__ == "__main__":
+    settings = InstanceSettings()
+    num_created = create_instances(
+        project_quantities=settings.project_quantities,
+        student_quantities=settings.student_quantities,
+        instances_per_combination=settings.instances_per_combination,
+        seed=settings.seed,
+        num_workers=settings.num_workers,
+        vectorized=settings.vectorized,
+    )
+    print(f"Created {num_created} instances!")
@@ -0,0 +1,82 @@
+"""Contains the class DeltaCache."""
+
+import numpy as np
+
+from project_group import ProjectGroup
+from solution_state import SolutionState
+
+
+class DeltaCache:
+    """Bilateral counts and arrival deltas of all students for all slots.
+
+    The values of a slot only depend on the group occupying it, so they
+    are recalculated only for slots whose group was replaced or changed
+    its version since they were last calculated. After a move of a
+    student that are the slots of the two groups involved.
+
+    Attributes:
+        state: The solution state the values are calculated from.
+        reward_bilateral_interest_collaboration: The fixed reward for every
+            occurrence in the solution of two students who have specified
+            each other as partner preferences being in the same group.
+        bilateral_counts: The number of bilateral partners of every student
+            in the group of every slot. The first index is the slot, the
+            second index is the student ID.
+        arrival_deltas: The change in the objective value if a student
+            joined the group of a slot. The first index is the slot, the
+            second index is the student ID.
+        slot_stamps: The group and its version the values of every slot
+            were last calculated for.
+    """
+
+    def __init__(self, state: SolutionState, reward_bilateral_interest_collaboration: int):
+        """Initializes the cache with no values calculated yet.
+
+        Args:
+            state: The solution state the values are calculated from.
+            reward_bilateral_interest_collaboration: The fixed reward for every
+                occurrence in the solution of two students who have specified
+                each other as partner preferences being in the same group.
+        """
+        self.state = state
+        self.reward_bilateral_interest_collaboration = reward_bilateral_interest_collaboration
+        num_slots, num_students = len(state.slot_sizes), len(state.student_slots)
+        self.bilateral_counts = np.zeros((num_slots, num_students), dtype=np.int64)
+        self.arrival_deltas = np.zeros((num_slots, num_students), dtype=np.int64)
+        self.slot_stamps: list[tuple[ProjectGroup | None, int]] = [(None, 0)] * num_slots
+
+    def refresh(self) -> list[int]:
+        """Recalculates the values of all slots whose group changed.
+
+        Values of free slots are left as they are.
+
+        Returns:
+            The slots whose values were recalculated.
+        """
+        outdated_slots = [
+            slot
+            for slot, (group, stamp) in enumerate(zip(self.state.slot_groups, self.slot_stamps))
+            if group is not None and (stamp[0] is not group or stamp[1] != group.version)
+        ]
+        for slot in outdated_slots:
+            self._recalculate_slot(slot)
+        return outdated_slots
+
+    def _recalculate_slot(self, slot: int):
+        state = self.state
+        partner_ids = [
+            partner_id
+            for student_id in state.slot_members[slot]
+            for partner_id in state.bilateral_partners[student_id]
+        ]
+        self.bilateral_counts[slot] = np.bincount(
+            np.array(partner_ids, dtype=np.int64), minlength=len(state.student_slots)
+        )
+        size_penalty = int(state.slot_size_penalties[slot])
+        self.arrival_deltas[slot] = (
+            state.preference_matrix[:, state.slot_projects[slot]]
+            + self.bilateral_counts[slot] * self.reward_bilateral_interest_collaboration
+            + (size_penalty if state.slot_sizes[slot] < state.slot_ideal_sizes[slot] else -size_penalty)
+        )
+        group = state.slot_groups[slot]
+        self.slot_stamps[slot] = (group, group.version)
@@ -1,10 +1,8 @@
 """Contains a function that demonstrates VNS on a specified or random instance."""
 
-import json
-from pathlib import Path
-
 import pandas as pd
 
+from instance_loader import load_instance
 from problem_data import generate_throwaway_instance
 from settings import DemonstrationSettings
 from vns_on_student_assignment import VariableNeighborhoodSearch
@@ -34,6 +32,7 @@ def demonstrate_vns(
     seed_instance_generation: int | None,
     seed_vns_run: int | None,
     iterations: int,
+    construction: str = "greedy",
 ):
     """Demonstrates VNS on a specific or random instance.
 
@@ -59,22 +58,13 @@ def demonstrate_vns(
             run_general_vns_best_improvement of
             VariableNeighborhoodSearch before solving
             stops and final results are printed.
+        construction: How the initial solution is constructed,
+            either "greedy" or by "regret".
     """
     if instance_number != None:
         if not 0 <= instance_number <= 9:
             raise ValueError("Only instance numbers from 0 to 9 are valid!")
-        dimension = f"{num_projects}_{num_students}"
-        dimension_subfolder = f"{dimension}_instances"
-        folder_projects = Path("instances_projects")
-        filename_projects = f"generic_{dimension}_projects_{instance_number}.csv"
-        filepath_projects = folder_projects / dimension_subfolder / filename_projects
-        folder_students = Path("instances_students")
-        filename_students = f"generic_{dimension}_students_{instance_number}.csv"
-        filepath_students = folder_students / dimension_subfolder / filename_students
-        projects_df = pd.read_csv(filepath_projects)
-        students_df = pd.read_csv(filepath_students)
-        students_df["fav_partners"] = students_df["fav_partners"].apply(json.loads)
-        students_df["project_prefs"] = students_df["project_prefs"].apply(lambda x: tuple(json.loads(x)))
+        projects_df, students_df = load_instance(f"{num_projects}_{num_students}", instance_number)
     else:
         projects_df, students_df = generate_throwaway_instance(
             num_projects=num_projects, num_students=num_students, seed=seed_instance_generation
@@ -85,9 +75,11 @@ def demonstrate_vns(
     vns_run = VariableNeighborhoodSearch(
         projects_df,
         students_df,
+        construction=construction,
     )
     print("\nTHIS IS THE INITIAL SOLUTION:")
     report_current_solution(vns_run)
+    print(f"It was constructed in {vns_run.construction_time} seconds.")
     vns_run.run_general_vns_best_improvement(seed=seed_vns_run, iteration_limit=iterations, demonstrating=True)
     print("\nTHIS IS THE FINAL SOLUTION:")
     report_current_solution(vns_run)
@@ -102,4 +94,5 @@ if __name__ == "__main__":
         settings.seed_instance_generation,
         settings.seed_vns_run,
         settings.iterations,
+        settings.construction,
     )
@@ -1,12 +1,13 @@
 """Used to benchmark Gurobi."""
 
-import json
 from pathlib import Path
 
 import gurobipy as gp
 import pandas as pd
 from gurobipy import GRB
 
+from instance_loader import load_instance
+from results_sink import ResultsSink
 from settings import BenchmarkSettingsGurobi
 
 
@@ -261,12 +262,17 @@ def benchmark_gurobi(
     penalty_unassignment: int,
     filename: str,
     time_limit: int,
+    resume: bool = False,
 ) -> None:
     """Saves benchmarks of Gurobi in designated JSON.
 
     Loads one instance after another. For every problem instance:
     Initializes an instance of SolutionsRecorder, which keeps
-    track of intermediate and final results.
+    track of intermediate and final results. They are appended to a
+    JSON Lines file next to the JSON as soon as the instance is solved
+    and saved in the JSON once all instances are solved. An interrupted
+    benchmark run is continued with resume == True, skipping the instances
+    with results.
 
     Args:
         project_quantities: Only instances where the number of projects
@@ -285,41 +291,38 @@ def benchmark_gurobi(
         filename: The name of the JSON in which the results
             of the benchmark run are supposed to be saved.
         time_limit: Limit on time spent optimizing one instance.
+        resume: Set to True if an interrupted benchmark run with the same
+            filename should be continued.
 
     Raises:
-        ValueError: Already a file at path of filename.
+        ValueError: Already a file at path of filename or where results
+            are appended to and resume == False.
     """
-    solution_and_bound_developments = {}
-    folder_projects = Path("instances_projects")
-    folder_students = Path("instances_students")
-    results_path = Path(filename)
-    if results_path.is_file():
-        raise ValueError(f"{results_path} already exists!")
+    results_sink = ResultsSink(Path(filename))
+    if not resume:
+        for path in (results_sink.path_results, results_sink.path_records):
+            if path.is_file():
+                raise ValueError(f"{path} already exists!")
+    completed_keys = results_sink.load().keys()
+    instance_keys = []
     for project_quantity in project_quantities:
         for student_quantity in student_quantities:
             dimension = f"{project_quantity}_{student_quantity}"
-            dimension_subfolder = f"{dimension}_instances"
             for instance in range(instances_per_dimension):
-                filename_projects = f"generic_{dimension}_projects_{instance}.csv"
-                filename_students = f"generic_{dimension}_students_{instance}.csv"
-                filepath_projects = folder_projects / dimension_subfolder / filename_projects
-                filepath_students = folder_students / dimension_subfolder / filename_students
-                projects_info = pd.read_csv(filepath_projects)
-                students_info = pd.read_csv(filepath_students)
-                students_info["fav_partners"] = students_info["fav_partners"].apply(json.loads)
-                students_info["project_prefs"] = students_info["project_prefs"].apply(lambda x: tuple(json.loads(x)))
+                instance_keys.append(f"generic_{dimension}_{instance}")
+                if instance_keys[-1] in completed_keys:
+                    continue
+                projects_info, students_info = load_instance(dimension, instance)
                 model = get_gurobi_model(
                     projects=projects_info,
                     students=students_info,
                     reward_bilateral=reward_bilateral,
                     penalty_unassignment=penalty_unassignment,
                 )
-                solution_and_bound_developments[f"generic_{dimension}_{instance}"] = SolutionsRecorder(
-                    model, time_limit
-                ).solutions_with_bound()
-                results_path.write_text(json.dumps(solution_and_bound_developments, indent=4), encoding="utf-8")
+                results_sink.append(instance_keys[-1], SolutionsRecorder(model, time_limit).solutions_with_bound())
                 model.dispose()
                 gp.disposeDefaultEnv()
+    results_sink.finalize(instance_keys)
 
 
 if __name__ == "__main__":
@@ -332,4 +335,5 @@ if __name__ == "__main__":
         penalty_unassignment=settings.penalty_unassignment,
         filename=settings.filename,
         time_limit=settings.time_limit,
+        resume=settings.resume,
     )
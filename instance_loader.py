@@ -0,0 +1,215 @@
+"""Contains functions that load instances through a binary cache.
+
+Parsing the CSVs of an instance with pandas and json is slow compared
+to solving small instances. The first time an instance is loaded its
+CSVs are compiled into a NumPy archive in the cache folder,
+which every later load reads instead. An archive is compiled anew as
+soon as one of its CSVs was modified. Only building data frames needs
+pandas, so it is imported when that is done for the first time.
+Generated instances can also be saved as archives without any CSVs.
+They are named apart from the archives compiled from CSVs and only
+loaded if there are no CSVs of the instance.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FOLDER_PROJECTS = Path("instances_projects")
+FOLDER_STUDENTS = Path("instances_students")
+FOLDER_CACHE = Path("instance_cache")
+PROJECT_PARAMETER_COLUMNS = (
+    "desired#groups",
+    "max#groups",
+    "ideal_group_size",
+    "min_group_size",
+    "max_group_size",
+    "pen_groups",
+    "pen_size",
+)
+
+
+def instance_filepaths(dimension: str, instance_number: int) -> tuple[Path, Path]:
+    """Returns the paths of the CSVs with the project and the student data of an instance.
+
+    Args:
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+    """
+    dimension_subfolder = f"{dimension}_instances"
+    filename_projects = f"generic_{dimension}_projects_{instance_number}.csv"
+    filename_students = f"generic_{dimension}_students_{instance_number}.csv"
+    return (
+        FOLDER_PROJECTS / dimension_subfolder / filename_projects,
+        FOLDER_STUDENTS / dimension_subfolder / filename_students,
+    )
+
+
+def read_instance_csvs(filepath_projects: Path, filepath_students: Path) -> tuple["pd.DataFrame", "pd.DataFrame"]:
+    """Returns the project and the student data of an instance parsed from its CSVs."""
+    import pandas as pd
+
+    projects_info = pd.read_csv(filepath_projects)
+    students_info = pd.read_csv(filepath_students)
+    students_info["fav_partners"] = students_info["fav_partners"].apply(json.loads)
+    students_info["project_prefs"] = students_info["project_prefs"].apply(lambda x: tuple(json.loads(x)))
+    return projects_info, students_info
+
+
+def source_stamps(filepath_projects: Path, filepath_students: Path) -> list[int]:
+    """Returns the modification times in nanoseconds and the sizes of the CSVs of an instance."""
+    stats = (filepath_projects.stat(), filepath_students.stat())
+    return [stat.st_mtime_ns for stat in stats] + [stat.st_size for stat in stats]
+
+
+def instance_archive_path(dimension: str, instance_number: int, generated: bool = False) -> Path:
+    """Returns the path of the archive of an instance in the cache folder.
+
+    Args:
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+        generated: Whether the archive is one saved by save_instance_arrays
+            instead of one compiled from CSVs.
+    """
+    prefix = "generated" if generated else "generic"
+    return FOLDER_CACHE / f"{dimension}_instances" / f"{prefix}_{dimension}_{instance_number}.npz"
+
+
+def write_archive(arrays: dict[str, np.ndarray], filepath_cache: Path):
+    """Writes the arrays of an instance into an archive.
+
+    Workers loading the same instance at once must not read a half
+    written archive, so it is written to a temporary file first.
+    """
+    filepath_cache.parent.mkdir(parents=True, exist_ok=True)
+    filepath_temporary = filepath_cache.with_name(f"{filepath_cache.name}.{os.getpid()}.tmp")
+    with filepath_temporary.open("wb") as f:
+        np.savez(f, **arrays)
+    os.replace(filepath_temporary, filepath_cache)
+
+
+def compile_instance(filepath_projects: Path, filepath_students: Path, filepath_cache: Path):
+    """Compiles the CSVs of an instance into an archive of arrays.
+
+    The archive holds the project names, the project parameters in the
+    order of PROJECT_PARAMETER_COLUMNS, the student names, the preference
+    matrix with one row per student, the partner preferences of all
+    students in compressed sparse row format and the modification times
+    and sizes of both CSVs it was compiled from.
+    """
+    projects_info, students_info = read_instance_csvs(filepath_projects, filepath_students)
+    partner_preferences = students_info["fav_partners"].tolist()
+    write_archive(
+        {
+            "project_names": np.array(projects_info["name"].tolist(), dtype=str),
+            "project_parameters": projects_info[list(PROJECT_PARAMETER_COLUMNS)].to_numpy(dtype=np.int64),
+            "student_names": np.array(students_info["name"].tolist(), dtype=str),
+            "preference_matrix": np.array(students_info["project_prefs"].tolist(), dtype=np.int64).reshape(
+                len(students_info), len(projects_info)
+            ),
+            "partner_offsets": np.cumsum([0] + [len(partners) for partners in partner_preferences], dtype=np.int64),
+            "partner_ids": np.array(
+                [partner for partners in partner_preferences for partner in partners], dtype=np.int64
+            ),
+            "source_stamps": np.array(source_stamps(filepath_projects, filepath_students), dtype=np.int64),
+        },
+        filepath_cache,
+    )
+
+
+def save_instance_arrays(arrays: dict[str, np.ndarray], dimension: str, instance_number: int):
+    """Saves a generated instance given as arrays directly in the cache folder.
+
+    The archive has no CSVs behind it, so it is never compiled anew. It is
+    loaded like any other instance as long as there are no CSVs of an
+    instance with the same dimension and number, which take precedence.
+
+    Args:
+        arrays: The arrays of the instance named as in compile_instance
+            except the modification times and sizes of the CSVs.
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+    """
+    write_archive(arrays, instance_archive_path(dimension, instance_number, generated=True))
+
+
+def load_instance_arrays(dimension: str, instance_number: int) -> dict[str, np.ndarray]:
+    """Returns the arrays of an instance, compiling them first if necessary.
+
+    Args:
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+
+    Returns:
+        The arrays described in compile_instance by name except the
+        modification times and sizes of the CSVs. They can be passed to
+        VariableNeighborhoodSearch.from_arrays as they are. If there are
+        no CSVs of the instance, those saved by save_instance_arrays.
+    """
+    filepath_projects, filepath_students = instance_filepaths(dimension, instance_number)
+    filepath_generated = instance_archive_path(dimension, instance_number, generated=True)
+    if not (filepath_projects.is_file() and filepath_students.is_file()) and filepath_generated.is_file():
+        with np.load(filepath_generated) as archive:
+            return dict(archive)
+    filepath_cache = instance_archive_path(dimension, instance_number)
+    if filepath_cache.is_file():
+        with np.load(filepath_cache) as archive:
+            arrays = dict(archive)
+        stamps = arrays.pop("source_stamps").tolist()
+        if stamps == source_stamps(filepath_projects, filepath_students):
+            return arrays
+    compile_instance(filepath_projects, filepath_students, filepath_cache)
+    with np.load(filepath_cache) as archive:
+        arrays = dict(archive)
+    del arrays["source_stamps"]
+    return arrays
+
+
+def load_instance(dimension: str, instance_number: int) -> tuple["pd.DataFrame", "pd.DataFrame"]:
+    """Returns the project and the student data of an instance.
+
+    The data frames are the same as if the CSVs had been parsed, but
+    they are built from the cached arrays.
+
+    Args:
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+    """
+    return instance_data_frames(load_instance_arrays(dimension, instance_number))
+
+
+def instance_data_frames(arrays: dict[str, np.ndarray]) -> tuple["pd.DataFrame", "pd.DataFrame"]:
+    """Returns the project and the student data of an instance given as arrays.
+
+    Args:
+        arrays: The arrays of an instance as returned by load_instance_arrays.
+    """
+    import pandas as pd
+
+    projects_info = pd.DataFrame(arrays["project_parameters"], columns=list(PROJECT_PARAMETER_COLUMNS))
+    projects_info.insert(0, "name", arrays["project_names"].tolist())
+    partner_offsets, partner_ids = arrays["partner_offsets"].tolist(), arrays["partner_ids"].tolist()
+    students_info = pd.DataFrame(
+        {
+            "name": arrays["student_names"].tolist(),
+            "fav_partners": [partner_ids[start:end] for start, end in zip(partner_offsets[:-1], partner_offsets[1:])],
+            "project_prefs": [tuple(preferences) for preferences in arrays["preference_matrix"].tolist()],
+        }
+    )
+    return projects_info, students_info
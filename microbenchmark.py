@@ -0,0 +1,314 @@
+"""Contains functions to benchmark the primitives of VNS on their own.
+
+Every primitive is timed on fixed instances from the instance folders
+with an initial solution that is the same for every run. Each repetition
+starts from the same solution and the same random state, so repetitions
+only differ by noise. The first repetitions only warm up caches and are
+not timed. Garbage collection is disabled while timing.
+
+The results can be compared with those of an earlier run, so that changes
+to the primitives can be checked against a baseline.
+"""
+
+import gc
+import itertools as it
+import json
+import os
+import statistics
+import time as t
+from collections.abc import Callable
+from pathlib import Path
+
+from instance_loader import load_instance_arrays
+from settings import MicrobenchmarkSettings
+from vns_on_student_assignment import VariableNeighborhoodSearch
+
+
+def time_operation(
+    operation: Callable[[], object],
+    setup: Callable[[], object] | None = None,
+    teardown: Callable[[], object] | None = None,
+    warmup: int = 3,
+    repetitions: int = 20,
+) -> list[float]:
+    """Returns the times in seconds of repeated runs of an operation.
+
+    Args:
+        operation: The operation which is timed.
+        setup: Called before every run of the operation without being timed.
+        teardown: Called after every run of the operation without being
+            timed, for example to undo what the operation changed.
+        warmup: The number of runs before the timed ones.
+        repetitions: The number of timed runs.
+    """
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for repetition in range(warmup + repetitions):
+            if setup is not None:
+                setup()
+            start = t.perf_counter()
+            operation()
+            elapsed = t.perf_counter() - start
+            if teardown is not None:
+                teardown()
+            if repetition >= warmup:
+                times.append(elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return times
+
+
+def summarize_times(times: list[float], num_calls: int) -> dict:
+    """Returns the minimum, median, mean and standard deviation of the times of an operation.
+
+    Args:
+        times: The times in seconds of the runs of the operation.
+        num_calls: How often the primitive is called in one run of the operation.
+            The median time of one call is added as "median_per_call".
+    """
+    return {
+        "repetitions": len(times),
+        "calls": num_calls,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "median_per_call": statistics.median(times) / max(1, num_calls),
+    }
+
+
+def primitive_operations(
+    vns: VariableNeighborhoodSearch, seed: int, max_combinations_per_pass: int
+) -> dict[str, tuple[Callable, Callable | None, Callable | None, int]]:
+    """Returns the operations timed for every primitive of VNS.
+
+    Every operation leaves the solution as it found it, either by itself or
+    by its teardown.
+
+    Args:
+        vns: The solver whose primitives are timed, holding its initial solution.
+        seed: The random seed the solver is seeded with before every run.
+        max_combinations_per_pass: The maximum number of student combinations
+            evaluated by one run of local search moving two or more students.
+
+    Returns:
+        The operation, its setup, its teardown and the number of calls of the
+        primitive in one run of the operation by name of the primitive.
+    """
+    vns.max_combinations_per_pass = max_combinations_per_pass
+    assigned_students = [
+        student for student in vns.students if vns.student_locations[student.student_id] is not vns.unassigned_students
+    ]
+    departures = [(*vns.student_locations[student.student_id], student) for student in assigned_students]
+    arrivals = [
+        (*destination, student)
+        for destination in vns.destinations[:-1]
+        for student in vns.students
+        if student not in destination[1].students
+    ]
+    first_departure = departures[0]
+    other_destination = next(
+        destination for destination in vns.destinations[:-1] if destination[1] is not first_departure[1]
+    )
+    relocation = (first_departure, (*other_destination, first_departure[-1]))
+
+    def seed_rng():
+        vns.rng.seed(seed)
+
+    def calculate_arrival_deltas():
+        for arrival in arrivals:
+            vns._calculate_arrival_delta(arrival)
+
+    def calculate_leaving_deltas():
+        for departure in departures:
+            vns._calculate_leaving_delta(departure)
+
+    def move_students():
+        for departure in departures:
+            unassignment = (vns.unassigned_students, departure[-1])
+            vns._move_student(departure, unassignment)
+            vns._move_student(unassignment, departure)
+
+    def update_state():
+        state = vns.state
+        for student in assigned_students:
+            slot = state.student_slots[student.student_id]
+            state.remove_student(student.student_id)
+            state.add_student(student.student_id, slot)
+
+    def shake():
+        vns._shake(2, True, 10, 0.05)
+
+    objective_value = vns.objective_value
+
+    def undo_moves():
+        for move_reversal in reversed(vns.move_reversals):
+            vns._move_student(*move_reversal)
+        vns.move_reversals = []
+        vns.objective_value = objective_value
+
+    def local_search_best_improvement(num_to_move: int) -> Callable:
+        ordered_n_tuples_destinations = list(it.product(vns.destinations, repeat=num_to_move))
+        return lambda: vns._local_search_best_improvement(
+            ordered_n_tuples_destinations, vns.student_locations, True, num_to_move
+        )
+
+    def setup_single_moves():
+        vns.single_move_rankings = {}
+
+    operations = {
+        "calculate_arrival_delta": (calculate_arrival_deltas, None, None, len(arrivals)),
+        "calculate_leaving_delta": (calculate_leaving_deltas, None, None, len(departures)),
+        "move_student": (move_students, None, None, 2 * len(departures)),
+        "add_and_remove_student_in_state": (update_state, None, None, 2 * len(assigned_students)),
+        "refresh_delta_cache": (
+            vns.delta_cache.refresh,
+            lambda: vns._move_student(*relocation),
+            lambda: vns._move_student(*relocation[::-1]),
+            1,
+        ),
+        "shake": (shake, seed_rng, undo_moves, 1),
+        "local_search_single_moves": (
+            lambda: vns._local_search_single_moves(vns.destinations, True),
+            setup_single_moves,
+            None,
+            1,
+        ),
+        "local_search_pair_moves": (lambda: vns._local_search_pair_moves(vns.destinations, True), seed_rng, None, 1),
+    }
+    for num_to_move in (1, 2, 3):
+        operations[f"local_search_best_improvement_{num_to_move}"] = (
+            local_search_best_improvement(num_to_move),
+            seed_rng,
+            None,
+            1,
+        )
+    operations |= {
+        "get_founding_options": (vns._get_founding_options, seed_rng, vns._remove_empty_groups, 1),
+        "get_dissolution_options": (vns._get_dissolution_options, seed_rng, None, 1),
+        "current_objective_value": (vns.current_objective_value, None, None, 1),
+    }
+    return operations
+
+
+def compare_to_baseline(results: dict, baseline: dict) -> dict:
+    """Returns how the median times of primitives changed compared with a baseline.
+
+    Args:
+        results: The results of run_microbenchmarks.
+        baseline: The results of an earlier run of run_microbenchmarks.
+
+    Returns:
+        The median time divided by the median time in the baseline by primitive
+        by instance. Primitives and instances missing in either are left out.
+    """
+    return {
+        instance: {
+            primitive: summary["median"] / baseline[instance][primitive]["median"]
+            for primitive, summary in summaries.items()
+            if primitive in baseline[instance] and baseline[instance][primitive]["median"] > 0
+        }
+        for instance, summaries in results.items()
+        if instance in baseline
+    }
+
+
+def run_microbenchmarks(
+    filename_results: str,
+    instances: list[tuple[str, int]],
+    warmup: int = 3,
+    repetitions: int = 20,
+    seed: int = 0,
+    construction: str = "greedy",
+    max_combinations_per_pass: int = 20,
+    primitives: list[str] | None = None,
+    filename_baseline: str | None = None,
+) -> dict:
+    """Times every primitive of VNS on every instance and saves the results in a JSON.
+
+    Args:
+        filename_results: The name of the JSON in which the results are saved.
+        instances: The dimensions and instance numbers of the instances, for
+            example ("4_40", 0).
+        warmup: The number of untimed runs of every operation before the timed ones.
+        repetitions: The number of timed runs of every operation.
+        seed: The random seed the solver is seeded with before every run of an
+            operation that draws random numbers.
+        construction: How the initial solutions are constructed, either
+            "greedy" or by "regret".
+        max_combinations_per_pass: The maximum number of student combinations
+            evaluated by one run of local search moving two or more students.
+        primitives: The names of the primitives which are timed as in
+            primitive_operations. None means all primitives are timed.
+        filename_baseline: The name of the JSON of an earlier run the results are
+            compared with. None means the results are not compared.
+
+    Returns:
+        The saved JSON as a dictionary. It holds the arguments, the summaries
+        of the times by primitive by instance as returned by summarize_times
+        and, if there is a baseline, the changes returned by compare_to_baseline.
+
+    Raises:
+        ValueError: Already a file where the results are to be saved.
+        ValueError: A primitive has no operation.
+        RuntimeError: An operation did not leave the solution as it found it.
+    """
+    path_results = Path(filename_results)
+    if path_results.is_file():
+        raise ValueError(f"{path_results} already exists!")
+    results = {}
+    for dimension, instance_number in instances:
+        vns = VariableNeighborhoodSearch.from_arrays(
+            **load_instance_arrays(dimension, instance_number), construction=construction
+        )
+        operations = primitive_operations(vns, seed, max_combinations_per_pass)
+        if unknown_primitives := set(primitives or []) - operations.keys():
+            raise ValueError(f"There are no operations for {sorted(unknown_primitives)}!")
+        summaries = {}
+        for primitive, (operation, setup, teardown, num_calls) in operations.items():
+            if primitives is not None and primitive not in primitives:
+                continue
+            times = time_operation(operation, setup, teardown, warmup, repetitions)
+            if error_report := vns.check_solution():
+                raise RuntimeError(f"{primitive} changed the solution: {error_report}")
+            summaries[primitive] = summarize_times(times, num_calls)
+        results[f"generic_{dimension}_{instance_number}"] = summaries
+        print(f"Done with instance {dimension}_{instance_number}!")
+
+    report = {
+        "settings": {
+            "instances": [list(instance) for instance in instances],
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "seed": seed,
+            "construction": construction,
+            "max_combinations_per_pass": max_combinations_per_pass,
+        },
+        "results": results,
+    }
+    if filename_baseline is not None:
+        baseline = json.loads(Path(filename_baseline).read_text(encoding="utf-8"))
+        report["baseline"] = filename_baseline
+        report["change_from_baseline"] = compare_to_baseline(results, baseline["results"])
+    path_temporary = path_results.with_name(f"{path_results.name}.{os.getpid()}.tmp")
+    path_temporary.write_text(json.dumps(report, indent=4), encoding="utf-8")
+    os.replace(path_temporary, path_results)
+    return report
+
+
+if __name__ == "__main__":
+    settings = MicrobenchmarkSettings()
+    run_microbenchmarks(
+        filename_results=settings.filename_results,
+        instances=settings.instances,
+        warmup=settings.warmup,
+        repetitions=settings.repetitions,
+        seed=settings.seed,
+        construction=settings.construction,
+        max_combinations_per_pass=settings.max_combinations_per_pass,
+        primitives=settings.primitives,
+        filename_baseline=settings.filename_baseline,
+    )
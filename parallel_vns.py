@@ -0,0 +1,353 @@
+"""Contains the class ParallelVNS."""
+
+import json
+import os
+import queue
+import time as t
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from instance_loader import load_instance
+from settings import ParallelSettings
+from vns_on_student_assignment import VariableNeighborhoodSearch, info_records
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def run_single_start(
+    projects_info: Sequence[tuple],
+    students_info: Sequence[tuple],
+    solver_options: dict,
+    run_options: dict,
+    first_improvement: bool,
+) -> dict:
+    """Solves an instance with one independent run of VNS.
+
+    Args:
+        projects_info: The project data of the instance as records.
+        students_info: The student data of the instance as records.
+        solver_options: Keyword arguments passed to VariableNeighborhoodSearch.
+        run_options: Keyword arguments passed to the run method. The run
+            is always benchmarking.
+        first_improvement: Whether run_general_vns_first_improvement is used
+            instead of run_general_vns_best_improvement.
+
+    Returns:
+        The seed, the trajectory of solutions that improved on the best found
+        before in the format of the benchmarks, the best objective value and
+        the assignment of the best solution as returned by export_assignment.
+    """
+    vns = VariableNeighborhoodSearch(projects_info, students_info, **solver_options)
+    run = vns.run_general_vns_first_improvement if first_improvement else vns.run_general_vns_best_improvement
+    trajectory = run(benchmarking=True, **run_options)
+    return {
+        "seed": run_options["seed"],
+        "trajectory": trajectory,
+        "best_objective_value": vns.best_objective_value,
+        "assignment": vns.export_assignment(),
+    }
+
+
+def migration_targets(island: int, num_islands: int, topology: str) -> list[int]:
+    """Returns the islands an island sends its incumbent solution to.
+
+    Args:
+        island: The number of the sending island.
+        num_islands: The number of islands.
+        topology: "ring" sends to the next island only, "complete" sends
+            to all other islands.
+
+    Raises:
+        ValueError: topology is neither "ring" nor "complete".
+    """
+    if topology == "ring":
+        return [(island + 1) % num_islands] if num_islands > 1 else []
+    if topology == "complete":
+        return [other_island for other_island in range(num_islands) if other_island != island]
+    raise ValueError('The topology is either "ring" or "complete".')
+
+
+def run_island(
+    projects_info: Sequence[tuple],
+    students_info: Sequence[tuple],
+    solver_options: dict,
+    run_options: dict,
+    first_improvement: bool,
+    island: int,
+    inboxes: list,
+    topology: str,
+    migration_interval: float,
+) -> dict:
+    """Solves an instance with VNS on one island exchanging solutions with others.
+
+    VNS runs in epochs of migration_interval seconds. After every epoch the
+    incumbent solution is sent to the inboxes of the target islands and the
+    best solution waiting in the own inbox is adopted if it is better than
+    the incumbent one.
+
+    Args:
+        projects_info: The project data of the instance as records.
+        students_info: The student data of the instance as records.
+        solver_options: Keyword arguments passed to VariableNeighborhoodSearch.
+        run_options: Keyword arguments passed to the run method. The run
+            is always benchmarking and time_limit is the time limit of
+            the whole run on the island.
+        first_improvement: Whether run_general_vns_first_improvement is used
+            instead of run_general_vns_best_improvement.
+        island: The number of the island.
+        inboxes: The queue of migrants of every island by island number.
+        topology: How the islands are connected, see migration_targets.
+        migration_interval: The time in seconds between two migrations.
+
+    Returns:
+        The same as run_single_start and the number of migrants adopted.
+        Neighborhood 0 in the trajectory is the initial solution or an
+        adopted migrant.
+    """
+    vns = VariableNeighborhoodSearch(projects_info, students_info, **solver_options)
+    run = vns.run_general_vns_first_improvement if first_improvement else vns.run_general_vns_best_improvement
+    targets = migration_targets(island, len(inboxes), topology)
+    epoch_options = dict(run_options)
+    time_limit = epoch_options.pop("time_limit")
+    trajectory = []
+    num_adopted = 0
+    while True:
+        epoch_end = min(t.time() - vns.time_data_loaded + migration_interval, time_limit)
+        epoch_trajectory = run(benchmarking=True, time_limit=epoch_end, **epoch_options)
+        # The random state carries over from the previous epoch.
+        epoch_options["seed"] = None
+        trajectory += [
+            solution for solution in epoch_trajectory if not trajectory or solution["obj"] > trajectory[-1]["obj"]
+        ]
+        if t.time() - vns.time_data_loaded > time_limit:
+            break
+
+        assignment = vns.export_assignment()
+        for target in targets:
+            inboxes[target].put((vns.best_objective_value, assignment))
+        migrants = []
+        while True:
+            try:
+                migrants.append(inboxes[island].get_nowait())
+            except queue.Empty:
+                break
+        if migrants:
+            migrant_objective_value, migrant_assignment = max(migrants, key=lambda migrant: migrant[0])
+            if migrant_objective_value > vns.best_objective_value:
+                vns.import_assignment(migrant_assignment)
+                num_adopted += 1
+
+    return {
+        "seed": run_options["seed"],
+        "trajectory": trajectory,
+        "best_objective_value": vns.best_objective_value,
+        "assignment": vns.export_assignment(),
+        "migrants_adopted": num_adopted,
+    }
+
+
+class ParallelVNS:
+    """Runs of VNS on one instance in separate processes.
+
+    Every run starts from the same initial solution with a distinct
+    seed derived from a single seed. The runs are either independent
+    or islands that periodically exchange their incumbent solutions.
+
+    Attributes:
+        projects_info: The project data of the instance as records, so
+            that the workers do not need pandas.
+        students_info: The student data of the instance as records.
+        num_workers: The number of runs, each in its own process.
+        solver_options: Keyword arguments passed to VariableNeighborhoodSearch
+            in every process.
+    """
+
+    def __init__(
+        self,
+        projects_info: "pd.DataFrame | Sequence[tuple]",
+        students_info: "pd.DataFrame | Sequence[tuple]",
+        num_workers: int | None = None,
+        reward_bilateral_interest_collaboration: int = 2,
+        penalty_student_not_assigned: int = 3,
+        construction: str = "greedy",
+    ):
+        """Initializes the parallel runs on an instance.
+
+        Args:
+            projects_info: The project data of the instance as a data frame
+                or as records.
+            students_info: The student data of the instance as a data frame
+                or as records.
+            num_workers: The number of runs, each in its own process. None
+                means one per CPU.
+            reward_bilateral_interest_collaboration: The fixed reward for every
+                occurrence in the solution of two students who have specified
+                each other as partner preferences being in the same group.
+            penalty_student_not_assigned: The fixed penalty for every student
+                in the solution who is not assigned to a group.
+            construction: How the initial solution is constructed, either
+                "greedy" or by "regret".
+
+        Raises:
+            ValueError: num_workers is smaller than 1.
+        """
+        if num_workers is not None and num_workers < 1:
+            raise ValueError("At least one worker is needed.")
+        self.projects_info, self.students_info = info_records(projects_info), info_records(students_info)
+        self.num_workers = num_workers or os.cpu_count()
+        self.solver_options = {
+            "reward_bilateral_interest_collaboration": reward_bilateral_interest_collaboration,
+            "penalty_student_not_assigned": penalty_student_not_assigned,
+            "construction": construction,
+        }
+
+    def derive_seeds(self, seed: int | None) -> list[int]:
+        """Returns a distinct seed for every worker derived from one seed.
+
+        Args:
+            seed: The seed of the parallel run. None means fresh entropy.
+        """
+        return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(self.num_workers)]
+
+    def run(
+        self,
+        time_limit: int = 300,
+        seed: int | None = None,
+        first_improvement: bool = False,
+        candidate_list: bool = False,
+    ) -> dict:
+        """Runs VNS independently in all workers and collects the results.
+
+        Args:
+            time_limit: How long every worker solves the instance.
+            seed: The seed from which the seeds of the workers are derived.
+            first_improvement: Whether the workers use first instead of best
+                improvement in local search.
+            candidate_list: Whether local search of the workers only moves
+                candidate students.
+
+        Returns:
+            The best objective value found by any worker, the assignment of
+            that solution as returned by export_assignment, the seeds of the
+            workers and the trajectory of every worker in the same order.
+            Every trajectory is the list of dictionaries with "obj", "runtime"
+            and "neighborhood" the benchmarks consist of.
+        """
+        seeds = self.derive_seeds(seed)
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            futures = [
+                executor.submit(
+                    run_single_start,
+                    self.projects_info,
+                    self.students_info,
+                    self.solver_options,
+                    {"time_limit": time_limit, "seed": worker_seed, "candidate_list": candidate_list},
+                    first_improvement,
+                )
+                for worker_seed in seeds
+            ]
+            return self._summarize(self._collect_results(futures, seeds), seeds)
+
+    def run_islands(
+        self,
+        time_limit: int = 300,
+        seed: int | None = None,
+        migration_interval: float = 5,
+        topology: str = "ring",
+        first_improvement: bool = False,
+        candidate_list: bool = False,
+    ) -> dict:
+        """Runs VNS on islands that periodically exchange their incumbent solutions.
+
+        Every worker is an island. After every migration_interval seconds it
+        sends its incumbent solution to its target islands and adopts the
+        best solution it received if that is better than its own.
+
+        Args:
+            time_limit: How long every island solves the instance.
+            seed: The seed from which the seeds of the islands are derived.
+            migration_interval: The time in seconds between two migrations.
+            topology: "ring" if every island sends to the next island only,
+                "complete" if every island sends to all other islands.
+            first_improvement: Whether the islands use first instead of best
+                improvement in local search.
+            candidate_list: Whether local search of the islands only moves
+                candidate students.
+
+        Returns:
+            The same as run and the number of migrants every island adopted
+            in the same order as the trajectories.
+
+        Raises:
+            ValueError: migration_interval is not positive.
+            ValueError: topology is neither "ring" nor "complete".
+        """
+        if migration_interval <= 0:
+            raise ValueError("The migration interval must be positive.")
+        if topology not in ("ring", "complete"):
+            raise ValueError('The topology is either "ring" or "complete".')
+        seeds = self.derive_seeds(seed)
+        with Manager() as manager, ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            inboxes = [manager.Queue() for _ in seeds]
+            futures = [
+                executor.submit(
+                    run_island,
+                    self.projects_info,
+                    self.students_info,
+                    self.solver_options,
+                    {"time_limit": time_limit, "seed": worker_seed, "candidate_list": candidate_list},
+                    first_improvement,
+                    island,
+                    inboxes,
+                    topology,
+                    migration_interval,
+                )
+                for island, worker_seed in enumerate(seeds)
+            ]
+            results = self._collect_results(futures, seeds)
+        summary = self._summarize(results, seeds)
+        summary["migrants_adopted"] = [result["migrants_adopted"] for result in results]
+        return summary
+
+    def _collect_results(self, futures: list, seeds: list[int]) -> list[dict]:
+        results_by_seed = {}
+        for future in as_completed(futures):
+            result = future.result()
+            results_by_seed[result["seed"]] = result
+        return [results_by_seed[worker_seed] for worker_seed in seeds]
+
+    def _summarize(self, results: list[dict], seeds: list[int]) -> dict:
+        best_result = max(results, key=lambda result: result["best_objective_value"])
+        return {
+            "best_objective_value": best_result["best_objective_value"],
+            "best_assignment": best_result["assignment"],
+            "seeds": seeds,
+            "trajectories": [result["trajectory"] for result in results],
+        }
+
+
+if __name__ == "__main__":
+    settings = ParallelSettings()
+    projects_df, students_df = load_instance(
+        f"{settings.num_projects}_{settings.num_students}", settings.instance_number
+    )
+    parallel_vns = ParallelVNS(
+        projects_df, students_df, num_workers=settings.num_workers, construction=settings.construction
+    )
+    if settings.islands:
+        results = parallel_vns.run_islands(
+            time_limit=settings.time_limit,
+            seed=settings.seed,
+            migration_interval=settings.migration_interval,
+            topology=settings.topology,
+        )
+    else:
+        results = parallel_vns.run(time_limit=settings.time_limit, seed=settings.seed)
+    print(f"The best objective value of {parallel_vns.num_workers} workers is {results['best_objective_value']}.")
+    with open(settings.filename_results, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
@@ -5,10 +5,12 @@ import random as rd
 from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from instance_loader import PROJECT_PARAMETER_COLUMNS, instance_data_frames
 from projects_info import random_projects_df
-from students_info import random_students_df
+from students_info import random_students_arrays, random_students_df
 
 
 def generate_projects_and_students_data(
@@ -40,18 +42,22 @@ def generate_projects_and_students_data(
     max_project_preference: int = 3,
     # random seed
     seed: int | None = None,
+    # NumPy generator for large instances
+    vectorized: bool = False,
 ) -> tuple[pd.DataFrame, pd.DataFrame] | None:
     """Returns or saves an instance of the problem.
 
     Calls random_projects_df and random_students_df and returns both of
-    their returns or saves them separately in the CSV format.
+    their returns or saves them separately in the CSV format. Both draw
+    from one random number generator seeded with seed, so an instance
+    only depends on its seed. If vectorized == True, the students are
+    generated by random_students_arrays instead, see generate_instance_arrays.
     """
-    if seed != None:
-        rd.seed(seed)
-    instance_tuple = tuple(
-        (
-            random_projects_df(
+    if vectorized:
+        instance_tuple = instance_data_frames(
+            generate_instance_arrays(
                 num_projects=num_projects,
+                num_students=num_students,
                 min_desired_num_groups=min_desired_num_groups,
                 max_desired_num_groups=max_desired_num_groups,
                 min_manageable_surplus_groups=min_manageable_surplus_groups,
@@ -66,18 +72,48 @@ def generate_projects_and_students_data(
                 max_pen_num_groups=max_pen_num_groups,
                 min_pen_group_size=min_pen_group_size,
                 max_pen_group_size=max_pen_group_size,
-            ),
-            random_students_df(
-                num_projects=num_projects,
-                num_students=num_students,
                 num_partner_preferences=num_partner_preferences,
                 percentage_reciprocity=percentage_reciprocity,
                 percentage_project_preference_overlap=percentage_project_preference_overlap,
                 min_project_preference=min_project_preference,
                 max_project_preference=max_project_preference,
-            ),
+                seed=seed,
+            )
+        )
+    else:
+        rng = rd.Random(seed)
+        instance_tuple = tuple(
+            (
+                random_projects_df(
+                    num_projects=num_projects,
+                    min_desired_num_groups=min_desired_num_groups,
+                    max_desired_num_groups=max_desired_num_groups,
+                    min_manageable_surplus_groups=min_manageable_surplus_groups,
+                    max_manageable_surplus_groups=max_manageable_surplus_groups,
+                    min_ideal_group_size=min_ideal_group_size,
+                    max_ideal_group_size=max_ideal_group_size,
+                    min_tolerable_group_size_deficit=min_tolerable_group_size_deficit,
+                    max_tolerable_group_size_deficit=max_tolerable_group_size_deficit,
+                    min_tolerable_group_size_surplus=min_tolerable_group_size_surplus,
+                    max_tolerable_group_size_surplus=max_tolerable_group_size_surplus,
+                    min_pen_num_groups=min_pen_num_groups,
+                    max_pen_num_groups=max_pen_num_groups,
+                    min_pen_group_size=min_pen_group_size,
+                    max_pen_group_size=max_pen_group_size,
+                    rng=rng,
+                ),
+                random_students_df(
+                    num_projects=num_projects,
+                    num_students=num_students,
+                    num_partner_preferences=num_partner_preferences,
+                    percentage_reciprocity=percentage_reciprocity,
+                    percentage_project_preference_overlap=percentage_project_preference_overlap,
+                    min_project_preference=min_project_preference,
+                    max_project_preference=max_project_preference,
+                    rng=rng,
+                ),
+            )
         )
-    )
     if save_as_csvs:
         projects_info, students_info = instance_tuple
         projects_info.to_csv(filepath_projects, index=False)
@@ -88,6 +124,78 @@ def generate_projects_and_students_data(
         return instance_tuple
 
 
+def generate_instance_arrays(
+    num_projects: int,
+    num_students: int,
+    # specifications for project data
+    min_desired_num_groups: int = 2,
+    max_desired_num_groups: int = 4,
+    min_manageable_surplus_groups: int = 1,
+    max_manageable_surplus_groups: int = 3,
+    min_ideal_group_size: int = 2,
+    max_ideal_group_size: int = 4,
+    min_tolerable_group_size_deficit: int = 1,
+    max_tolerable_group_size_deficit: int = 3,
+    min_tolerable_group_size_surplus: int = 1,
+    max_tolerable_group_size_surplus: int = 3,
+    min_pen_num_groups: int = 1,
+    max_pen_num_groups: int = 3,
+    min_pen_group_size: int = 1,
+    max_pen_group_size: int = 3,
+    # specifications for student data
+    num_partner_preferences: int = 3,
+    percentage_reciprocity: float = 0.7,
+    percentage_project_preference_overlap: float = 0.7,
+    min_project_preference: int = 0,
+    max_project_preference: int = 3,
+    seed: int | None = None,
+) -> dict[str, np.ndarray]:
+    """Returns an instance of the problem as arrays.
+
+    The projects are generated by random_projects_df with a random number
+    generator seeded with seed, the students by random_students_arrays with
+    a NumPy generator seeded with seed. The students follow the same
+    distribution as those of random_students_df, but instances with 100000
+    students take seconds.
+
+    Returns:
+        The arrays of the instance named as in the archives of instance_loader.
+        They can be saved with save_instance_arrays or passed to
+        VariableNeighborhoodSearch.from_arrays.
+    """
+    projects_info = random_projects_df(
+        num_projects=num_projects,
+        min_desired_num_groups=min_desired_num_groups,
+        max_desired_num_groups=max_desired_num_groups,
+        min_manageable_surplus_groups=min_manageable_surplus_groups,
+        max_manageable_surplus_groups=max_manageable_surplus_groups,
+        min_ideal_group_size=min_ideal_group_size,
+        max_ideal_group_size=max_ideal_group_size,
+        min_tolerable_group_size_deficit=min_tolerable_group_size_deficit,
+        max_tolerable_group_size_deficit=max_tolerable_group_size_deficit,
+        min_tolerable_group_size_surplus=min_tolerable_group_size_surplus,
+        max_tolerable_group_size_surplus=max_tolerable_group_size_surplus,
+        min_pen_num_groups=min_pen_num_groups,
+        max_pen_num_groups=max_pen_num_groups,
+        min_pen_group_size=min_pen_group_size,
+        max_pen_group_size=max_pen_group_size,
+        rng=rd.Random(seed),
+    )
+    return {
+        "project_names": np.array(projects_info["name"].tolist(), dtype=str),
+        "project_parameters": projects_info[list(PROJECT_PARAMETER_COLUMNS)].to_numpy(dtype=np.int64),
+    } | random_students_arrays(
+        num_projects=num_projects,
+        num_students=num_students,
+        num_partner_preferences=num_partner_preferences,
+        percentage_reciprocity=percentage_reciprocity,
+        percentage_project_preference_overlap=percentage_project_preference_overlap,
+        min_project_preference=min_project_preference,
+        max_project_preference=max_project_preference,
+        rng=np.random.default_rng(seed),
+    )
+
+
 save_projects_and_students_instance = partial(generate_projects_and_students_data, save_as_csvs=True)
 
 generate_throwaway_instance = partial(
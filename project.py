@@ -21,6 +21,19 @@ class Project:
         groups: Groups which are part of the project.
     """
 
+    __slots__ = (
+        "project_id",
+        "name",
+        "offered_num_groups",
+        "max_num_groups",
+        "ideal_group_size",
+        "min_group_size",
+        "max_group_size",
+        "penalty_extra_group",
+        "penalty_deviation_from_ideal_group_size",
+        "groups",
+    )
+
     def __init__(
         self,
         project_id: int,
@@ -67,6 +80,14 @@ class Project:
         new_group = ProjectGroup(self.project_id, self.name, unassigned_students)
         self.groups.append(new_group)
 
+    def add_initial_group(self, students: list[Student]):
+        """Adds a group of any size during creation of the initial solution.
+
+        Args:
+            students: students that will be in the group.
+        """
+        self.groups.append(ProjectGroup(self.project_id, self.name, students))
+
     def num_groups(self) -> int:
         """Returns how many groups are currently in the project."""
         return len(self.groups)
@@ -81,7 +102,7 @@ class Project:
 
     def non_empty_groups(self) -> list[ProjectGroup]:
         """Returns non-empty groups in project."""
-        return [group for group in self.groups if group.students]
+        return [group for group in self.groups if group.size()]
 
     def num_non_empty_groups(self) -> int:
         """Returns how many non-empty groups are currently in the project."""
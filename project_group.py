@@ -1,5 +1,7 @@
 """Contains the class ProjectGroup."""
 
+from collections.abc import Iterator
+
 from student import Student
 
 
@@ -9,9 +11,16 @@ class ProjectGroup:
     Attributes:
         project_id: The ID of the project the group is part of.
         project_name: The name of the project it is part of.
-        students: The students that are in it.
+        students: The students that are in it in the order they joined.
+        slot: The slot the group occupies in the array-backed solution
+            state of the solver or None if it does not occupy one yet.
+        version: The number of times students joined or left the group.
+            Values derived from the group stay valid as long as it does
+            not change.
     """
 
+    __slots__ = ("project_id", "project_name", "_members", "slot", "version")
+
     def __init__(self, project_id: int, project_name: str, students: list[Student]):
         """Initializes the group in a specific project.
 
@@ -22,7 +31,9 @@ class ProjectGroup:
         """
         self.project_id = project_id
         self.project_name = project_name
-        self.students = students
+        self._members = dict.fromkeys(students)
+        self.slot: int | None = None
+        self.version = 0
 
     def accept_student(self, arriving_student: Student):
         """Adds a student to the group.
@@ -30,30 +41,48 @@ class ProjectGroup:
         Raises:
             ValueError: Student is already in group.
         """
-        if arriving_student in self.students:
+        if arriving_student in self._members:
             raise ValueError("Arriving student already in group!")
-        self.students.append(arriving_student)
+        self._members[arriving_student] = None
+        self.version += 1
 
     def release_student(self, departing_student: Student):
         """Removes student from the group."""
-        self.students.remove(departing_student)
+        del self._members[departing_student]
+        self.version += 1
+
+    @property
+    def students(self) -> tuple[Student, ...]:
+        """Returns the students in the group in the order they joined.
+
+        The tuple is a copy, so it does not change when students join or
+        leave the group afterwards.
+        """
+        return tuple(self._members)
 
     def size(self) -> int:
         """Returns the number of students in the group."""
-        return len(self.students)
+        return len(self._members)
+
+    def remaining_students(self, departures: list[Student]) -> Iterator[Student]:
+        """Yields the students in the group who are not yet designated to leave.
 
-    def remaining_students(self, departures: list[Student]) -> list[Student]:
-        """Returns the students in the group who are not yet designated to leave.
+        The group must not change while they are yielded.
 
         Args:
             departures: Students that are designated to leave their group.
         """
-        return [student for student in self.students if student not in departures]
+        return (student for student in self._members if student not in departures)
 
     def remaining_size(self, departures: list[Student]) -> int:
         """Returns the number of students in the group who are not yet designated to leave.
 
         Args:
-            departures: Students that are designated to leave their group.
+            departures: Students that are designated to leave their group,
+                each one at most once.
         """
-        return len(self.remaining_students(departures))
+        remaining_size = len(self._members)
+        for student in departures:
+            if student in self._members:
+                remaining_size -= 1
+        return remaining_size
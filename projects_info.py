@@ -23,6 +23,7 @@ def random_projects_df(
     max_pen_num_groups: int = 3,
     min_pen_group_size: int = 1,
     max_pen_group_size: int = 3,
+    rng: rd.Random | None = None,
 ) -> pd.DataFrame:
     """Returns random projects with names and information on them.
 
@@ -60,6 +61,7 @@ def random_projects_df(
             from ideal_group_size is penalized by any project.
         max_pen_group_size: The maximum coefficient with which deviation
             from ideal_group_size is penalized by any project.
+        rng: The random number generator. None means a fresh unseeded one.
 
         Returns:
             Project names with each project's guidelines, whishes and penalties
@@ -67,19 +69,20 @@ def random_projects_df(
             randomly within the bounds set by the arguments. THE INDEX
             POSITION IN THE DATAFRAME LATER BECOMES THE PROJECT'S ID.
     """
-
-    names_projects = rd.sample(BUSINESS_DISCIPLINES, k=num_projects)
-    desired_nums_groups = [rd.randint(min_desired_num_groups, max_desired_num_groups) for _ in names_projects]
+    if rng is None:
+        rng = rd.Random()
+    names_projects = rng.sample(BUSINESS_DISCIPLINES, k=num_projects)
+    desired_nums_groups = [rng.randint(min_desired_num_groups, max_desired_num_groups) for _ in names_projects]
     max_nums_groups = [
-        desired_num_groups + rd.randint(min_manageable_surplus_groups, max_manageable_surplus_groups)
+        desired_num_groups + rng.randint(min_manageable_surplus_groups, max_manageable_surplus_groups)
         for desired_num_groups in desired_nums_groups
     ]
-    ideal_group_sizes = [rd.randint(min_ideal_group_size, max_ideal_group_size) for _ in names_projects]
+    ideal_group_sizes = [rng.randint(min_ideal_group_size, max_ideal_group_size) for _ in names_projects]
     min_group_sizes = [
         max(
             1,
             ideal_group_size
-            - rd.randint(
+            - rng.randint(
                 min_tolerable_group_size_deficit,
                 max_tolerable_group_size_deficit,
             ),
@@ -87,11 +90,11 @@ def random_projects_df(
         for ideal_group_size in ideal_group_sizes
     ]
     max_group_sizes = [
-        ideal_group_size + rd.randint(min_tolerable_group_size_surplus, max_tolerable_group_size_surplus)
+        ideal_group_size + rng.randint(min_tolerable_group_size_surplus, max_tolerable_group_size_surplus)
         for ideal_group_size in ideal_group_sizes
     ]
-    pen_num_groups = [rd.randint(min_pen_num_groups, max_pen_num_groups) for _ in names_projects]
-    pen_group_size = [rd.randint(min_pen_group_size, max_pen_group_size) for _ in names_projects]
+    pen_num_groups = [rng.randint(min_pen_num_groups, max_pen_num_groups) for _ in names_projects]
+    pen_group_size = [rng.randint(min_pen_group_size, max_pen_group_size) for _ in names_projects]
 
     data_projects = {
         "name": names_projects,
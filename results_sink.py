@@ -0,0 +1,107 @@
+"""Contains the class ResultsSink and functions to read and convert its records."""
+
+import json
+import os
+from pathlib import Path
+
+
+def read_records(path_records: Path) -> dict:
+    """Returns the results in the records of a ResultsSink by key.
+
+    If a key has more than one record, the last one is kept. A line cut
+    off by a crash has no newline and is ignored.
+    """
+    results = {}
+    with path_records.open(encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n"):
+                record = json.loads(line)
+                results[record["key"]] = record["value"]
+    return results
+
+
+def convert_results(path_records: Path, path_results: Path, key_order: list[str] | None = None):
+    """Saves the records of a ResultsSink as one JSON of results.
+
+    The JSON has the layout the benchmark analyses expect, one entry per
+    key. It is written to a temporary file first and then moved into
+    place, so it is either complete or not there at all.
+
+    Args:
+        path_records: The JSON Lines file with one record per line.
+        path_results: Where the JSON of results is saved.
+        key_order: The order of the keys in the JSON. Keys without records
+            are left out, keys not in it follow in the order of the records.
+            If a key has more than one record, the last one is kept.
+    """
+    results = read_records(path_records)
+    if key_order is not None:
+        ordered_keys = [key for key in key_order if key in results]
+        results = {key: results[key] for key in ordered_keys + [key for key in results if key not in key_order]}
+
+    path_temporary = path_results.with_name(f"{path_results.name}.tmp")
+    with path_temporary.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(results, indent=4))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path_temporary, path_results)
+
+
+class ResultsSink:
+    """Append-only store of benchmark results that survives crashes.
+
+    Every result is appended as one line to a JSON Lines file and
+    synced to disk before the next one, so the work of writing it does
+    not grow with the number of results and a crash loses at most the
+    result being written. Once all results are in, they are converted
+    into one JSON.
+
+    Attributes:
+        path_results: Where the JSON of all results is saved once finalized.
+        path_records: The JSON Lines file the results are appended to.
+    """
+
+    def __init__(self, path_results: Path):
+        """Initializes the sink for a JSON of results.
+
+        Args:
+            path_results: Where the JSON of all results is saved once finalized.
+                The records are kept next to it with the suffix .jsonl.
+        """
+        self.path_results = path_results
+        self.path_records = path_results.with_suffix(".jsonl")
+
+    def append(self, key: str, value):
+        """Appends the result of one key and syncs it to disk."""
+        with self.path_records.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "value": value}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self) -> dict:
+        """Returns all results saved so far so that more can be appended.
+
+        Results that were already finalized are moved back into the records
+        and a record cut off by a crash is removed.
+        """
+        if self.path_results.is_file() and not self.path_records.is_file():
+            for key, value in json.loads(self.path_results.read_text(encoding="utf-8")).items():
+                self.append(key, value)
+        if not self.path_records.is_file():
+            return {}
+        with self.path_records.open("rb+") as f:
+            content = f.read()
+            if not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+                os.fsync(f.fileno())
+        return read_records(self.path_records)
+
+    def finalize(self, key_order: list[str] | None = None):
+        """Saves all results as one JSON and deletes the records.
+
+        Args:
+            key_order: The order of the keys in the JSON, see convert_results.
+        """
+        self.path_records.touch()
+        convert_results(self.path_records, self.path_results, key_order)
+        self.path_records.unlink()
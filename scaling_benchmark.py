@@ -0,0 +1,307 @@
+"""Contains functions to benchmark how VNS scales with the size of instances.
+
+Instances of every dimension of a grid are generated in memory with the
+NumPy generator. Every neighborhood is visited on each of them on its own
+and the construction time, the time of one visit of the neighborhood, of
+founding or dissolving a group and of VND, the options to found or dissolve
+a group and the moves evaluated per second and optionally the peak memory
+are measured. Growth exponents are fitted to the measurements on a log-log
+scale, so a metric grows roughly like
+num_projects ** exponent_projects * num_students ** exponent_students.
+"""
+
+import json
+import math
+import os
+import time as t
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from create_instance import instance_seed
+from problem_data import generate_instance_arrays
+from settings import ScalingSettings
+from vns_on_student_assignment import VariableNeighborhoodSearch
+
+METRICS = (
+    "construction_time",
+    "visit_time",
+    "group_time",
+    "vnd_time",
+    "group_options_per_second",
+    "moves_per_second",
+    "peak_memory",
+)
+
+
+def measure_neighborhood(
+    arrays: dict[str, np.ndarray],
+    neighborhood: int,
+    iterations: int,
+    seed: int,
+    construction: str = "greedy",
+    max_combinations_per_pass: int | None = None,
+    group_evaluation_budget: int | None = None,
+    time_budget: float | None = None,
+) -> dict:
+    """Visits one neighborhood repeatedly on an instance and returns how long it took.
+
+    Args:
+        arrays: The arrays of the instance as returned by generate_instance_arrays.
+        neighborhood: The number of the neighborhood which is visited.
+        iterations: How often the neighborhood is visited at most.
+        seed: Random seed passed to the run_general_vns_best_improvement method.
+        construction: How the initial solution is constructed, either
+            "greedy" or by "regret".
+        max_combinations_per_pass: Passed to run_general_vns_best_improvement.
+        group_evaluation_budget: Passed to run_general_vns_best_improvement.
+        time_budget: The time in seconds after which no further visit is
+            started. A visit already started is not interrupted. None means
+            there is no limit.
+
+    Returns:
+        The number of visits, the construction time, the mean time of one
+        visit, of founding or dissolving a group in one visit and of VND in
+        one visit, the options to found or dissolve a group evaluated per
+        second and the moves evaluated per second during VND. All times are
+        in seconds. The total time of the measurement is given as "elapsed".
+    """
+    start = t.time()
+    vns = VariableNeighborhoodSearch.from_arrays(**arrays, construction=construction)
+    for iteration in range(iterations):
+        vns.run_general_vns_best_improvement(
+            min_neighborhood=neighborhood,
+            max_neighborhood=neighborhood,
+            iteration_limit=1,
+            seed=seed if iteration == 0 else None,
+            max_combinations_per_pass=max_combinations_per_pass,
+            group_evaluation_budget=group_evaluation_budget,
+        )
+        if time_budget is not None and t.time() - start > time_budget:
+            break
+    statistics = vns.neighborhood_statistics[neighborhood]
+    return {
+        "visits": statistics["visits"],
+        "construction_time": vns.construction_time,
+        "visit_time": statistics["time"] / statistics["visits"],
+        "group_time": statistics["group_time"] / statistics["visits"],
+        "vnd_time": statistics["vnd_time"] / statistics["visits"],
+        "group_options_per_second": (
+            statistics["group_options_evaluated"] / statistics["group_time"] if statistics["group_time"] else 0.0
+        ),
+        "moves_per_second": statistics["moves_evaluated"] / statistics["vnd_time"] if statistics["vnd_time"] else 0.0,
+        "elapsed": t.time() - start,
+    }
+
+
+def measure_peak_memory(
+    arrays: dict[str, np.ndarray],
+    neighborhood: int,
+    iterations: int,
+    seed: int,
+    construction: str = "greedy",
+    max_combinations_per_pass: int | None = None,
+    group_evaluation_budget: int | None = None,
+    time_budget: float | None = None,
+) -> int:
+    """Returns the peak memory in bytes of constructing and visiting one neighborhood.
+
+    Tracing memory slows Python down, so this is a run of its own with the
+    same arguments as measure_neighborhood.
+    """
+    tracemalloc.start()
+    try:
+        measure_neighborhood(
+            arrays,
+            neighborhood,
+            iterations,
+            seed,
+            construction,
+            max_combinations_per_pass,
+            group_evaluation_budget,
+            time_budget,
+        )
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def growth_exponents(measurements: list[dict], metric: str) -> dict[str, float | None]:
+    """Returns the exponents of the number of projects and students with which a metric grows.
+
+    The exponents are fitted by least squares to the logarithms of the
+    metric and of the dimensions of the instances. Measurements where the
+    metric is not positive are left out.
+
+    Args:
+        measurements: Measurements with the dimensions of their instances.
+        metric: The name of the metric in the measurements.
+
+    Returns:
+        The exponents of "projects" and "students". An exponent is None if
+        its dimension does not vary among the measurements or there are too
+        few of them.
+    """
+    measurements = [measurement for measurement in measurements if measurement[metric] > 0]
+    exponents = dict.fromkeys(("projects", "students"))
+    varying = [
+        dimension
+        for dimension in exponents
+        if len({measurement[f"num_{dimension}"] for measurement in measurements}) > 1
+    ]
+    if len(measurements) <= len(varying):
+        return exponents
+    design_matrix = np.column_stack(
+        [np.ones(len(measurements))]
+        + [[math.log(measurement[f"num_{dimension}"]) for measurement in measurements] for dimension in varying]
+    )
+    coefficients = np.linalg.lstsq(
+        design_matrix, [math.log(measurement[metric]) for measurement in measurements], rcond=None
+    )[0]
+    exponents.update({dimension: float(coefficient) for dimension, coefficient in zip(varying, coefficients[1:])})
+    return exponents
+
+
+def benchmark_scaling(
+    filename_report: str,
+    project_quantities: list[int],
+    student_quantities: list[int],
+    neighborhoods: tuple[int, ...] = (1, 2, 3, 4, 5, 6),
+    iterations: int = 3,
+    seed: int = 0,
+    construction: str = "greedy",
+    max_combinations_per_pass: int | None = 10000,
+    group_evaluation_budget: int | None = None,
+    time_budget: float | None = 10,
+    measure_memory: bool = False,
+) -> dict:
+    """Benchmarks every neighborhood on instances of every dimension and saves a report.
+
+    The instances are generated with generate_instance_arrays from seeds
+    derived from seed as in create_instances, one instance per dimension.
+    The dimensions are benchmarked from the smallest to the biggest. Once a
+    measurement of a neighborhood takes longer than time_budget, the
+    neighborhood is not benchmarked on instances with at least as many
+    projects and at least as many students anymore.
+
+    Args:
+        filename_report: The name of the JSON in which the report is saved.
+        project_quantities: The numbers of projects of the instances.
+        student_quantities: The numbers of students of the instances.
+        neighborhoods: The numbers of the neighborhoods which are benchmarked.
+        iterations: How often each neighborhood is visited on each instance
+            at most.
+        seed: The seed the seeds of the instances are derived from, also
+            passed to the run_general_vns_best_improvement method.
+        construction: How the initial solutions are constructed, either
+            "greedy" or by "regret".
+        max_combinations_per_pass: Passed to run_general_vns_best_improvement.
+            Without a limit, moving two students in instances with thousands
+            of students takes hours.
+        group_evaluation_budget: Passed to run_general_vns_best_improvement.
+        time_budget: The time in seconds after which a measurement starts no
+            further visit. None means every measurement visits the neighborhood
+            iterations times and no dimension is skipped.
+        measure_memory: Set to True if the peak memory should be measured,
+            which needs a second, slower run of every measurement.
+
+    Returns:
+        The report which is saved. It holds the arguments, one measurement per
+        dimension and neighborhood with all METRICS measured, the skipped
+        dimensions and neighborhoods, and the growth exponents of every metric
+        by neighborhood as returned by growth_exponents.
+
+    Raises:
+        ValueError: Already a file where the report is to be saved.
+    """
+    path_report = Path(filename_report)
+    if path_report.is_file():
+        raise ValueError(f"{path_report} already exists!")
+    run_options = {
+        "iterations": iterations,
+        "seed": seed,
+        "construction": construction,
+        "max_combinations_per_pass": max_combinations_per_pass,
+        "group_evaluation_budget": group_evaluation_budget,
+        "time_budget": time_budget,
+    }
+    metrics = METRICS if measure_memory else tuple(metric for metric in METRICS if metric != "peak_memory")
+
+    measurements = []
+    skipped = []
+    dimensions_over_budget = {neighborhood: [] for neighborhood in neighborhoods}
+    for num_projects in sorted(project_quantities):
+        for num_students in sorted(student_quantities):
+            dimension = {"num_projects": num_projects, "num_students": num_students}
+            remaining_neighborhoods = [
+                neighborhood
+                for neighborhood in neighborhoods
+                if not any(
+                    num_projects >= projects_over_budget and num_students >= students_over_budget
+                    for projects_over_budget, students_over_budget in dimensions_over_budget[neighborhood]
+                )
+            ]
+            skipped += [
+                dimension | {"neighborhood": neighborhood}
+                for neighborhood in neighborhoods
+                if neighborhood not in remaining_neighborhoods
+            ]
+            if not remaining_neighborhoods:
+                continue
+            arrays = generate_instance_arrays(
+                num_projects, num_students, seed=instance_seed(seed, num_projects, num_students, 0)
+            )
+            for neighborhood in remaining_neighborhoods:
+                measurement = dimension | {"neighborhood": neighborhood}
+                measurement |= measure_neighborhood(arrays, neighborhood, **run_options)
+                if measure_memory:
+                    measurement["peak_memory"] = measure_peak_memory(arrays, neighborhood, **run_options)
+                measurements.append(measurement)
+                if time_budget is not None and measurement["elapsed"] > time_budget:
+                    dimensions_over_budget[neighborhood].append((num_projects, num_students))
+                print(f"Done with neighborhood {neighborhood} on {num_projects}_{num_students}!")
+                print(f"It took {measurement["elapsed"]} seconds")
+
+    report = {
+        "settings": {
+            "project_quantities": project_quantities,
+            "student_quantities": student_quantities,
+            "neighborhoods": list(neighborhoods),
+            "measure_memory": measure_memory,
+        }
+        | run_options,
+        "measurements": measurements,
+        "skipped": skipped,
+        "growth_exponents": {
+            str(neighborhood): {
+                metric: growth_exponents(
+                    [measurement for measurement in measurements if measurement["neighborhood"] == neighborhood],
+                    metric,
+                )
+                for metric in metrics
+            }
+            for neighborhood in neighborhoods
+        },
+    }
+    path_temporary = path_report.with_name(f"{path_report.name}.{os.getpid()}.tmp")
+    path_temporary.write_text(json.dumps(report, indent=4), encoding="utf-8")
+    os.replace(path_temporary, path_report)
+    return report
+
+
+if __name__ == "__main__":
+    settings = ScalingSettings()
+    benchmark_scaling(
+        filename_report=settings.filename_report,
+        project_quantities=settings.project_quantities,
+        student_quantities=settings.student_quantities,
+        neighborhoods=settings.neighborhoods,
+        iterations=settings.iterations,
+        seed=settings.seed,
+        construction=settings.construction,
+        max_combinations_per_pass=settings.max_combinations_per_pass,
+        group_evaluation_budget=settings.group_evaluation_budget,
+        time_budget=settings.time_budget,
+        measure_memory=settings.measure_memory,
+    )
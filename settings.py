@@ -22,6 +22,8 @@ class DemonstrationSettings:
         self.seed_vns_run: int | None = 100
         # You may choose how many iterations should be performed
         self.iterations: int = 30
+        # The initial solution is either constructed "greedy" or by "regret"
+        self.construction: str = "greedy"
 
 
 class BenchmarkSettingsVNS:
@@ -36,6 +38,13 @@ class BenchmarkSettingsVNS:
         self.seed = 100
         self.filename_results = "vns_benchmarks_300s.json"
         self.filename_error_logs = "benchmark_1.txt"
+        self.construction = "greedy"
+        # Instances solved at the same time, at most one per core
+        self.num_workers = 1
+        # Continue an interrupted benchmark run with the same filenames
+        self.resume = False
+        # Seconds between two checkpoints of the run on an instance, None for none
+        self.checkpoint_interval = 60
 
 
 class TestSettings:
@@ -67,3 +76,94 @@ class BenchmarkSettingsGurobi:
         self.penalty_unassignment = 3
         self.filename = "gurobi_benchmarks_verbose.json"
         self.time_limit = 60
+        # Continue an interrupted benchmark run with the same filename
+        self.resume = False
+
+
+class ParallelSettings:
+    "Stores all settings for running VNS in parallel."
+
+    def __init__(self):
+        """Initializes settings for running VNS in parallel."""
+        # Existing instances have 3, 4 or 5 projects
+        self.num_projects: int = 5
+        # Existing instances have 30, 40 or 50 students
+        self.num_students: int = 50
+        # Existing instances are numbered from 0 to 9
+        self.instance_number: int = 0
+        # None means one worker per CPU
+        self.num_workers: int | None = None
+        self.time_limit: int = 60
+        # The seeds of all workers are derived from this seed
+        self.seed: int | None = 100
+        # The initial solution is either constructed "greedy" or by "regret"
+        self.construction: str = "greedy"
+        # Workers either run independently or as islands exchanging solutions
+        self.islands: bool = False
+        # Seconds between two migrations of the islands
+        self.migration_interval: float = 5
+        # Islands send solutions to the next island "ring" or to all others "complete"
+        self.topology: str = "ring"
+        self.filename_results: str = "parallel_vns_results.json"
+
+
+class InstanceSettings:
+    "Stores all settings for creating instances."
+
+    def __init__(self):
+        """Initializes settings for creating instances."""
+        self.project_quantities: list[int] = [3, 4, 5]
+        self.student_quantities: list[int] = [30, 40, 50]
+        self.instances_per_combination: int = 10
+        # The seeds of all instances are derived from this seed
+        self.seed: int = 0
+        # Instances generated at the same time
+        self.num_workers: int = 1
+        # Generate the students with NumPy, meant for thousands of students
+        self.vectorized: bool = False
+
+
+class ScalingSettings:
+    "Stores all settings for benchmarking how VNS scales."
+
+    def __init__(self):
+        """Initializes settings for benchmarking how VNS scales."""
+        # There are 100 project names, so at most 100 projects
+        self.project_quantities: list[int] = [3, 10, 30, 100]
+        self.student_quantities: list[int] = [50, 200, 1000, 5000]
+        self.neighborhoods: tuple[int, ...] = (1, 2, 3, 4, 5, 6)
+        # Visits of every neighborhood on every instance at most
+        self.iterations: int = 3
+        self.seed: int = 0
+        # The initial solution is either constructed "greedy" or by "regret"
+        self.construction: str = "greedy"
+        # Limits moving two students in instances with thousands of students
+        self.max_combinations_per_pass: int | None = 10000
+        self.group_evaluation_budget: int | None = None
+        # Seconds after which a measurement stops visiting, bigger instances are skipped then
+        self.time_budget: float | None = 10
+        # Tracing memory needs a second, slower run of every measurement
+        self.measure_memory: bool = False
+        self.filename_report: str = "scaling_benchmarks.json"
+
+
+class MicrobenchmarkSettings:
+    "Stores all settings for benchmarking the primitives of VNS."
+
+    def __init__(self):
+        """Initializes settings for benchmarking the primitives of VNS."""
+        # Dimensions and numbers of existing instances
+        self.instances: list[tuple[str, int]] = [("3_30", 0), ("4_40", 0), ("5_50", 0)]
+        # Untimed runs of every primitive before the timed ones
+        self.warmup: int = 3
+        self.repetitions: int = 20
+        self.seed: int = 0
+        # The initial solution is either constructed "greedy" or by "regret"
+        self.construction: str = "greedy"
+        # Limits local search moving two or more students to a sample of combinations
+        self.max_combinations_per_pass: int = 20
+        # None means all primitives are timed
+        self.primitives: list[str] | None = None
+        self.filename_results: str = "microbenchmarks.json"
+        # Results of an earlier run to compare with, None for none
+        self.filename_baseline: str | None = None
@@ -0,0 +1,130 @@
+"""Contains the class SolutionState."""
+
+import numpy as np
+
+from project import Project
+from project_group import ProjectGroup
+from student import Student
+
+UNASSIGNED = -1
+
+
+class SolutionState:
+    """The assignment of students to groups stored in flat integer arrays.
+
+    Every group that exists during solving occupies a slot. The slots of
+    a project form a contiguous range with one slot per group the project
+    may have at most, so the arrays never have to grow. Slots of removed
+    groups are reused by groups founded later.
+
+    Attributes:
+        preferences: The preference values of every student for every
+            project. The first index is the student ID, the second
+            index is the project ID.
+        preference_matrix: preferences as a NumPy array.
+        slot_projects: The ID of the project every slot belongs to.
+        slot_groups: The group occupying every slot or None if the slot
+            is free.
+        slot_sizes: The number of students in the group of every slot.
+        slot_members: The IDs of the students in the group of every slot.
+        student_slots: The slot of the group every student is in or
+            UNASSIGNED if he/she is not assigned to a group.
+        bilateral_partners: The IDs of the students every student forms
+            a bilateral pair with.
+        bilateral_counts: The number of bilateral partners of every
+            student in the group of every slot. The first index is the
+            student ID, the second index is the slot.
+        free_slots_by_project: The free slots of every project by project ID.
+        slot_project_ids: slot_projects as a NumPy array.
+        slot_min_sizes: The min_group_size of the project of every slot.
+        slot_max_sizes: The max_group_size of the project of every slot.
+        slot_ideal_sizes: The ideal_group_size of the project of every slot.
+        slot_size_penalties: The penalty_deviation_from_ideal_group_size
+            of the project of every slot.
+    """
+
+    def __init__(
+        self,
+        projects: tuple[Project],
+        students: tuple[Student],
+        bilateral_partners: tuple[tuple[int, ...], ...],
+    ):
+        """Initializes the state with all students unassigned.
+
+        Args:
+            projects: All instances of Project in the problem instance.
+            students: All instances of Student in the problem instance.
+            bilateral_partners: The IDs of the students every student
+                forms a bilateral pair with.
+        """
+        self.preferences = tuple(student.projects_prefs for student in students)
+        self.slot_projects: list[int] = []
+        self.free_slots_by_project: dict[int, list[int]] = {}
+        for project in projects:
+            first_slot = len(self.slot_projects)
+            num_slots = max(project.max_num_groups, project.offered_num_groups)
+            self.slot_projects += [project.project_id] * num_slots
+            self.free_slots_by_project[project.project_id] = list(reversed(range(first_slot, first_slot + num_slots)))
+        num_slots_total = len(self.slot_projects)
+        self.preference_matrix = np.array(self.preferences, dtype=np.int64).reshape(len(students), len(projects))
+        self.slot_project_ids = np.array(self.slot_projects, dtype=np.int64)
+        self.slot_min_sizes = np.array([projects[i].min_group_size for i in self.slot_projects], dtype=np.int64)
+        self.slot_max_sizes = np.array([projects[i].max_group_size for i in self.slot_projects], dtype=np.int64)
+        self.slot_ideal_sizes = np.array([projects[i].ideal_group_size for i in self.slot_projects], dtype=np.int64)
+        self.slot_size_penalties = np.array(
+            [projects[i].penalty_deviation_from_ideal_group_size for i in self.slot_projects], dtype=np.int64
+        )
+        self.slot_groups: list[ProjectGroup | None] = [None] * num_slots_total
+        self.slot_sizes = [0] * num_slots_total
+        self.slot_members: list[set[int]] = [set() for _ in range(num_slots_total)]
+        self.student_slots = [UNASSIGNED] * len(students)
+        self.bilateral_partners = bilateral_partners
+        self.bilateral_counts = [[0] * num_slots_total for _ in students]
+
+    def open_slot(self, group: ProjectGroup):
+        """Lets a group occupy a free slot of its project.
+
+        The students already in the group are assigned to the slot.
+
+        Raises:
+            ValueError: The project has no free slot left.
+        """
+        free_slots = self.free_slots_by_project[group.project_id]
+        if not free_slots:
+            raise ValueError("Project has no free slot left!")
+        group.slot = free_slots.pop()
+        self.slot_groups[group.slot] = group
+        for student in group.students:
+            self.add_student(student.student_id, group.slot)
+
+    def close_slot(self, group: ProjectGroup):
+        """Frees the slot of an empty group so it can be reused.
+
+        Raises:
+            ValueError: The group still has students.
+        """
+        if self.slot_sizes[group.slot]:
+            raise ValueError("Only the slot of an empty group can be closed!")
+        self.slot_groups[group.slot] = None
+        self.free_slots_by_project[group.project_id].append(group.slot)
+
+    def add_student(self, student_id: int, slot: int):
+        """Assigns an unassigned student to the group of a slot."""
+        self.student_slots[student_id] = slot
+        self.slot_sizes[slot] += 1
+        self.slot_members[slot].add(student_id)
+        for partner_id in self.bilateral_partners[student_id]:
+            self.bilateral_counts[partner_id][slot] += 1
+
+    def remove_student(self, student_id: int):
+        """Removes a student from his/her group so he/she is unassigned."""
+        slot = self.student_slots[student_id]
+        self.student_slots[student_id] = UNASSIGNED
+        self.slot_sizes[slot] -= 1
+        self.slot_members[slot].remove(student_id)
+        for partner_id in self.bilateral_partners[student_id]:
+            self.bilateral_counts[partner_id][slot] -= 1
+
+    def num_unassigned(self) -> int:
+        """Returns the number of students who are not assigned to a group."""
+        return self.student_slots.count(UNASSIGNED)
@@ -12,6 +12,8 @@ class Student:
             position of a value is the ID of the project.
     """
 
+    __slots__ = ("student_id", "name", "fav_partners", "projects_prefs")
+
     def __init__(
         self,
         student_id: int,
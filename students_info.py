@@ -1,18 +1,20 @@
-"""Contains functions to generate a dataframe on random students."""
+"""Contains functions to generate a dataframe or arrays on random students."""
 
 import itertools
 import random as rd
 
+import numpy as np
 import pandas as pd
 
 import common_names
 
 
-def random_unique_names(num_students: int) -> list[str]:
+def random_unique_names(num_students: int, rng: rd.Random | None = None) -> list[str]:
     """Returns unique random full names for males and females.
 
     Args:
         num_students: The number of students in the problem.
+        rng: The random number generator. None means a fresh unseeded one.
 
     Raises:
         ValueError: GIRLS_NAMES and BOYS_NAMES have different lengths.
@@ -20,6 +22,8 @@ def random_unique_names(num_students: int) -> list[str]:
     if (num_first_names := len(common_names.GIRLS_NAMES)) != len(common_names.BOYS_NAMES):
         raise ValueError("GIRLS_NAMES and BOYS_NAMES have different lengths.")
     num_genders_considered = 2
+    if rng is None:
+        rng = rd.Random()
 
     return [
         (
@@ -27,7 +31,7 @@ def random_unique_names(num_students: int) -> list[str]:
             if not male_indicator
             else f"{common_names.BOYS_NAMES[index_first_name]} {common_names.LAST_NAMES[index_last_name]}"
         )
-        for male_indicator, index_first_name, index_last_name in rd.sample(
+        for male_indicator, index_first_name, index_last_name in rng.sample(
             list(
                 itertools.product(
                     range(num_genders_considered),
@@ -44,6 +48,7 @@ def random_partner_preferences(
     num_students: int,
     percentage_reciprocity: float,
     num_partner_preferences: int,
+    rng: rd.Random | None = None,
 ) -> list[list[int]]:
     """Returns partner preferences for all students.
 
@@ -55,30 +60,35 @@ def random_partner_preferences(
         num_partner_preferences: The number of partner preferences
             each student specifies with the ID of the students he/she
             wants to  work together with the most.
+        rng: The random number generator. None means a fresh unseeded one.
     """
+    if rng is None:
+        rng = rd.Random()
     students_partner_preferences: list[list[int]] = []
     chosen_by: dict[int : list[int]] = {}
     student_ids = set(range(num_students))
     for student_id in range(num_students):
         all_other_student_ids = student_ids.difference({student_id})
         if (id_chosen_by := chosen_by.get(student_id)) is not None:
-            applicable_for_reciprocity = rd.sample(
+            applicable_for_reciprocity = rng.sample(
                 id_chosen_by,
                 min(len(id_chosen_by), num_partner_preferences),
             )
             reciprocal_preferences = [
                 other_students_id
                 for other_students_id in applicable_for_reciprocity
-                if rd.random() <= percentage_reciprocity
+                if rng.random() <= percentage_reciprocity
             ]
             num_missing_preferences = num_partner_preferences - len(reciprocal_preferences)
             if num_missing_preferences > 0:
                 left_options = list(all_other_student_ids.difference(set(reciprocal_preferences)))
-                student_partner_preferences = reciprocal_preferences + rd.sample(left_options, num_missing_preferences)
+                student_partner_preferences = reciprocal_preferences + rng.sample(
+                    left_options, num_missing_preferences
+                )
             else:
                 student_partner_preferences = reciprocal_preferences
         else:
-            student_partner_preferences = rd.sample(list(all_other_student_ids), num_partner_preferences)
+            student_partner_preferences = rng.sample(list(all_other_student_ids), num_partner_preferences)
 
         students_partner_preferences.append(student_partner_preferences)
 
@@ -127,6 +137,7 @@ def random_project_preferences(
     percentage_project_preference_overlap: float,
     min_project_preference: int,
     max_project_preference: int,
+    rng: rd.Random | None = None,
 ) -> list[tuple[int]]:
     """Returns project preference values for all students in the problem.
 
@@ -141,7 +152,10 @@ def random_project_preferences(
             project preferences.
         min_project_preference: The lowest possible project preference.
         max_project_preference: The highest possible project preference.
+        rng: The random number generator. None means a fresh unseeded one.
     """
+    if rng is None:
+        rng = rd.Random()
     students_project_preferences: list[tuple[int]] = []
     for student_desired_partners in students_desired_partners:
         average_project_preferences_desired_partners = average_preferences(
@@ -157,7 +171,7 @@ def random_project_preferences(
                         )
                         + (
                             (1 - percentage_project_preference_overlap)
-                            * rd.uniform(min_project_preference - 0.5, max_project_preference + 0.5)
+                            * rng.uniform(min_project_preference - 0.5, max_project_preference + 0.5)
                         )
                     )
                 )
@@ -165,7 +179,7 @@ def random_project_preferences(
             )
         else:
             student_project_preferences = tuple(
-                round(rd.uniform(min_project_preference - 0.5, max_project_preference + 0.5))
+                round(rng.uniform(min_project_preference - 0.5, max_project_preference + 0.5))
                 for _ in range(num_projects)
             )
         students_project_preferences.append(student_project_preferences)
@@ -181,6 +195,7 @@ def random_students_df(
     percentage_project_preference_overlap: float = 0.7,
     min_project_preference: int = 0,
     max_project_preference: int = 3,
+    rng: rd.Random | None = None,
 ) -> pd.DataFrame:
     """Returns random students with partner and project preferences.
 
@@ -200,6 +215,7 @@ def random_students_df(
             project preferences.
         min_project_preference: The lowest possible project preference.
         max_project_preference: The highest possible project preference.
+        rng: The random number generator. None means a fresh unseeded one.
 
     Returns:
         The project preferences for all projects and the partner preferences
@@ -209,14 +225,17 @@ def random_students_df(
         are random within bounds set by the arguments. THE INDEX POSITION IN THE
         DATAFRAME LATER BECOMES THE STUDENT'S ID.
     """
-    students_names = random_unique_names(num_students)
-    desired_partners = random_partner_preferences(num_students, percentage_reciprocity, num_partner_preferences)
+    if rng is None:
+        rng = rd.Random()
+    students_names = random_unique_names(num_students, rng)
+    desired_partners = random_partner_preferences(num_students, percentage_reciprocity, num_partner_preferences, rng)
     desired_projects = random_project_preferences(
         num_projects,
         desired_partners,
         percentage_project_preference_overlap,
         min_project_preference,
         max_project_preference,
+        rng,
     )
     data_students = {
         "name": students_names,
@@ -224,3 +243,215 @@ def random_students_df(
         "project_prefs": desired_projects,
     }
     return pd.DataFrame(data_students)
+
+
+def random_unique_names_array(num_students: int, rng: np.random.Generator) -> np.ndarray:
+    """Returns unique random full names for males and females as an array.
+
+    Works like random_unique_names, but for any number of students. Once
+    all combinations of first and last names are used up, the names are
+    drawn again with a running number appended.
+
+    Args:
+        num_students: The number of students in the problem.
+        rng: The random number generator.
+
+    Raises:
+        ValueError: GIRLS_NAMES and BOYS_NAMES have different lengths.
+    """
+    if len(common_names.GIRLS_NAMES) != len(common_names.BOYS_NAMES):
+        raise ValueError("GIRLS_NAMES and BOYS_NAMES have different lengths.")
+    first_names = np.array(list(common_names.GIRLS_NAMES) + list(common_names.BOYS_NAMES))
+    last_names = np.array(common_names.LAST_NAMES)
+    num_combinations = len(first_names) * len(last_names)
+    draws = np.arange(num_students)
+    codes = rng.permutation(num_combinations)[draws % num_combinations]
+    names = np.char.add(np.char.add(first_names[codes // len(last_names)], " "), last_names[codes % len(last_names)])
+    repetitions = draws // num_combinations
+    return np.where(repetitions > 0, np.char.add(np.char.add(names, " "), (repetitions + 1).astype(str)), names)
+
+
+def random_partner_preferences_array(
+    num_students: int,
+    percentage_reciprocity: float,
+    num_partner_preferences: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Returns partner preferences for all students as an array.
+
+    Follows the same process as random_partner_preferences, but draws all
+    random numbers in bulk and never builds the set of all other students,
+    so every student takes constant time.
+
+    Args:
+        num_students: The number of students in the problem.
+        percentage_reciprocity: Roughly the probability that a student
+            specifies another student as a partner preference if that
+            student specified him/her as a partner preference before.
+        num_partner_preferences: The number of partner preferences
+            each student specifies with the ID of the students he/she
+            wants to  work together with the most.
+        rng: The random number generator.
+
+    Returns:
+        The IDs of the partner preferences with one row per student.
+
+    Raises:
+        ValueError: There are fewer other students than partner preferences
+            or the number of partner preferences is negative.
+    """
+    if num_students > 0 and not 0 <= num_partner_preferences <= num_students - 1:
+        # The same error random_partner_preferences raises through random.sample.
+        raise ValueError("Sample larger than population or is negative")
+    reciprocity_draws = (rng.random((num_students, num_partner_preferences)) <= percentage_reciprocity).tolist()
+    other_student_draws = rng.integers(0, num_students - 1, size=(num_students, num_partner_preferences)).tolist()
+    chosen_by: list[list[int]] = [[] for _ in range(num_students)]
+    students_partner_preferences = []
+    for student_id in range(num_students):
+        applicable_for_reciprocity = chosen_by[student_id]
+        if len(applicable_for_reciprocity) > num_partner_preferences:
+            applicable_for_reciprocity = [
+                applicable_for_reciprocity[index]
+                for index in rng.choice(len(applicable_for_reciprocity), num_partner_preferences, replace=False)
+            ]
+        student_partner_preferences = [
+            other_students_id
+            for other_students_id, reciprocal in zip(applicable_for_reciprocity, reciprocity_draws[student_id])
+            if reciprocal
+        ]
+        draws = iter(other_student_draws[student_id])
+        while len(student_partner_preferences) < num_partner_preferences:
+            if (draw := next(draws, None)) is None:
+                draw = int(rng.integers(0, num_students - 1))
+            # Draws skip the student's own ID, duplicates are drawn again.
+            partner_preference = draw + (draw >= student_id)
+            if partner_preference not in student_partner_preferences:
+                student_partner_preferences.append(partner_preference)
+        students_partner_preferences.append(student_partner_preferences)
+        for partner_preference in student_partner_preferences:
+            if partner_preference > student_id:
+                chosen_by[partner_preference].append(student_id)
+
+    return np.array(students_partner_preferences, dtype=np.int64).reshape(num_students, num_partner_preferences)
+
+
+def random_project_preferences_array(
+    num_projects: int,
+    students_desired_partners: np.ndarray,
+    percentage_project_preference_overlap: float,
+    min_project_preference: int,
+    max_project_preference: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Returns project preference values for all students as an array.
+
+    Follows the same process as random_project_preferences. The preferences
+    of a student only depend on those of his/her partner preferences with a
+    smaller ID, so students are processed in levels: a student is one level
+    above the highest level among those partner preferences. All students
+    of one level are calculated at once.
+
+    Args:
+        num_projects: The number of projects in the problem.
+        students_desired_partners: The IDs of the partner preferences with
+            one row per student.
+        percentage_project_preference_overlap: To what degree the
+            student's preference value for a specific project is the
+            average preference for that project among those that are
+            partner preferences and already have specified their
+            project preferences.
+        min_project_preference: The lowest possible project preference.
+        max_project_preference: The highest possible project preference.
+        rng: The random number generator.
+
+    Returns:
+        The preference values with one row per student and one column
+        per project.
+    """
+    num_students = len(students_desired_partners)
+    earlier_partners = students_desired_partners < np.arange(num_students)[:, None]
+    levels = [0] * num_students
+    for student_id, desired_partners in enumerate(students_desired_partners.tolist()):
+        levels[student_id] = 1 + max(
+            (levels[partner_id] for partner_id in desired_partners if partner_id < student_id), default=-1
+        )
+    levels = np.array(levels, dtype=np.int64)
+    random_preferences = rng.uniform(
+        min_project_preference - 0.5, max_project_preference + 0.5, size=(num_students, num_projects)
+    )
+    students_project_preferences = np.zeros((num_students, num_projects))
+    students_by_level = np.argsort(levels, kind="stable")
+    level_starts = np.searchsorted(levels[students_by_level], np.arange(levels.max(initial=0) + 2))
+    for level, (start, end) in enumerate(zip(level_starts[:-1], level_starts[1:])):
+        student_ids = students_by_level[start:end]
+        if not level:
+            students_project_preferences[student_ids] = np.round(random_preferences[student_ids])
+            continue
+        mask = earlier_partners[student_ids]
+        average_preferences_desired_partners = (
+            students_project_preferences[students_desired_partners[student_ids]] * mask[:, :, None]
+        ).sum(axis=1) / mask.sum(axis=1)[:, None]
+        students_project_preferences[student_ids] = np.round(
+            percentage_project_preference_overlap * average_preferences_desired_partners
+            + (1 - percentage_project_preference_overlap) * random_preferences[student_ids]
+        )
+
+    return students_project_preferences.astype(np.int64)
+
+
+def random_students_arrays(
+    num_projects: int,
+    num_students: int,
+    num_partner_preferences: int = 3,
+    percentage_reciprocity: float = 0.7,
+    percentage_project_preference_overlap: float = 0.7,
+    min_project_preference: int = 0,
+    max_project_preference: int = 3,
+    rng: np.random.Generator | None = None,
+) -> dict[str, np.ndarray]:
+    """Returns random students with partner and project preferences as arrays.
+
+    The students follow the same distribution as those of random_students_df,
+    but are generated fast enough for instances with 100000 students.
+
+    Args:
+        num_projects: The number of projects in the problem instance.
+        num_students: The number of students in the problem instance.
+        num_partner_preferences: The number of partner preferences
+            each student specifies with the ID of the students he/she
+            wants to  work together with the most.
+        percentage_reciprocity: Roughly the probability that a student
+            specifies another student as a partner preference if that
+            student specified him/her as a partner preference before.
+        percentage_project_preference_overlap: To what degree the
+            student's preference value for a specific project is the
+            average preference for that project among those that are
+            partner preferences and already have specified their
+            project preferences.
+        min_project_preference: The lowest possible project preference.
+        max_project_preference: The highest possible project preference.
+        rng: The random number generator. None means a fresh unseeded one.
+
+    Returns:
+        The student names, the preference matrix and the partner preferences
+        in compressed sparse row format named as in the instance archives of
+        instance_loader.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    desired_partners = random_partner_preferences_array(
+        num_students, percentage_reciprocity, num_partner_preferences, rng
+    )
+    return {
+        "student_names": random_unique_names_array(num_students, rng),
+        "preference_matrix": random_project_preferences_array(
+            num_projects,
+            desired_partners,
+            percentage_project_preference_overlap,
+            min_project_preference,
+            max_project_preference,
+            rng,
+        ),
+        "partner_offsets": np.arange(num_students + 1) * num_partner_preferences,
+        "partner_ids": desired_partners.ravel(),
+    }
@@ -1,10 +1,45 @@
-"""Contains the function for testing the correctness of the VNS solving."""
+"""Contains the functions for testing the correctness of the VNS solving."""
 
+import itertools as it
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
 from pathlib import Path
 
-from problem_data import generate_throwaway_instance
+import numpy as np
+import pytest
+
+from create_instance import create_instances
+from delta_cache import DeltaCache
+from instance_loader import (
+    instance_archive_path,
+    instance_filepaths,
+    load_instance,
+    load_instance_arrays,
+    read_instance_csvs,
+    save_instance_arrays,
+)
+from microbenchmark import (
+    compare_to_baseline,
+    primitive_operations,
+    run_microbenchmarks,
+    summarize_times,
+    time_operation,
+)
+from parallel_vns import ParallelVNS, migration_targets, run_island, run_single_start
+from problem_data import generate_instance_arrays, generate_throwaway_instance, save_projects_and_students_instance
+from project_group import ProjectGroup
+from results_sink import ResultsSink, read_records
+from scaling_benchmark import METRICS, benchmark_scaling, growth_exponents
 from settings import TestSettings
+from solution_state import UNASSIGNED
+from student import Student
+from students_info import random_partner_preferences_array
 from vns_on_student_assignment import VariableNeighborhoodSearch
+from vns_solutions import benchmark_vns
 
 
 def test_vns(
@@ -115,6 +150,685 @@ def test_vns(
         current_random_seed += 1
 
 
+# The loop above runs until enough errors are found, so pytest must not collect it.
+test_vns.__test__ = False
+
+
+def test_budgeted_founding_without_groups():
+    """Tests founding groups with a budget when the initial solution has no group."""
+    projects_info, students_info = generate_throwaway_instance(num_projects=2, num_students=6, seed=259)
+    vns_run = VariableNeighborhoodSearch(projects_info, students_info, construction="regret")
+    error_report = vns_run.run_general_vns_best_improvement(
+        iteration_limit=20, seed=1, group_evaluation_budget=1, testing=True
+    )
+    assert not error_report
+
+
+def test_regret_construction_on_small_instances():
+    """Tests that the regret construction yields a valid solution with at least one group."""
+    for seed in range(20):
+        projects_info, students_info = generate_throwaway_instance(num_projects=2, num_students=6, seed=seed + 250)
+        vns_run = VariableNeighborhoodSearch(projects_info, students_info, construction="regret")
+        assert not vns_run.check_solution()
+        assert any(project.groups for project in vns_run.projects)
+        assert vns_run.objective_value == vns_run.current_objective_value()
+
+
+def test_too_many_partner_preferences():
+    """Tests that more partner preferences than other students raise instead of hanging."""
+    with pytest.raises(ValueError, match="Sample larger than population"):
+        random_partner_preferences_array(3, 0.5, 3, np.random.default_rng(0))
+    with pytest.raises(ValueError, match="Sample larger than population"):
+        random_partner_preferences_array(3, 0.5, -1, np.random.default_rng(0))
+    assert random_partner_preferences_array(3, 0.5, 2, np.random.default_rng(0)).shape == (3, 2)
+
+
+def test_generated_archive_does_not_hide_csvs(tmp_path, monkeypatch):
+    """Tests that the CSVs of an instance take precedence over a generated archive of the same name."""
+    monkeypatch.chdir(tmp_path)
+    generated_arrays = generate_instance_arrays(num_projects=3, num_students=8, seed=0)
+    save_instance_arrays(generated_arrays, "3_8", 0)
+    loaded_arrays = load_instance_arrays("3_8", 0)
+    assert loaded_arrays.keys() == generated_arrays.keys()
+    assert all(np.array_equal(loaded_arrays[name], generated_arrays[name]) for name in generated_arrays)
+
+    filepath_projects, filepath_students = instance_filepaths("3_8", 0)
+    filepath_projects.parent.mkdir(parents=True)
+    filepath_students.parent.mkdir(parents=True)
+    save_projects_and_students_instance(
+        num_projects=3,
+        num_students=8,
+        filepath_projects=filepath_projects,
+        filepath_students=filepath_students,
+        seed=1,
+    )
+    _, students_info = read_instance_csvs(filepath_projects, filepath_students)
+    for _ in range(2):
+        loaded_arrays = load_instance_arrays("3_8", 0)
+        assert loaded_arrays["student_names"].tolist() == students_info["name"].tolist()
+        assert loaded_arrays["preference_matrix"].tolist() == [list(prefs) for prefs in students_info["project_prefs"]]
+
+
+def test_checkpoint_of_another_instance_is_rejected(tmp_path):
+    """Tests that a run only continues from a checkpoint of the same instance."""
+    checkpoint_path = tmp_path / "checkpoint.json"
+    projects_info, students_info = generate_throwaway_instance(num_projects=3, num_students=12, seed=4)
+    vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+    vns_run.run_general_vns_best_improvement(
+        iteration_limit=3, seed=4, checkpoint_path=checkpoint_path, checkpoint_interval=1e-9
+    )
+    assert checkpoint_path.is_file()
+    resumed_run = VariableNeighborhoodSearch(projects_info, students_info)
+    assert not resumed_run.run_general_vns_best_improvement(
+        iteration_limit=5, testing=True, checkpoint_path=checkpoint_path
+    )
+
+    # More groups allowed leave the objective value of the saved solution unchanged.
+    changed_projects_info = projects_info.copy()
+    changed_projects_info["max#groups"] += 1
+    changed_students_info = students_info.copy()
+    changed_students_info.at[0, "project_prefs"] = tuple(
+        preference + 1 for preference in changed_students_info.at[0, "project_prefs"]
+    )
+    for other_projects_info, other_students_info in (
+        (changed_projects_info, students_info),
+        (projects_info, changed_students_info),
+        generate_throwaway_instance(num_projects=3, num_students=12, seed=5),
+    ):
+        other_run = VariableNeighborhoodSearch(other_projects_info, other_students_info)
+        with pytest.raises(ValueError, match="does not belong to this instance"):
+            other_run.run_general_vns_best_improvement(iteration_limit=1, checkpoint_path=checkpoint_path)
+
+
+def test_group_students_are_a_snapshot():
+    """Tests that the students of a group are a tuple in joining order and remaining students are lazy."""
+    students = [Student(student_id, f"Student {student_id}", [], (1, 2)) for student_id in range(4)]
+    group = ProjectGroup(0, "Project", students[:3])
+    members = group.students
+    group.release_student(students[0])
+    group.accept_student(students[3])
+    assert members == tuple(students[:3])
+    assert group.students == (students[1], students[2], students[3])
+    remaining_students = group.remaining_students([students[2]])
+    assert not isinstance(remaining_students, list)
+    assert list(remaining_students) == [students[1], students[3]]
+    assert group.remaining_size([students[2]]) == 2
+
+
+def _short_run(
+    num_projects: int, num_students: int, seed: int, iteration_limit: int = 5
+) -> VariableNeighborhoodSearch:
+    projects_info, students_info = generate_throwaway_instance(
+        num_projects=num_projects, num_students=num_students, seed=seed
+    )
+    vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+    assert not vns_run.run_general_vns_best_improvement(iteration_limit=iteration_limit, seed=seed, testing=True)
+    return vns_run
+
+
+def test_solution_state_follows_groups():
+    """Tests that the array-backed solution state holds the same solution as the groups."""
+    for seed in range(5):
+        vns_run = _short_run(num_projects=4, num_students=20, seed=seed)
+        state = vns_run.state
+        assert vns_run._state_consistent()
+        for project in vns_run.projects:
+            for group in project.groups:
+                assert state.slot_groups[group.slot] is group
+                assert state.slot_sizes[group.slot] == group.size()
+                assert all(state.student_slots[student.student_id] == group.slot for student in group.students)
+        assert all(state.student_slots[student.student_id] == UNASSIGNED for student in vns_run.unassigned_students)
+        assert vns_run.objective_value == vns_run.current_objective_value()
+
+
+def test_bilateral_partner_index():
+    """Tests the index of bilateral pairs and their counts per group against the partner preferences."""
+    for seed in range(5):
+        vns_run = _short_run(num_projects=3, num_students=15, seed=seed)
+        expected_pairs = {
+            (student.student_id, partner_id)
+            for student in vns_run.students
+            for partner_id in student.fav_partners
+            if student.student_id < partner_id and student.student_id in vns_run.students[partner_id].fav_partners
+        }
+        assert vns_run.bilateral_pairs == expected_pairs
+        for student in vns_run.students:
+            assert set(vns_run.bilateral_partners[student.student_id]) == {
+                partner_id
+                for pair in expected_pairs
+                for partner_id in pair
+                if student.student_id in pair and partner_id != student.student_id
+            }
+            for project in vns_run.projects:
+                for group in project.groups:
+                    assert vns_run.state.bilateral_counts[student.student_id][group.slot] == sum(
+                        member.student_id in vns_run.bilateral_partners[student.student_id]
+                        for member in group.students
+                    )
+
+
+def _compare_with_generic_local_search(num_to_move: int, local_search_name: str) -> int:
+    # Descends from initial solutions with the given local search and checks that every step
+    # finds a move as good as the best one of the generic local search over all combinations.
+    num_steps = 0
+    for seed in range(4):
+        for across_projects in (True, False):
+            projects_info, students_info = generate_throwaway_instance(num_projects=3, num_students=12, seed=seed)
+            vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+            vns_run.max_combinations_per_pass, vns_run.first_improvement = None, False
+            while True:
+                moves, delta = getattr(vns_run, local_search_name)(vns_run.destinations, across_projects)
+                _, expected_delta = vns_run._local_search_best_improvement(
+                    list(it.product(vns_run.destinations, repeat=num_to_move)),
+                    vns_run.student_locations,
+                    across_projects,
+                    num_to_move,
+                )
+                assert delta == expected_delta
+                if not moves:
+                    break
+                for departure, arrival in moves:
+                    vns_run._move_student(departure, arrival)
+                vns_run.objective_value += delta
+                assert vns_run.objective_value == vns_run.current_objective_value()
+                assert not vns_run.check_solution()
+                num_steps += 1
+    return num_steps
+
+
+def test_single_moves_match_generic_local_search():
+    """Tests that the vectorized single moves find the best move of moving one student."""
+    assert _compare_with_generic_local_search(1, "_local_search_single_moves") > 0
+
+
+def test_pair_moves_match_generic_local_search():
+    """Tests that the pair-move operator finds the best move of moving two students."""
+    assert _compare_with_generic_local_search(2, "_local_search_pair_moves") > 0
+
+
+def test_student_combinations_are_unranked_in_order():
+    """Tests that combinations are enumerated lazily in order and sampled ones are unranked correctly."""
+    projects_info, students_info = generate_throwaway_instance(num_projects=2, num_students=9, seed=0)
+    vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+    vns_run.max_combinations_per_pass = None
+    for num_in_combination in (1, 2, 3, 4):
+        combinations = list(it.combinations(range(vns_run.num_students), num_in_combination))
+        assert list(vns_run._student_combinations(num_in_combination)) == combinations
+        assert [
+            vns_run._unrank_combination(rank, num_in_combination) for rank in range(len(combinations))
+        ] == combinations
+    pairs = list(it.combinations(range(vns_run.num_students), 2))
+    first_ids, second_ids = vns_run._unrank_pairs(np.arange(len(pairs)))
+    assert list(zip(first_ids.tolist(), second_ids.tolist())) == pairs
+
+    vns_run.max_combinations_per_pass = 10
+    vns_run.rng.seed(0)
+    sampled_combinations = list(vns_run._student_combinations(3))
+    assert len(set(sampled_combinations)) == 10
+    assert sampled_combinations == sorted(sampled_combinations)
+    assert set(sampled_combinations) <= set(it.combinations(range(vns_run.num_students), 3))
+    sampled_pairs = [
+        (first_id, second_id)
+        for first_id, second_ids_here in vns_run._pairs_by_first_student()
+        for second_id in second_ids_here.tolist()
+    ]
+    assert len(set(sampled_pairs)) == 10
+    assert set(sampled_pairs) <= set(pairs)
+
+
+def test_student_locations_follow_moves():
+    """Tests that the student locations and destinations kept across moves match the groups."""
+    for seed in range(5):
+        vns_run = _short_run(num_projects=4, num_students=20, seed=seed)
+        destinations, student_locations = vns_run._locations_from_groups()
+        assert vns_run.destinations[-1] is vns_run.unassigned_students
+        assert vns_run.destinations == destinations
+        for location, expected_location in zip(vns_run.student_locations, student_locations, strict=True):
+            assert location is expected_location or location == expected_location
+
+
+def test_delta_cache_matches_recalculation():
+    """Tests that the values refreshed per changed group equal those calculated from scratch."""
+    for seed in range(5):
+        vns_run = _short_run(num_projects=4, num_students=20, seed=seed)
+        vns_run.delta_cache.refresh()
+        fresh_cache = DeltaCache(vns_run.state, vns_run.reward_bilateral_interest_collaboration)
+        fresh_cache.refresh()
+        open_slots = [group.slot for project in vns_run.projects for group in project.groups]
+        assert np.array_equal(
+            vns_run.delta_cache.bilateral_counts[open_slots], fresh_cache.bilateral_counts[open_slots]
+        )
+        assert np.array_equal(vns_run.delta_cache.arrival_deltas[open_slots], fresh_cache.arrival_deltas[open_slots])
+        for project in vns_run.projects:
+            for group in project.groups:
+                for student in vns_run.students:
+                    if student not in group.students:
+                        assert vns_run.delta_cache.arrival_deltas[group.slot, student.student_id] == (
+                            vns_run._calculate_arrival_delta((project, group, student))
+                        )
+        assert vns_run.delta_cache.refresh() == []
+        (source_project, source_group), (destination_project, destination_group) = vns_run.destinations[:2]
+        student = source_group.students[0]
+        vns_run._move_student(
+            (source_project, source_group, student), (destination_project, destination_group, student)
+        )
+        assert sorted(vns_run.delta_cache.refresh()) == sorted([source_group.slot, destination_group.slot])
+
+
+def test_first_improvement_and_candidate_lists():
+    """Tests first-improvement and candidate-list local search for valid solutions and first moves."""
+    for seed in range(4):
+        projects_info, students_info = generate_throwaway_instance(num_projects=4, num_students=20, seed=seed)
+        for candidate_list in (False, True):
+            vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+            assert not vns_run.run_general_vns_first_improvement(
+                iteration_limit=5, seed=seed, candidate_list=candidate_list, testing=True
+            )
+            vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+            assert not vns_run.run_general_vns_best_improvement(
+                iteration_limit=5, seed=seed, candidate_list=candidate_list, testing=True
+            )
+
+        vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+        vns_run.max_combinations_per_pass, vns_run.first_improvement = None, True
+        moves, delta = vns_run._local_search_single_moves(vns_run.destinations, True)
+        expected_moves, _ = vns_run._local_search_best_improvement(
+            list(it.product(vns_run.destinations, repeat=1)), vns_run.student_locations, True, 1
+        )
+        assert (moves is None) == (expected_moves is None)
+        if moves is not None:
+            assert delta > 0
+            assert moves[0][0][-1] is expected_moves[0][0][-1]
+            vns_run._move_student(*moves[0])
+            assert vns_run.current_objective_value() == vns_run.objective_value + delta
+
+
+def _assert_option_deltas(vns_run: VariableNeighborhoodSearch, options: list) -> None:
+    # Applies every option, compares its delta with a complete recalculation and reverts it.
+    objective_value = vns_run.objective_value
+    for moves, delta in options:
+        for move in moves:
+            vns_run._move_student(*move)
+        assert vns_run.current_objective_value() == objective_value + delta
+        assert not vns_run._check_validity()
+        for move in reversed(moves):
+            vns_run._move_student(*move[::-1])
+        assert vns_run.current_objective_value() == objective_value
+
+
+def test_founding_options_with_heap():
+    """Tests that the deltas of the options to found a group filled from a heap of gains are exact."""
+    num_options = 0
+    for seed in range(5):
+        vns_run = _short_run(num_projects=4, num_students=20, seed=seed)
+        founding_options = vns_run._get_founding_options()
+        num_options += len(founding_options)
+        _assert_option_deltas(vns_run, founding_options)
+        vns_run._remove_empty_groups()
+        assert not vns_run.check_solution()
+    assert num_options > 0
+
+
+def test_dissolution_options_with_upper_bounds():
+    """Tests that upper bounds hold and that pruning by them keeps the options with the biggest delta."""
+    for seed in range(5):
+        vns_run = _short_run(num_projects=4, num_students=20, seed=seed)
+        dissolution_candidates = [
+            (project, group) for project in vns_run.projects for group in project.groups if group.size()
+        ]
+        destinations_with_free_capacity = [
+            (project, group)
+            for project in vns_run.projects
+            for group in project.groups
+            if 0 < group.size() < project.max_group_size
+        ]
+        upper_bounds = vns_run._dissolution_upper_bounds(dissolution_candidates, destinations_with_free_capacity)
+        all_options = []
+        for (project, group), upper_bound in zip(dissolution_candidates, upper_bounds, strict=True):
+            moves, delta = vns_run._dissolve_group(project, group, destinations_with_free_capacity)
+            for move in reversed(moves):
+                vns_run._move_student(*move[::-1])
+            assert delta <= upper_bound
+            all_options.append((moves, delta))
+        _assert_option_deltas(vns_run, all_options)
+
+        dissolution_options = vns_run._get_dissolution_options()
+        _assert_option_deltas(vns_run, dissolution_options)
+        best_delta = max(delta for _, delta in all_options)
+        assert max(delta for _, delta in dissolution_options) == best_delta
+        assert sum(delta == best_delta for _, delta in dissolution_options) == sum(
+            delta == best_delta for _, delta in all_options
+        )
+        assert not vns_run.check_solution()
+
+
+def test_budgeted_group_options():
+    """Tests that a budget limits the evaluated options to found or dissolve a group and keeps deltas exact."""
+    for seed in range(4):
+        projects_info, students_info = generate_throwaway_instance(num_projects=5, num_students=25, seed=seed)
+        for group_sampling in ("ranked", "random"):
+            vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+            assert not vns_run.run_general_vns_best_improvement(
+                iteration_limit=5, seed=seed, group_evaluation_budget=2, group_sampling=group_sampling, testing=True
+            )
+            for budget in (1, 2, 3):
+                vns_run.group_evaluation_budget = budget
+                num_evaluated_before = vns_run.num_group_options_evaluated
+                founding_options, dissolution_options = vns_run._get_sampled_founding_and_dissolution_options()
+                assert vns_run.num_group_options_evaluated - num_evaluated_before <= budget + 1
+                assert founding_options or dissolution_options
+                _assert_option_deltas(vns_run, founding_options + dissolution_options)
+                vns_run._remove_empty_groups()
+        vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+        assert not vns_run.run_general_vns_best_improvement(
+            iteration_limit=5, seed=seed, group_evaluation_time_limit=1e-9, testing=True
+        )
+
+
+def test_parallel_multi_start():
+    """Tests that parallel runs use distinct derived seeds and report the best solution among them."""
+    projects_info, students_info = generate_throwaway_instance(num_projects=4, num_students=20, seed=0)
+    parallel_vns = ParallelVNS(projects_info, students_info, num_workers=2)
+    results = parallel_vns.run(time_limit=1, seed=0)
+    assert results["seeds"] == parallel_vns.derive_seeds(0)
+    assert len(set(results["seeds"])) == 2
+    assert len(results["trajectories"]) == 2
+    assert results["best_objective_value"] == max(trajectory[-1]["obj"] for trajectory in results["trajectories"])
+    vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+    vns_run.import_assignment(results["best_assignment"])
+    assert vns_run.best_objective_value == results["best_objective_value"]
+    assert not vns_run.check_solution()
+
+    single_start = run_single_start(
+        parallel_vns.projects_info,
+        parallel_vns.students_info,
+        parallel_vns.solver_options,
+        {"time_limit": 0.5, "seed": 1},
+        False,
+    )
+    vns_run.import_assignment(single_start["assignment"])
+    assert (
+        vns_run.best_objective_value == single_start["best_objective_value"] == single_start["trajectory"][-1]["obj"]
+    )
+    with pytest.raises(ValueError):
+        ParallelVNS(projects_info, students_info, num_workers=0)
+
+
+def test_island_migration():
+    """Tests the migration topologies, the adoption of better migrants and a run of islands."""
+    assert migration_targets(2, 3, "ring") == [0]
+    assert migration_targets(0, 1, "ring") == []
+    assert migration_targets(1, 3, "complete") == [0, 2]
+    with pytest.raises(ValueError):
+        migration_targets(0, 3, "star")
+
+    projects_info, students_info = generate_throwaway_instance(num_projects=4, num_students=20, seed=1)
+    parallel_vns = ParallelVNS(projects_info, students_info, num_workers=2)
+    migrant_run = VariableNeighborhoodSearch(parallel_vns.projects_info, parallel_vns.students_info)
+    migrant_run.run_general_vns_best_improvement(iteration_limit=5, seed=1)
+    inbox = queue.Queue()
+    # The migrant claims to be better than any solution, so it is adopted after the first epoch.
+    inbox.put((10**9, migrant_run.export_assignment()))
+    island_results = run_island(
+        parallel_vns.projects_info,
+        parallel_vns.students_info,
+        parallel_vns.solver_options,
+        {"time_limit": 0.5, "seed": 1},
+        False,
+        0,
+        [inbox],
+        "ring",
+        0.1,
+    )
+    assert island_results["migrants_adopted"] == 1
+
+    results = parallel_vns.run_islands(time_limit=1, seed=1, migration_interval=0.2, topology="complete")
+    assert len(results["migrants_adopted"]) == len(results["trajectories"]) == 2
+    assert results["best_objective_value"] == max(trajectory[-1]["obj"] for trajectory in results["trajectories"])
+    migrant_run.import_assignment(results["best_assignment"])
+    assert migrant_run.best_objective_value == results["best_objective_value"]
+    assert not migrant_run.check_solution()
+    with pytest.raises(ValueError):
+        parallel_vns.run_islands(migration_interval=0)
+
+
+def test_seeded_runs_use_own_random_streams():
+    """Tests that seeded instances and runs are reproducible and leave the global random state alone."""
+    random.seed(0)
+    global_state = random.getstate()
+    results = []
+    for _ in range(2):
+        projects_info, students_info = generate_throwaway_instance(num_projects=4, num_students=20, seed=3)
+        vns_run = VariableNeighborhoodSearch(projects_info, students_info)
+        vns_run.run_general_vns_best_improvement(iteration_limit=10, seed=3)
+        results.append((projects_info.to_dict(), students_info.to_dict(), vns_run.export_assignment()))
+    assert results[0] == results[1]
+    assert random.getstate() == global_state
+
+    # Runs of another solver in between do not change the random numbers a solver draws.
+    alone_run, interleaved_run, other_run = (
+        VariableNeighborhoodSearch(projects_info, students_info) for _ in range(3)
+    )
+    for seed in (3, None):
+        alone_run.run_general_vns_best_improvement(iteration_limit=5, seed=seed)
+    for seed in (3, None):
+        interleaved_run.run_general_vns_best_improvement(iteration_limit=5, seed=seed)
+        other_run.run_general_vns_best_improvement(iteration_limit=5, seed=4 if seed else None)
+    assert interleaved_run.export_assignment() == alone_run.export_assignment()
+
+
+def test_parallel_benchmark_runner(tmp_path, monkeypatch):
+    """Tests that instances solved by parallel workers are saved in the order of the instances."""
+    monkeypatch.chdir(tmp_path)
+    for instance_number in range(3):
+        save_instance_arrays(generate_instance_arrays(2, 8, seed=instance_number), "2_8", instance_number)
+    benchmark_options = {
+        "filename_results": "benchmarks.json",
+        "filename_error_logs": "errors.txt",
+        "project_quantities": [2],
+        "student_quantities": [8],
+        "instances_per_dimension": 3,
+        "time_limit": 0.2,
+    }
+    benchmark_vns(num_workers=2, **benchmark_options)
+    results = json.loads(Path("benchmarks.json").read_text(encoding="utf-8"))
+    assert list(results) == [f"generic_2_8_{instance_number}" for instance_number in range(3)]
+    assert all(solution_development for solution_development in results.values())
+    assert not Path("benchmarks.jsonl").exists()
+    assert not Path("error_logs", "errors.txt").exists()
+    with pytest.raises(ValueError, match="already exists"):
+        benchmark_vns(num_workers=2, **benchmark_options)
+    with pytest.raises(ValueError, match="At least one worker"):
+        benchmark_vns(num_workers=0, **benchmark_options)
+
+
+def test_results_sink_survives_crashes(tmp_path):
+    """Tests that the results sink keeps complete records, drops a cut off one and finalizes in order."""
+    results_sink = ResultsSink(tmp_path / "results.json")
+    results_sink.append("b", [1])
+    results_sink.append("a", [2])
+    results_sink.append("b", [3])
+    with results_sink.path_records.open("a", encoding="utf-8") as f:
+        f.write('{"key": "c", "val')
+    assert read_records(results_sink.path_records) == {"b": [3], "a": [2]}
+    assert results_sink.load() == {"b": [3], "a": [2]}
+    results_sink.append("c", [4])
+    results_sink.finalize(["a", "b"])
+    assert not results_sink.path_records.exists()
+    results = json.loads(results_sink.path_results.read_text(encoding="utf-8"))
+    assert list(results.items()) == [("a", [2]), ("b", [3]), ("c", [4])]
+    assert results_sink.load() == results
+    assert results_sink.path_records.is_file()
+
+
+def test_resumed_benchmark_skips_solved_instances(tmp_path, monkeypatch):
+    """Tests that a resumed benchmark run only solves instances without results and cleans up checkpoints."""
+    monkeypatch.chdir(tmp_path)
+    for instance_number in range(2):
+        save_instance_arrays(generate_instance_arrays(2, 8, seed=instance_number), "2_8", instance_number)
+    solved_before = [{"obj": -1, "runtime": 0, "neighborhood": 0}]
+    ResultsSink(Path("benchmarks.json")).append("generic_2_8_0", solved_before)
+    benchmark_options = {
+        "filename_results": "benchmarks.json",
+        "filename_error_logs": "errors.txt",
+        "project_quantities": [2],
+        "student_quantities": [8],
+        "instances_per_dimension": 2,
+        "time_limit": 0.2,
+        "checkpoint_interval": 0.05,
+    }
+    with pytest.raises(ValueError, match="already exists"):
+        benchmark_vns(**benchmark_options)
+    benchmark_vns(resume=True, **benchmark_options)
+    results = json.loads(Path("benchmarks.json").read_text(encoding="utf-8"))
+    assert results["generic_2_8_0"] == solved_before
+    assert results["generic_2_8_1"] != solved_before
+    assert not any(Path("checkpoints", "benchmarks").iterdir())
+
+
+def test_instance_cache_is_compiled_anew_when_csvs_change(tmp_path, monkeypatch):
+    """Tests that cached instances equal their CSVs and are compiled anew once a CSV was modified."""
+    monkeypatch.chdir(tmp_path)
+    filepath_projects, filepath_students = instance_filepaths("3_8", 0)
+    filepath_projects.parent.mkdir(parents=True)
+    filepath_students.parent.mkdir(parents=True)
+    for seed in (0, 1):
+        save_projects_and_students_instance(
+            num_projects=3,
+            num_students=8,
+            filepath_projects=filepath_projects,
+            filepath_students=filepath_students,
+            seed=seed,
+        )
+        projects_info, students_info = read_instance_csvs(filepath_projects, filepath_students)
+        for _ in range(2):
+            cached_projects_info, cached_students_info = load_instance("3_8", 0)
+            assert cached_projects_info.equals(projects_info)
+            assert cached_students_info.to_dict("list") == students_info.to_dict("list")
+        assert instance_archive_path("3_8", 0).is_file()
+
+
+def test_solver_core_without_pandas(tmp_path, monkeypatch):
+    """Tests that the solver imports and solves an instance given as arrays without importing pandas."""
+    monkeypatch.chdir(tmp_path)
+    save_instance_arrays(generate_instance_arrays(3, 12, seed=0), "3_12", 0)
+    code = (
+        "import sys\n"
+        "from instance_loader import load_instance_arrays\n"
+        "from vns_on_student_assignment import VariableNeighborhoodSearch\n"
+        "vns_run = VariableNeighborhoodSearch.from_arrays(**load_instance_arrays('3_12', 0))\n"
+        "assert not vns_run.run_general_vns_best_improvement(iteration_limit=3, seed=0, testing=True)\n"
+        "assert 'pandas' not in sys.modules\n"
+    )
+    environment = os.environ | {"PYTHONPATH": str(Path(__file__).resolve().parent)}
+    subprocess.run([sys.executable, "-c", code], env=environment, check=True)
+
+
+def test_numpy_instance_generator():
+    """Tests that instances generated with NumPy are reproducible, well-formed and solvable."""
+    arrays = generate_instance_arrays(num_projects=6, num_students=300, seed=7)
+    same_arrays = generate_instance_arrays(num_projects=6, num_students=300, seed=7)
+    assert all(np.array_equal(arrays[name], same_arrays[name]) for name in arrays)
+    assert arrays["project_parameters"].shape == (6, 7)
+    assert arrays["preference_matrix"].shape == (300, 6)
+    assert 0 <= arrays["preference_matrix"].min() and arrays["preference_matrix"].max() <= 3
+    assert len(set(arrays["student_names"].tolist())) == 300
+    partner_offsets, partner_ids = arrays["partner_offsets"].tolist(), arrays["partner_ids"].tolist()
+    assert len(partner_offsets) == 301
+    for student_id, (start, end) in enumerate(zip(partner_offsets[:-1], partner_offsets[1:])):
+        partners = partner_ids[start:end]
+        assert len(partners) == 3 == len(set(partners))
+        assert student_id not in partners and all(0 <= partner_id < 300 for partner_id in partners)
+
+    vns_run = VariableNeighborhoodSearch.from_arrays(**arrays)
+    assert not vns_run.run_general_vns_best_improvement(iteration_limit=2, seed=7, testing=True)
+
+
+def test_bulk_instance_generation(tmp_path, monkeypatch):
+    """Tests that instances generated in bulk do not depend on the workers and existing ones are skipped."""
+    contents = []
+    for num_workers in (1, 2):
+        folder = tmp_path / f"{num_workers}_workers"
+        folder.mkdir()
+        monkeypatch.chdir(folder)
+        assert create_instances([2, 3], [8], instances_per_combination=2, seed=5, num_workers=num_workers) == 4
+        assert create_instances([2, 3], [8], instances_per_combination=2, seed=5, num_workers=num_workers) == 0
+        filepaths = [
+            filepath
+            for dimension in ("2_8", "3_8")
+            for instance_number in range(2)
+            for filepath in instance_filepaths(dimension, instance_number)
+        ]
+        contents.append([filepath.read_text(encoding="utf-8") for filepath in filepaths])
+        assert not list(Path().rglob("*.tmp"))
+    assert contents[0] == contents[1]
+
+    instance_filepaths("3_8", 1)[0].unlink()
+    assert create_instances([3], [8], instances_per_combination=2, seed=5) == 1
+    assert instance_filepaths("3_8", 1)[0].read_text(encoding="utf-8") == contents[0][6]
+    with pytest.raises(ValueError):
+        create_instances([2], [8], num_workers=0)
+
+
+def test_scaling_benchmark(tmp_path):
+    """Tests the fitted growth exponents and that dimensions over the time budget are skipped."""
+    measurements = [
+        {"num_projects": num_projects, "num_students": num_students, "visit_time": num_projects * num_students**2}
+        for num_projects in (2, 4, 8)
+        for num_students in (10, 20, 40)
+    ]
+    exponents = growth_exponents(measurements, "visit_time")
+    assert exponents["projects"] == pytest.approx(1) and exponents["students"] == pytest.approx(2)
+    assert growth_exponents(measurements[:3], "visit_time") == {"projects": None, "students": pytest.approx(2)}
+
+    report = benchmark_scaling(
+        str(tmp_path / "scaling.json"), [2, 3], [10, 20], neighborhoods=(1, 3), iterations=2, measure_memory=True
+    )
+    assert len(report["measurements"]) == 8 and not report["skipped"]
+    for measurement in report["measurements"]:
+        assert 1 <= measurement["visits"] <= 2
+        assert all(measurement[metric] >= 0 for metric in METRICS)
+    assert set(report["growth_exponents"]) == {"1", "3"}
+    assert json.loads((tmp_path / "scaling.json").read_text(encoding="utf-8")) == report
+
+    report = benchmark_scaling(str(tmp_path / "skipped.json"), [2, 3], [10, 20], neighborhoods=(1,), time_budget=0)
+    assert len(report["measurements"]) == 1
+    assert len(report["skipped"]) == 3
+    with pytest.raises(ValueError, match="already exists"):
+        benchmark_scaling(str(tmp_path / "skipped.json"), [2], [10])
+
+
+def test_microbenchmarks(tmp_path, monkeypatch):
+    """Tests the timing of primitives and that every primitive leaves the solution as it found it."""
+    calls = []
+    times = time_operation(
+        lambda: calls.append("operation"), lambda: calls.append("setup"), lambda: calls.append("teardown"), 2, 3
+    )
+    assert len(times) == 3
+    assert calls == ["setup", "operation", "teardown"] * 5
+    summary = summarize_times([1.0, 2.0, 6.0], 4)
+    assert (summary["min"], summary["median"], summary["mean"], summary["median_per_call"]) == (1.0, 2.0, 3.0, 0.5)
+
+    monkeypatch.chdir(tmp_path)
+    save_instance_arrays(generate_instance_arrays(4, 20, seed=0), "4_20", 0)
+    baseline = run_microbenchmarks("baseline.json", [("4_20", 0)], warmup=1, repetitions=2)
+    assert set(baseline["results"]["generic_4_20_0"]) == set(
+        primitive_operations(VariableNeighborhoodSearch.from_arrays(**load_instance_arrays("4_20", 0)), 0, 20)
+    )
+    report = run_microbenchmarks(
+        "results.json",
+        [("4_20", 0)],
+        warmup=1,
+        repetitions=2,
+        primitives=["shake", "move_student"],
+        filename_baseline="baseline.json",
+    )
+    assert set(report["change_from_baseline"]["generic_4_20_0"]) == {"shake", "move_student"}
+    assert compare_to_baseline(baseline["results"], baseline["results"])["generic_4_20_0"]["shake"] == 1
+    with pytest.raises(ValueError, match="no operations"):
+        run_microbenchmarks("unknown.json", [("4_20", 0)], primitives=["unknown"])
+
+
 if __name__ == "__main__":
     settings = TestSettings()
     test_vns(
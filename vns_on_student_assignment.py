@@ -1,17 +1,46 @@
 """Contains the class which controls the entire VNS solving process."""
 
+import bisect
+import hashlib
+import heapq
 import itertools as it
+import json
+import math
+import os
 import random as rd
 import time as t
 from collections import Counter
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
 
+from delta_cache import DeltaCache
 from project import Project
 from project_group import ProjectGroup
+from solution_state import UNASSIGNED, SolutionState
 from student import Student
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+INFEASIBLE_DELTA = np.iinfo(np.int64).min
+# Upper bound on the number of deltas evaluated at once for pair moves.
+PAIR_MOVES_BLOCK_SIZE = 1 << 20
+
+
+def info_records(info: "pd.DataFrame | Sequence[tuple]") -> Sequence[tuple]:
+    """Returns project or student data as one tuple per row.
+
+    Data frames are converted without their index, anything else is
+    assumed to be records already. The solver accepts both, so pandas
+    is only needed by whoever hands it a data frame.
+    """
+    if hasattr(info, "itertuples"):
+        return list(info.itertuples(index=False, name=None))
+    return info
+
 
 class VariableNeighborhoodSearch:
     """Solves instances of the SPAGP.
@@ -25,10 +54,11 @@ class VariableNeighborhoodSearch:
     Attributes:
         projects_info: The names of the projects with each project's
             guidelines, whishes and penalties regarding the number of
-            groups and group sizes.
+            groups and group sizes as a data frame or as records.
         students_info: The project preferences for all projects and the
             partner preferences i.e., the students a student wants to
-            work with the most for all students in the problem instance.
+            work with the most for all students in the problem instance
+            as a data frame or as records.
         reward_bilateral_interest_collaboration: The fixed reward for every
             occurrence in the solution of two students who have specified
             each other as partner preferences being in the same group.
@@ -40,10 +70,25 @@ class VariableNeighborhoodSearch:
         num_students: The number of students in the problem instance.
         unassigned_students: The students who are not assigned to a
             group at any point in time.
+        state: The assignment of students to groups in flat integer
+            arrays which is kept in sync with the groups and on which
+            the objective value and all deltas are calculated.
         bilateral_pairs: A set of tuples with two student IDS belonging
             to two students who specified each other as partner
             preferences i.e., one of the students they want to work
             with the most.
+        bilateral_partners: The IDs of the students every student forms
+            a bilateral pair with. The index position is the student's ID.
+        destinations: The non-empty groups with their projects in the order
+            of the projects and the groups within them, followed by
+            unassigned_students. Kept up to date with every move.
+        student_locations: The project and group every student is in or
+            unassigned_students if he/she is not assigned to a group. The
+            index position is the student's ID. Kept up to date with
+            every move.
+        construction_time: The time in seconds it took to construct the
+            initial solution.
+        initial_objective_value: The objective value of the initial solution.
         objective_value: The objective value of the solution at any
             point in time.
         best_objective_value: The objective value of the best solution
@@ -51,56 +96,219 @@ class VariableNeighborhoodSearch:
         move_reversals: Moves of students made during a try to improve
             the best_objective_value which have to be reversed if the
             try fails.
-        combinations_student_ids_by_dimension: combinations of student IDs
-            with different numbers of IDs per combination which are used
-            during local search.
+        max_combinations_per_pass: The maximum number of student combinations
+            evaluated in one pass of local search moving two or more students.
+            If there are more, a random sample of that size is evaluated. None
+            means all combinations are evaluated.
+        first_improvement: Whether local search applies the first improving
+            move instead of the best one.
+        candidate_list: Whether local search only moves students who are
+            unassigned, in a group changed during the current iteration or
+            apart from one of their bilateral partners.
+        group_evaluation_budget: The maximum number of options to found or
+            dissolve a group evaluated per founding or dissolution. None
+            means there is no limit.
+        group_evaluation_time_limit: The time in seconds after which no further
+            options to found or dissolve a group are evaluated. None means
+            there is no limit.
+        group_sampling: Whether options are sampled "ranked" or "random" if
+            not all of them are evaluated.
+        bilateral_pair_ids: The IDs of the first and of the second students
+            of all bilateral pairs as two NumPy arrays.
+        delta_cache: The bilateral counts and arrival deltas of all students
+            for all groups, recalculated only for groups that changed.
+        single_move_rankings: The best move of every student found in the last
+            pass of local search moving one student, with or without moves
+            across projects. Students are ranked anew only if their own group,
+            the group of their best move or the set of groups changed.
+        rng: The random number generator of the solver, seeded by the seed
+            of a run. Solvers never share random state.
+        num_moves_evaluated: The number of moves local search calculated
+            the delta of so far.
+        num_group_options_evaluated: The number of options to found or
+            dissolve a group evaluated so far.
+        neighborhood_statistics: The number of visits, the time in seconds
+            spent in each neighborhood as a whole, in founding or dissolving
+            a group and in VND, the number of options to found or dissolve
+            a group evaluated and the number of moves evaluated in VND of
+            every neighborhood visited so far by number.
     """
 
     def __init__(
         self,
-        projects_info: pd.DataFrame,
-        students_info: pd.DataFrame,
+        projects_info: "pd.DataFrame | Sequence[tuple]",
+        students_info: "pd.DataFrame | Sequence[tuple]",
         reward_bilateral_interest_collaboration: int = 2,
         penalty_student_not_assigned: int = 3,
+        construction: str = "greedy",
     ):
         """Initializes the instance with the data of the problem instance.
 
         Args:
             projects_info: The names of the projects with each project's
                 guidelines, whishes and penalties regarding the number of
-                groups and group sizes.
+                groups and group sizes. Either a data frame with the columns
+                of the instance CSVs or records as described in from_records.
             students_info: The project preferences for all projects and the
                 partner preferences i.e., the students a student wants to
                 work with the most for all students in the problem instance.
+                Either a data frame with the columns of the instance CSVs or
+                records as described in from_records.
             reward_bilateral_interest_collaboration: The fixed reward for every
                 occurrence in the solution of two students who have specified
                 each other as partner preferences being in the same group.
             penalty_student_not_assigned: The fixed penalty for every student
                 in the solution who is not assigned to a group.
+            construction: How the initial solution is constructed. "greedy" fills
+                groups of ideal size with the students who prefer the project the
+                most. "regret" inserts bilateral pairs and single students into
+                groups in the order of how much they would lose by not getting
+                their best project. Every evaluation of a pair or student scans
+                all projects and an insertion may require every other pair or
+                student to be evaluated again, so "regret" takes O(n ** 2 * m)
+                for n students and m projects in the worst case. Students left
+                over are then inserted into the best of all g groups, which
+                takes O(n * g) further evaluations.
+
+        Raises:
+            ValueError: construction is neither "greedy" nor "regret".
         """
+        if construction not in ("greedy", "regret"):
+            raise ValueError('The initial solution is either constructed "greedy" or by "regret".')
         self.projects_info, self.students_info = projects_info, students_info
         self.reward_bilateral_interest_collaboration = reward_bilateral_interest_collaboration
         self.penalty_student_not_assigned = penalty_student_not_assigned
-        self.projects = tuple((Project(*row) for row in self.projects_info.itertuples()))
-        self.students = tuple((Student(*row) for row in self.students_info.itertuples()))
+        self.projects = tuple(
+            Project(project_id, *record) for project_id, record in enumerate(info_records(projects_info))
+        )
+        self.students = tuple(
+            Student(student_id, *record) for student_id, record in enumerate(info_records(students_info))
+        )
         self.time_data_loaded = t.time()
         self.num_students = len(self.students)
         self.unassigned_students: list[Student] = []
-        self.bilateral_pairs = self._get_bilateral_pairs()
-        self._initial_solution()
+        self.bilateral_pairs, self.bilateral_partners = self._get_bilateral_pairs()
+        self.bilateral_pair_ids = np.array(sorted(self.bilateral_pairs), dtype=np.int64).reshape(-1, 2).T
+        self.state = SolutionState(self.projects, self.students, self.bilateral_partners)
+        self.delta_cache = DeltaCache(self.state, self.reward_bilateral_interest_collaboration)
+        self.single_move_rankings: dict[bool, dict] = {}
+        if construction == "greedy":
+            self._initial_solution()
+        else:
+            self._regret_initial_solution()
+        self.destinations, self.student_locations = self._locations_from_groups()
+        self.construction_time = t.time() - self.time_data_loaded
         self.objective_value = self.current_objective_value()
+        self.initial_objective_value = self.objective_value
         self.best_objective_value = self.objective_value
         self.move_reversals = []
-        self.combinations_student_ids_by_dimension = {1: list(it.combinations(range(self.num_students), 1))}
+        self.max_combinations_per_pass: int | None = None
+        self.first_improvement = False
+        self.candidate_list = False
+        self.group_evaluation_budget: int | None = None
+        self.group_evaluation_time_limit: float | None = None
+        self.group_sampling = "ranked"
+        self.rng = rd.Random()
+        self.num_moves_evaluated = 0
+        self.num_group_options_evaluated = 0
+        self.neighborhood_statistics: dict[int, dict] = {}
+
+    @classmethod
+    def from_records(
+        cls,
+        projects_records: Sequence[tuple],
+        students_records: Sequence[tuple],
+        reward_bilateral_interest_collaboration: int = 2,
+        penalty_student_not_assigned: int = 3,
+        construction: str = "greedy",
+    ) -> "VariableNeighborhoodSearch":
+        """Returns a solver for an instance given as plain records.
 
-    def _get_bilateral_pairs(self) -> set[tuple[int, int]]:
-        favorite_partners_students = self.students_info["fav_partners"].tolist()
-        return {
+        Args:
+            projects_records: One tuple per project with its name, the number
+                of groups it offers and it supervises at most, its ideal,
+                minimum and maximum group size, its penalty for every extra
+                group and its penalty for deviating from the ideal group size.
+                The index position is the project's ID.
+            students_records: One tuple per student with his/her name, the IDs
+                of his/her partner preferences and his/her preference values
+                for all projects. The index position is the student's ID.
+            reward_bilateral_interest_collaboration: See __init__.
+            penalty_student_not_assigned: See __init__.
+            construction: See __init__.
+        """
+        return cls(
+            projects_records,
+            students_records,
+            reward_bilateral_interest_collaboration,
+            penalty_student_not_assigned,
+            construction,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        project_names: np.ndarray,
+        project_parameters: np.ndarray,
+        student_names: np.ndarray,
+        preference_matrix: np.ndarray,
+        partner_offsets: np.ndarray,
+        partner_ids: np.ndarray,
+        reward_bilateral_interest_collaboration: int = 2,
+        penalty_student_not_assigned: int = 3,
+        construction: str = "greedy",
+    ) -> "VariableNeighborhoodSearch":
+        """Returns a solver for an instance given as arrays.
+
+        The arrays are those returned by load_instance_arrays of the
+        module instance_loader.
+
+        Args:
+            project_names: The name of every project.
+            project_parameters: One row per project with the numbers that
+                follow the name in projects_records of from_records.
+            student_names: The name of every student.
+            preference_matrix: The preference values of every student for
+                every project. The first index is the student ID, the second
+                index is the project ID.
+            partner_offsets: Where the partner preferences of every student
+                start in partner_ids, followed by the length of partner_ids.
+            partner_ids: The IDs of the partner preferences of all students.
+            reward_bilateral_interest_collaboration: See __init__.
+            penalty_student_not_assigned: See __init__.
+            construction: See __init__.
+        """
+        offsets, ids = partner_offsets.tolist(), partner_ids.tolist()
+        students_records = [
+            (name, ids[start:end], tuple(preferences))
+            for name, start, end, preferences in zip(
+                student_names.tolist(), offsets[:-1], offsets[1:], preference_matrix.tolist()
+            )
+        ]
+        projects_records = [
+            (name, *parameters) for name, parameters in zip(project_names.tolist(), project_parameters.tolist())
+        ]
+        return cls(
+            projects_records,
+            students_records,
+            reward_bilateral_interest_collaboration,
+            penalty_student_not_assigned,
+            construction,
+        )
+
+    def _get_bilateral_pairs(self) -> tuple[set[tuple[int, int]], tuple[tuple[int, ...], ...]]:
+        favorite_partners_students = [student.fav_partners for student in self.students]
+        bilateral_pairs = {
             (student_id, partner_id)
             for student_id, favorite_partners in enumerate(favorite_partners_students)
             for partner_id in favorite_partners
             if student_id < partner_id and student_id in favorite_partners_students[partner_id]
         }
+        bilateral_partners = [[] for _ in range(self.num_students)]
+        for first_id, second_id in sorted(bilateral_pairs):
+            bilateral_partners[first_id].append(second_id)
+            bilateral_partners[second_id].append(first_id)
+        return bilateral_pairs, tuple(tuple(partner_ids) for partner_ids in bilateral_partners)
 
     def run_general_vns_best_improvement(
         self,
@@ -114,6 +322,13 @@ class VariableNeighborhoodSearch:
         iteration_limit: int = 40,
         time_limit: int = 300,
         seed: int | None = None,
+        max_combinations_per_pass: int | None = None,
+        candidate_list: bool = False,
+        group_evaluation_budget: int | None = None,
+        group_evaluation_time_limit: float | None = None,
+        group_sampling: str = "ranked",
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: float = 60,
     ):
         """Solves or tests the General VNS solution process.
 
@@ -160,6 +375,33 @@ class VariableNeighborhoodSearch:
             time_limit: The time after which the main loop breaks if benchmarking is
                 set to True
             seed: The random seed.
+            max_combinations_per_pass: The maximum number of student combinations
+                evaluated in one pass of local search moving two or more students.
+                If there are more, a random sample of that size is drawn for every
+                pass. None means all combinations are evaluated.
+            candidate_list: Set to True if local search should only move students
+                who are unassigned, in a group changed during the current iteration
+                or apart from one of their bilateral partners.
+            group_evaluation_budget: The maximum number of options to found or
+                dissolve a group that are evaluated when a group is founded or
+                dissolved. At least one option of each kind is evaluated. If
+                there are not more options than that, all are evaluated. None
+                means there is no limit.
+            group_evaluation_time_limit: The time in seconds after which no further
+                options to found or dissolve a group are evaluated. None means
+                there is no limit.
+            group_sampling: Which options are evaluated if not all of them are.
+                "ranked" picks the projects with the best estimated founding
+                deltas and the groups with the best upper bounds on their
+                dissolution deltas, "random" picks them randomly.
+            checkpoint_path: Where the state of the run is saved every
+                checkpoint_interval seconds so that an interrupted run can be
+                continued. If there is a checkpoint at the start of a run, the
+                run continues from it instead of starting anew and seed is
+                ignored. A checkpoint records the sizes and a hash of the data
+                of its instance, so one of another instance is rejected. None
+                means no checkpoints are saved.
+            checkpoint_interval: The time in seconds between two checkpoints.
 
         Returns:
             If testing == True: If after any shake, founding or dissolving of a group
@@ -174,17 +416,147 @@ class VariableNeighborhoodSearch:
 
         Raises:
             ValueError: unassignment_probability is not between 0 and 1.
+            ValueError: max_combinations_per_pass is smaller than 1.
+            ValueError: group_evaluation_budget is smaller than 1.
+            ValueError: group_evaluation_time_limit is not positive.
+            ValueError: group_sampling is neither "ranked" nor "random".
+            ValueError: checkpoint_interval is not positive.
+            ValueError: The checkpoint at checkpoint_path belongs to another instance.
+        """
+        return self._run_general_vns(
+            first_improvement=False,
+            max_neighborhood=max_neighborhood,
+            assignment_bias=assignment_bias,
+            unassignment_probability=unassignment_probability,
+            min_neighborhood=min_neighborhood,
+            testing=testing,
+            benchmarking=benchmarking,
+            demonstrating=demonstrating,
+            iteration_limit=iteration_limit,
+            time_limit=time_limit,
+            seed=seed,
+            max_combinations_per_pass=max_combinations_per_pass,
+            candidate_list=candidate_list,
+            group_evaluation_budget=group_evaluation_budget,
+            group_evaluation_time_limit=group_evaluation_time_limit,
+            group_sampling=group_sampling,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval,
+        )
+
+    def run_general_vns_first_improvement(
+        self,
+        max_neighborhood: int = 6,
+        assignment_bias: float | int = 10,
+        unassignment_probability: float = 0.05,
+        min_neighborhood: int = 1,
+        testing: bool = False,
+        benchmarking: bool = False,
+        demonstrating: bool = False,
+        iteration_limit: int = 40,
+        time_limit: int = 300,
+        seed: int | None = None,
+        max_combinations_per_pass: int | None = None,
+        candidate_list: bool = False,
+        group_evaluation_budget: int | None = None,
+        group_evaluation_time_limit: float | None = None,
+        group_sampling: str = "ranked",
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: float = 60,
+    ):
+        """Solves or tests the General VNS solution process with first improvement.
+
+        Works exactly like run_general_vns_best_improvement except that every
+        local search in VND applies the first improving move it finds instead
+        of searching the whole neighborhood for the best one. The order in
+        which moves are searched is the order of the student IDs and then the
+        order of the groups.
+
+        Args:
+            See run_general_vns_best_improvement.
+
+        Returns:
+            See run_general_vns_best_improvement.
+
+        Raises:
+            ValueError: unassignment_probability is not between 0 and 1.
+            ValueError: max_combinations_per_pass is smaller than 1.
+            ValueError: group_evaluation_budget is smaller than 1.
+            ValueError: group_evaluation_time_limit is not positive.
+            ValueError: group_sampling is neither "ranked" nor "random".
+            ValueError: checkpoint_interval is not positive.
+            ValueError: The checkpoint at checkpoint_path belongs to another instance.
         """
+        return self._run_general_vns(
+            first_improvement=True,
+            max_neighborhood=max_neighborhood,
+            assignment_bias=assignment_bias,
+            unassignment_probability=unassignment_probability,
+            min_neighborhood=min_neighborhood,
+            testing=testing,
+            benchmarking=benchmarking,
+            demonstrating=demonstrating,
+            iteration_limit=iteration_limit,
+            time_limit=time_limit,
+            seed=seed,
+            max_combinations_per_pass=max_combinations_per_pass,
+            candidate_list=candidate_list,
+            group_evaluation_budget=group_evaluation_budget,
+            group_evaluation_time_limit=group_evaluation_time_limit,
+            group_sampling=group_sampling,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval,
+        )
+
+    def _run_general_vns(
+        self,
+        first_improvement: bool,
+        max_neighborhood: int,
+        assignment_bias: float | int,
+        unassignment_probability: float,
+        min_neighborhood: int,
+        testing: bool,
+        benchmarking: bool,
+        demonstrating: bool,
+        iteration_limit: int,
+        time_limit: int,
+        seed: int | None,
+        max_combinations_per_pass: int | None,
+        candidate_list: bool,
+        group_evaluation_budget: int | None,
+        group_evaluation_time_limit: float | None,
+        group_sampling: str,
+        checkpoint_path: Path | None,
+        checkpoint_interval: float,
+    ):
         if seed != None:
-            rd.seed(seed)
+            self.rng.seed(seed)
         if not 0 <= unassignment_probability <= 1:
             raise ValueError("A probability must be between 0 and 1.")
-        if benchmarking:
-            best_solutions = [
-                {"obj": self.best_objective_value, "runtime": t.time() - self.time_data_loaded, "neighborhood": 0}
-            ]
+        if max_combinations_per_pass is not None and max_combinations_per_pass < 1:
+            raise ValueError("At least one combination must be evaluated per pass.")
+        if group_evaluation_budget is not None and group_evaluation_budget < 1:
+            raise ValueError("At least one option to found or dissolve a group must be evaluated.")
+        if group_evaluation_time_limit is not None and group_evaluation_time_limit <= 0:
+            raise ValueError("The time limit for evaluating options must be positive.")
+        if group_sampling not in ("ranked", "random"):
+            raise ValueError('Options are either sampled "ranked" or "random".')
+        if checkpoint_interval <= 0:
+            raise ValueError("The time between two checkpoints must be positive.")
+        self.max_combinations_per_pass = max_combinations_per_pass
+        self.first_improvement = first_improvement
+        self.candidate_list = candidate_list
+        self.group_evaluation_budget = group_evaluation_budget
+        self.group_evaluation_time_limit = group_evaluation_time_limit
+        self.group_sampling = group_sampling
+        best_solutions = [
+            {"obj": self.best_objective_value, "runtime": t.time() - self.time_data_loaded, "neighborhood": 0}
+        ]
         current_iteration = 0
         current_neighborhood = min_neighborhood
+        if checkpoint_path is not None and checkpoint_path.is_file():
+            current_iteration, current_neighborhood, best_solutions = self._load_checkpoint(checkpoint_path)
+        last_checkpoint_time = t.time()
         while True:
             current_iteration += 1
             match current_neighborhood:
@@ -225,8 +597,27 @@ class VariableNeighborhoodSearch:
                 print("The neighborhood is:", current_neighborhood)
                 start_time = t.time()
 
+            statistics = self.neighborhood_statistics.setdefault(
+                current_neighborhood,
+                {
+                    "visits": 0,
+                    "time": 0.0,
+                    "group_time": 0.0,
+                    "vnd_time": 0.0,
+                    "group_options_evaluated": 0,
+                    "moves_evaluated": 0,
+                },
+            )
+            statistics["visits"] += 1
+            visit_start_time = t.time()
+
             if found_or_dissolve_group:
+                num_group_options_evaluated_before = self.num_group_options_evaluated
                 self._found_or_dissolve_one_group()
+                statistics["group_time"] += t.time() - visit_start_time
+                statistics["group_options_evaluated"] += (
+                    self.num_group_options_evaluated - num_group_options_evaluated_before
+                )
                 if testing:
                     if error_report := self.check_solution():
                         error_report["iteration"] = current_iteration
@@ -252,7 +643,12 @@ class VariableNeighborhoodSearch:
                 if demonstrating:
                     print("The objective value after shaking is:", self.objective_value)
 
+            vnd_start_time = t.time()
+            num_moves_evaluated_before = self.num_moves_evaluated
             self._variable_neighborhood_descent(num_to_move, across_projects)
+            statistics["vnd_time"] += t.time() - vnd_start_time
+            statistics["time"] += t.time() - visit_start_time
+            statistics["moves_evaluated"] += self.num_moves_evaluated - num_moves_evaluated_before
             if testing:
                 if error_report := self.check_solution():
                     error_report["iteration"] = current_iteration
@@ -285,8 +681,11 @@ class VariableNeighborhoodSearch:
                     current_neighborhood += 1
 
             self.move_reversals = []
-            for project in self.projects:
-                project.groups = [group for group in project.groups if group.students]
+            self._remove_empty_groups()
+
+            if checkpoint_path is not None and t.time() - last_checkpoint_time >= checkpoint_interval:
+                self._save_checkpoint(checkpoint_path, current_iteration, current_neighborhood, best_solutions)
+                last_checkpoint_time = t.time()
 
             if benchmarking and t.time() - self.time_data_loaded > time_limit:
                 break
@@ -307,6 +706,111 @@ class VariableNeighborhoodSearch:
         error_objective_value = self._check_objective_value()
         return errors_validity | error_objective_value
 
+    def export_assignment(self) -> list[list[list[int]]]:
+        """Returns the incumbent assignment of students to groups.
+
+        The index position of the outer list is the project ID. Every
+        project holds the IDs of the students in each of its non-empty
+        groups. Students in none of them are unassigned.
+        """
+        return [
+            [[student.student_id for student in group.students] for group in project.groups if group.size()]
+            for project in self.projects
+        ]
+
+    def import_assignment(self, assignment: list[list[list[int]]]):
+        """Replaces the incumbent solution with an assignment of students to groups.
+
+        The imported solution also becomes the best solution found so far.
+
+        Args:
+            assignment: An assignment as returned by export_assignment of
+                a solver on the same instance.
+
+        Raises:
+            ValueError: The assignment does not have one entry per project.
+            ValueError: A student is assigned more than once.
+            ValueError: A project has more groups than it may have at most.
+        """
+        if len(assignment) != len(self.projects):
+            raise ValueError("The assignment must have one entry per project!")
+        assigned_ids = [student_id for groups in assignment for group in groups for student_id in group]
+        if len(assigned_ids) != len(set(assigned_ids)):
+            raise ValueError("A student is assigned more than once!")
+        for project, groups in zip(self.projects, assignment):
+            if len(groups) > max(project.max_num_groups, project.offered_num_groups):
+                raise ValueError(f"Project {project.name} has too many groups!")
+
+        for project in self.projects:
+            for group in project.groups:
+                for student in list(group.students):
+                    self._release_student(group, student)
+                self.state.close_slot(group)
+            project.groups = []
+        for project, groups in zip(self.projects, assignment):
+            for group_ids in groups:
+                project.add_initial_group([self.students[student_id] for student_id in group_ids])
+                self.state.open_slot(project.groups[-1])
+        assigned_ids = set(assigned_ids)
+        self.unassigned_students = [student for student in self.students if student.student_id not in assigned_ids]
+        self.destinations, self.student_locations = self._locations_from_groups()
+        self.move_reversals = []
+        self.objective_value = self.current_objective_value()
+        self.best_objective_value = self.objective_value
+
+    def _save_checkpoint(
+        self, checkpoint_path: Path, current_iteration: int, current_neighborhood: int, best_solutions: list[dict]
+    ):
+        version, internal_state, gauss_next = self.rng.getstate()
+        checkpoint = {
+            "instance": self._instance_fingerprint(),
+            "assignment": self.export_assignment(),
+            "best_objective_value": self.best_objective_value,
+            "iteration": current_iteration,
+            "neighborhood": current_neighborhood,
+            "rng_state": [version, list(internal_state), gauss_next],
+            "elapsed_time": t.time() - self.time_data_loaded,
+            "best_solutions": best_solutions,
+        }
+        temporary_path = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+        temporary_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+        os.replace(temporary_path, checkpoint_path)
+
+    def _load_checkpoint(self, checkpoint_path: Path) -> tuple[int, int, list[dict]]:
+        checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        if checkpoint.get("instance") != self._instance_fingerprint():
+            raise ValueError(f"{checkpoint_path} does not belong to this instance!")
+        self.import_assignment(checkpoint["assignment"])
+        if self.best_objective_value != checkpoint["best_objective_value"]:
+            raise ValueError(f"{checkpoint_path} does not belong to this instance!")
+        version, internal_state, gauss_next = checkpoint["rng_state"]
+        self.rng.setstate((version, tuple(internal_state), gauss_next))
+        self.time_data_loaded = t.time() - checkpoint["elapsed_time"]
+        return checkpoint["iteration"], checkpoint["neighborhood"], checkpoint["best_solutions"]
+
+    def _instance_fingerprint(self) -> dict:
+        instance = [
+            [self.reward_bilateral_interest_collaboration, self.penalty_student_not_assigned],
+            [
+                [
+                    project.offered_num_groups,
+                    project.max_num_groups,
+                    project.ideal_group_size,
+                    project.min_group_size,
+                    project.max_group_size,
+                    project.penalty_extra_group,
+                    project.penalty_deviation_from_ideal_group_size,
+                ]
+                for project in self.projects
+            ],
+            [[list(student.fav_partners), list(student.projects_prefs)] for student in self.students],
+        ]
+        return {
+            "num_projects": len(self.projects),
+            "num_students": self.num_students,
+            "sha256": hashlib.sha256(json.dumps(instance).encode()).hexdigest(),
+        }
+
     def _check_validity(self):
         errors_validity = {}
         groups_too_small = [
@@ -314,7 +818,7 @@ class VariableNeighborhoodSearch:
             f"has {group.size()} students. The minimum is {project.min_group_size}"
             for project in self.projects
             for group in project.groups
-            if group.students and group.size() < project.min_group_size
+            if 0 < group.size() < project.min_group_size
         ]
         if groups_too_small:
             errors_validity["groups_too_small"] = groups_too_small
@@ -340,18 +844,57 @@ class VariableNeighborhoodSearch:
             + self.unassigned_students,
             key=lambda student: student.student_id,
         )
-        if not all(a is b for a, b in zip(self.students, students_anywhere)):
+        if not all(a is b for a, b in zip(self.students, students_anywhere)) or not self._state_consistent():
             errors_validity["inconsistency_students"] = True
         return errors_validity
 
+    def _state_consistent(self) -> bool:
+        groups_consistent = all(
+            self.state.slot_groups[group.slot] is group
+            and self.state.slot_members[group.slot] == {student.student_id for student in group.students}
+            and self.state.slot_sizes[group.slot] == group.size()
+            for project in self.projects
+            for group in project.groups
+        )
+        expected_bilateral_counts = [[0] * len(self.state.slot_sizes) for _ in range(self.num_students)]
+        for student_id, slot in enumerate(self.state.student_slots):
+            if slot != UNASSIGNED:
+                for partner_id in self.bilateral_partners[student_id]:
+                    expected_bilateral_counts[partner_id][slot] += 1
+        bilateral_counts_consistent = expected_bilateral_counts == self.state.bilateral_counts
+        expected_destinations, expected_student_locations = self._locations_from_groups()
+        locations_consistent = all(
+            location is expected_location or location == expected_location
+            for location, expected_location in zip(
+                self.destinations + self.student_locations, expected_destinations + expected_student_locations
+            )
+        ) and len(self.destinations) == len(expected_destinations)
+        unassigned_consistent = all(
+            self.state.student_slots[student.student_id] == UNASSIGNED for student in self.unassigned_students
+        )
+        return (
+            groups_consistent
+            and bilateral_counts_consistent
+            and locations_consistent
+            and unassigned_consistent
+            and self.state.num_unassigned() == len(self.unassigned_students)
+        )
+
     def _check_objective_value(self):
         if self.objective_value != (actual_objective_value := self.current_objective_value()):
             return {"claimed_obj": self.objective_value, "actual_obj": actual_objective_value}
         return {}
 
     def _found_or_dissolve_one_group(self):
-        founding_options_moves_and_deltas = self._get_founding_options()
-        dissolution_options_moves_and_deltas = self._get_dissolution_options()
+        if self.group_evaluation_budget is None and self.group_evaluation_time_limit is None:
+            founding_options_moves_and_deltas = self._get_founding_options()
+            dissolution_options_moves_and_deltas = self._get_dissolution_options(
+                max((delta for _, delta in founding_options_moves_and_deltas), default=None)
+            )
+        else:
+            founding_options_moves_and_deltas, dissolution_options_moves_and_deltas = (
+                self._get_sampled_founding_and_dissolution_options()
+            )
         all_options_moves_and_deltas = founding_options_moves_and_deltas + dissolution_options_moves_and_deltas
         max_delta = max(all_options_moves_and_deltas, key=lambda moves_and_delta: moves_and_delta[-1])[-1]
         max_delta_options_moves = [
@@ -359,15 +902,65 @@ class VariableNeighborhoodSearch:
             for option_moves_and_delta in all_options_moves_and_deltas
             if option_moves_and_delta[-1] == max_delta
         ]
-        moves = rd.choice(max_delta_options_moves)
+        moves = self.rng.choice(max_delta_options_moves)
         for move in moves:
             self._move_student(*move)
 
         self.move_reversals += [move[::-1] for move in moves]
         self.objective_value += max_delta
 
+    def _get_sampled_founding_and_dissolution_options(
+        self,
+    ) -> tuple[
+        list[
+            tuple[
+                list[
+                    tuple[
+                        tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                        tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                    ]
+                ],
+                int,
+            ]
+        ],
+        list[
+            tuple[
+                list[
+                    tuple[
+                        tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                        tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                    ]
+                ],
+                int,
+            ]
+        ],
+    ]:
+        num_founding_candidates = sum(project.num_groups() < project.max_num_groups for project in self.projects)
+        num_dissolution_candidates = len(self.destinations) - 1
+        budget = self.group_evaluation_budget
+        if self.group_evaluation_time_limit is None and budget >= num_founding_candidates + num_dissolution_candidates:
+            founding_options = self._get_founding_options()
+            return founding_options, self._get_dissolution_options(
+                max((delta for _, delta in founding_options), default=None)
+            )
+
+        deadline = None if self.group_evaluation_time_limit is None else t.time() + self.group_evaluation_time_limit
+        if budget is None:
+            founding_budget = dissolution_budget = None
+        else:
+            founding_budget = max(
+                1, budget * num_founding_candidates // max(1, num_founding_candidates + num_dissolution_candidates)
+            )
+            dissolution_budget = max(1, budget - min(founding_budget, num_founding_candidates))
+        founding_options = self._get_founding_options(founding_budget, deadline)
+        return founding_options, self._get_dissolution_options(
+            max((delta for _, delta in founding_options), default=None), dissolution_budget, deadline
+        )
+
     def _get_founding_options(
         self,
+        max_evaluations: int | None = None,
+        deadline: float | None = None,
     ) -> list[
         tuple[
             list[
@@ -379,57 +972,25 @@ class VariableNeighborhoodSearch:
             int,
         ]
     ]:
-        projects_applicable_for_group_founding = (
+        projects_applicable_for_group_founding = [
             project for project in self.projects if project.num_groups() < project.max_num_groups
-        )
+        ]
+        if max_evaluations is not None or deadline is not None:
+            projects_applicable_for_group_founding = self._sample_candidates(
+                projects_applicable_for_group_founding,
+                max_evaluations,
+                lambda: self._founding_scores(projects_applicable_for_group_founding),
+            )
         founding_options = []
 
         for project in projects_applicable_for_group_founding:
+            if founding_options and deadline is not None and t.time() > deadline:
+                break
+            self.num_group_options_evaluated += 1
             new_group, founding_delta = project.get_new_empty_group_and_initial_delta()
-            moves_made = []
-
-            while new_group.size() < project.max_group_size:
-                addition_options_departures = [
-                    (project, group, student)
-                    for project in self.projects
-                    for group in project.groups
-                    for student in group.students
-                    if group.size() > project.min_group_size and group is not new_group
-                ]
-                addition_options_departures += [
-                    (self.unassigned_students, student) for student in self.unassigned_students
-                ]
-                if not addition_options_departures:
-                    break
-                addition_options_leaving_deltas = (
-                    self._calculate_leaving_delta(addition_option) for addition_option in addition_options_departures
-                )
-                addition_options_arrivals = [
-                    (project, new_group, addition_option_departure[-1])
-                    for addition_option_departure in addition_options_departures
-                ]
-                addition_options_arrival_deltas = (
-                    self._calculate_arrival_delta(addition_option_arrival)
-                    for addition_option_arrival in addition_options_arrivals
-                )
-                addition_options_deltas = [
-                    leaving_delta + arrival_delta
-                    for leaving_delta, arrival_delta in zip(
-                        addition_options_leaving_deltas, addition_options_arrival_deltas
-                    )
-                ]
-                max_addition_delta = max(addition_options_deltas)
-                if max_addition_delta < 0 and new_group.size() >= project.min_group_size:
-                    break
-                max_addition_delta_moves = [
-                    addition_move
-                    for i, addition_move in enumerate(zip(addition_options_departures, addition_options_arrivals))
-                    if addition_options_deltas[i] == max_addition_delta
-                ]
-                addition_move = rd.choice(max_addition_delta_moves)
-                self._move_student(*addition_move)
-                founding_delta += max_addition_delta
-                moves_made.append(addition_move)
+            self.state.open_slot(new_group)
+            moves_made, addition_delta = self._fill_new_group(project, new_group)
+            founding_delta += addition_delta
 
             if new_group.size() >= project.min_group_size:
                 founding_options.append((moves_made, founding_delta))
@@ -438,7 +999,143 @@ class VariableNeighborhoodSearch:
 
         return founding_options
 
-    def _get_dissolution_options(self) -> list[
+    def _sample_candidates(
+        self, candidates: list, max_evaluations: int | None, scores: Callable[[], list[int]]
+    ) -> list:
+        if max_evaluations is None:
+            max_evaluations = len(candidates)
+        if self.group_sampling == "random":
+            return self.rng.sample(candidates, min(max_evaluations, len(candidates)))
+        candidate_scores = scores()
+        return [
+            candidates[index]
+            for index in sorted(range(len(candidates)), key=lambda index: -candidate_scores[index])[:max_evaluations]
+        ]
+
+    def _founding_scores(self, projects: list[Project]) -> list[int]:
+        # The gains of the students who would join a new group of ideal size if
+        # it did not change any arrival or leaving delta.
+        self.delta_cache.refresh()
+        destination_slots = np.array([group.slot for _, group in self.destinations[:-1]], dtype=np.int64)
+        source_indices, leaving_deltas = self._move_sources(destination_slots)
+        if len(destination_slots):
+            assigned = source_indices != len(destination_slots)
+            source_slots = destination_slots[np.where(assigned, source_indices, 0)]
+            slot_sizes = np.array(self.state.slot_sizes, dtype=np.int64)
+            can_join = ~assigned | (slot_sizes[source_slots] > self.state.slot_min_sizes[source_slots])
+        else:
+            # Without any group every student is unassigned and can join.
+            can_join = np.ones(self.num_students, dtype=bool)
+        scores = []
+        for project in projects:
+            gains = np.sort(self.state.preference_matrix[can_join, project.project_id] + leaving_deltas[can_join])
+            scores.append(int(gains[max(0, len(gains) - project.ideal_group_size) :].sum()))
+        return scores
+
+    def _fill_new_group(self, project: Project, new_group: ProjectGroup) -> tuple[
+        list[
+            tuple[
+                tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                tuple[Project, ProjectGroup, Student],
+            ]
+        ],
+        int,
+    ]:
+        departures = {
+            student.student_id: (other_project, group, student)
+            for other_project in self.projects
+            for group in other_project.groups
+            if group.size() > other_project.min_group_size and group is not new_group
+            for student in group.students
+        }
+        departures.update(
+            {student.student_id: (self.unassigned_students, student) for student in self.unassigned_students}
+        )
+        # Heap entries are (-gain, order, student ID, version). Popping the entries with
+        # the biggest gain yields them in the order the students were enumerated. An
+        # entry is outdated if its version is not the current version of the student.
+        orders = {student_id: order for order, student_id in enumerate(departures)}
+        versions = dict.fromkeys(departures, 0)
+        gains_heap = [
+            (-self._founding_gain(departure, new_group), orders[student_id], student_id, 0)
+            for student_id, departure in departures.items()
+        ]
+        heapq.heapify(gains_heap)
+        moves_made = []
+        addition_delta = 0
+
+        while new_group.size() < project.max_group_size:
+            while gains_heap and versions.get(gains_heap[0][2]) != gains_heap[0][3]:
+                heapq.heappop(gains_heap)
+            if not gains_heap:
+                break
+            negative_max_gain = gains_heap[0][0]
+            if new_group.size() < project.ideal_group_size:
+                max_addition_delta = project.penalty_deviation_from_ideal_group_size - negative_max_gain
+            else:
+                max_addition_delta = -project.penalty_deviation_from_ideal_group_size - negative_max_gain
+            if max_addition_delta < 0 and new_group.size() >= project.min_group_size:
+                break
+            max_gain_entries = []
+            while gains_heap and gains_heap[0][0] == negative_max_gain:
+                entry = heapq.heappop(gains_heap)
+                if versions.get(entry[2]) == entry[3]:
+                    max_gain_entries.append(entry)
+            chosen_entry = self.rng.choice(max_gain_entries)
+            for entry in max_gain_entries:
+                if entry is not chosen_entry:
+                    heapq.heappush(gains_heap, entry)
+
+            added_id = chosen_entry[2]
+            del versions[added_id]
+            departure = departures.pop(added_id)
+            addition_move = (departure, (project, new_group, departure[-1]))
+            self._move_student(*addition_move)
+            addition_delta += max_addition_delta
+            moves_made.append(addition_move)
+
+            changed_ids = set(self.bilateral_partners[added_id])
+            if departure[0] is not self.unassigned_students:
+                departure_project, departure_group, _ = departure
+                member_ids = [student.student_id for student in departure_group.students]
+                if departure_group.size() > departure_project.min_group_size:
+                    changed_ids.update(member_ids)
+                else:
+                    for member_id in member_ids:
+                        versions.pop(member_id, None)
+            for student_id in changed_ids:
+                if student_id in versions:
+                    versions[student_id] += 1
+                    heapq.heappush(
+                        gains_heap,
+                        (
+                            -self._founding_gain(departures[student_id], new_group),
+                            orders[student_id],
+                            student_id,
+                            versions[student_id],
+                        ),
+                    )
+
+        return moves_made, addition_delta
+
+    def _founding_gain(
+        self,
+        departure_specifications: tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+        new_group: ProjectGroup,
+    ) -> int:
+        student_id = departure_specifications[-1].student_id
+        return (
+            self._calculate_leaving_delta(departure_specifications)
+            + self.state.preferences[student_id][new_group.project_id]
+            + self.state.bilateral_counts[student_id][new_group.slot] * self.reward_bilateral_interest_collaboration
+        )
+
+    def _get_dissolution_options(
+        self,
+        delta_to_reach: int | None = None,
+        max_evaluations: int | None = None,
+        deadline: float | None = None,
+    ) -> list[
         tuple[
             list[
                 tuple[
@@ -449,85 +1146,196 @@ class VariableNeighborhoodSearch:
             int,
         ]
     ]:
-        dissolution_options = []
-        dissolution_candidates = (
-            (project, group) for project in self.projects for group in project.groups if group.students
-        )
+        dissolution_candidates = [
+            (project, group) for project in self.projects for group in project.groups if group.size()
+        ]
         destinations_with_free_capacity = [
             (project, group)
             for project in self.projects
             for group in project.groups
-            if group.students and group.size() < project.max_group_size
+            if 0 < group.size() < project.max_group_size
         ]
+        upper_bounds = self._dissolution_upper_bounds(dissolution_candidates, destinations_with_free_capacity)
+        candidates_heap = [(-upper_bound, order) for order, upper_bound in enumerate(upper_bounds)]
+        if max_evaluations is not None and self.group_sampling == "random":
+            candidates_heap = self.rng.sample(candidates_heap, min(max_evaluations, len(candidates_heap)))
+        heapq.heapify(candidates_heap)
+        dissolution_options = []
 
-        for project, group in dissolution_candidates:
-            project: Project
-            group: ProjectGroup
-            moves_made = []
-            dissolution_delta = self._initial_dissolution_delta(project, group)
-            arrivals_with_deltas = [
-                ((*destination, student), self._calculate_arrival_delta((*destination, student)))
-                for destination in destinations_with_free_capacity
-                for student in group.students
-                if not all(x is y for x, y in zip(destination, (project, group)))
-            ]
-            arrivals_with_deltas += [
-                ((self.unassigned_students, student), -self.penalty_student_not_assigned) for student in group.students
-            ]
-            while group.students:
-                max_delta = max(arrivals_with_deltas, key=lambda arrival_with_delta: arrival_with_delta[-1])[-1]
-                max_delta_arrivals = [
-                    arrival_with_delta[0]
-                    for arrival_with_delta in arrivals_with_deltas
-                    if arrival_with_delta[-1] == max_delta
-                ]
-                arrival = rd.choice(max_delta_arrivals)
-                move = ((project, group, (student_in_move := arrival[-1])), arrival)
-                self._move_student(*move)
-                dissolution_delta += max_delta
-                moves_made.append(move)
-                if arrival[0] is self.unassigned_students:
-                    arrivals_with_deltas = [
-                        arrival_with_delta
-                        for arrival_with_delta in arrivals_with_deltas
-                        if arrival_with_delta[0][-1] is not student_in_move
-                    ]
-                    continue
-                project_student_moved_to, group_student_moved_to, _ = arrival
-                if group_student_moved_to.size() >= project_student_moved_to.max_group_size:
-                    arrivals_with_deltas = [
-                        arrival_with_delta
-                        for arrival_with_delta in arrivals_with_deltas
-                        if (arrival_with_delta[0][-1] is not student_in_move)
-                        and (arrival_with_delta[0][1] is not group_student_moved_to)
-                    ]
-                    continue
-                arrivals_with_deltas = [
-                    (
-                        (arrival, self._calculate_arrival_delta(arrival))
-                        if (arrival := arrival_with_delta[0])[1] is group_student_moved_to
-                        else arrival_with_delta
-                    )
-                    for arrival_with_delta in (
-                        arrival_with_delta
-                        for arrival_with_delta in arrivals_with_deltas
-                        if arrival_with_delta[0][-1] is not student_in_move
-                    )
-                ]
-
+        # Candidates are evaluated in the order of their upper bounds. Once no upper
+        # bound reaches the biggest delta known, no remaining candidate can be among
+        # the options with the biggest delta.
+        while candidates_heap:
+            negative_upper_bound, order = heapq.heappop(candidates_heap)
+            if delta_to_reach is not None and -negative_upper_bound < delta_to_reach:
+                break
+            if dissolution_options and (
+                (max_evaluations is not None and len(dissolution_options) >= max_evaluations)
+                or (deadline is not None and t.time() > deadline)
+            ):
+                break
+            project, group = dissolution_candidates[order]
+            self.num_group_options_evaluated += 1
+            moves_made, dissolution_delta = self._dissolve_group(project, group, destinations_with_free_capacity)
             for move in moves_made:
                 self._move_student(*move[::-1])
-            dissolution_options.append((moves_made, dissolution_delta))
+            dissolution_options.append((order, moves_made, dissolution_delta))
+            if delta_to_reach is None or dissolution_delta > delta_to_reach:
+                delta_to_reach = dissolution_delta
 
-        return dissolution_options
+        return [(moves_made, dissolution_delta) for _, moves_made, dissolution_delta in sorted(dissolution_options)]
+
+    def _dissolution_upper_bounds(
+        self,
+        dissolution_candidates: list[tuple[Project, ProjectGroup]],
+        destinations_with_free_capacity: list[tuple[Project, ProjectGroup]],
+    ) -> list[int]:
+        # Arrival deltas can only shrink by the size term while a group is dissolved
+        # and only grow by the reward for partners who left the group beforehand.
+        self.delta_cache.refresh()
+        student_slots = np.array(self.state.student_slots, dtype=np.int64)
+        source_slots = np.where(student_slots == UNASSIGNED, 0, student_slots)
+        best_arrival_deltas = np.full(self.num_students, INFEASIBLE_DELTA, dtype=np.int64)
+        if destinations_with_free_capacity:
+            free_slots = np.array([group.slot for _, group in destinations_with_free_capacity], dtype=np.int64)
+            arrival_deltas = self.delta_cache.arrival_deltas[free_slots]
+            student_ids = np.arange(self.num_students)
+            best_indices = np.argmax(arrival_deltas, axis=0)
+            best_arrival_deltas = arrival_deltas[best_indices, student_ids]
+            if len(free_slots) > 1:
+                arrival_deltas = arrival_deltas.copy()
+                arrival_deltas[best_indices, student_ids] = INFEASIBLE_DELTA
+                second_best_arrival_deltas = arrival_deltas.max(axis=0)
+            else:
+                second_best_arrival_deltas = np.full(self.num_students, INFEASIBLE_DELTA, dtype=np.int64)
+            best_arrival_deltas = np.where(
+                free_slots[best_indices] == source_slots, second_best_arrival_deltas, best_arrival_deltas
+            )
+        partners_in_group = self.delta_cache.bilateral_counts[source_slots, np.arange(self.num_students)]
+        member_upper_bounds = np.where(
+            best_arrival_deltas == INFEASIBLE_DELTA,
+            -self.penalty_student_not_assigned,
+            np.maximum(
+                best_arrival_deltas + partners_in_group * self.reward_bilateral_interest_collaboration,
+                -self.penalty_student_not_assigned,
+            ),
+        ).tolist()
+        return [
+            self._initial_dissolution_delta(project, group)
+            + sum(member_upper_bounds[student_id] for student_id in self.state.slot_members[group.slot])
+            for project, group in dissolution_candidates
+        ]
+
+    def _dissolve_group(
+        self,
+        project: Project,
+        group: ProjectGroup,
+        destinations_with_free_capacity: list[tuple[Project, ProjectGroup]],
+    ) -> tuple[
+        list[
+            tuple[
+                tuple[Project, ProjectGroup, Student],
+                tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+            ]
+        ],
+        int,
+    ]:
+        members = list(group.students)
+        destinations = [destination for destination in destinations_with_free_capacity if destination[1] is not group]
+        num_members = len(members)
+        # Heap entries are (-delta, order, destination index, version of the destination,
+        # member position). The order is the position of the arrival in the list of all
+        # arrivals by destination and then member, with unassignments at the end. An
+        # entry is outdated once the destination changed or the member left.
+        arrivals_heap = [
+            (
+                -self._calculate_arrival_delta((*destination, student)),
+                destination_index * num_members + position,
+                destination_index,
+                destination[1].version,
+                position,
+            )
+            for destination_index, destination in enumerate(destinations)
+            for position, student in enumerate(members)
+        ]
+        arrivals_heap += [
+            (
+                self.penalty_student_not_assigned,
+                len(destinations) * num_members + position,
+                len(destinations),
+                0,
+                position,
+            )
+            for position in range(num_members)
+        ]
+        heapq.heapify(arrivals_heap)
+        remaining_positions = set(range(num_members))
+
+        def is_current(entry: tuple[int, int, int, int, int]) -> bool:
+            _, _, destination_index, version, position = entry
+            if position not in remaining_positions:
+                return False
+            if destination_index == len(destinations):
+                return True
+            destination_project, destination_group = destinations[destination_index]
+            return (
+                destination_group.version == version and destination_group.size() < destination_project.max_group_size
+            )
+
+        moves_made = []
+        dissolution_delta = self._initial_dissolution_delta(project, group)
+        while remaining_positions:
+            while not is_current(arrivals_heap[0]):
+                heapq.heappop(arrivals_heap)
+            negative_max_delta = arrivals_heap[0][0]
+            max_delta_entries = []
+            while arrivals_heap and arrivals_heap[0][0] == negative_max_delta:
+                if is_current(entry := heapq.heappop(arrivals_heap)):
+                    max_delta_entries.append(entry)
+            chosen_entry = self.rng.choice(max_delta_entries)
+            for entry in max_delta_entries:
+                if entry is not chosen_entry:
+                    heapq.heappush(arrivals_heap, entry)
+
+            _, _, destination_index, _, position = chosen_entry
+            student_in_move = members[position]
+            if destination_index == len(destinations):
+                arrival = (self.unassigned_students, student_in_move)
+            else:
+                arrival = (*destinations[destination_index], student_in_move)
+            move = ((project, group, student_in_move), arrival)
+            self._move_student(*move)
+            remaining_positions.remove(position)
+            dissolution_delta -= negative_max_delta
+            moves_made.append(move)
+
+            if destination_index == len(destinations):
+                continue
+            destination_project, destination_group = destinations[destination_index]
+            if destination_group.size() >= destination_project.max_group_size:
+                continue
+            for remaining_position in remaining_positions:
+                heapq.heappush(
+                    arrivals_heap,
+                    (
+                        -self._calculate_arrival_delta(
+                            (destination_project, destination_group, members[remaining_position])
+                        ),
+                        destination_index * num_members + remaining_position,
+                        destination_index,
+                        destination_group.version,
+                        remaining_position,
+                    ),
+                )
+
+        return moves_made, dissolution_delta
 
     def _initial_dissolution_delta(self, project: Project, group: ProjectGroup) -> int:
         preference_loss = sum(student.preference_value(project) for student in group.students)
-        bilateral_reward_loss = sum(
-            self.reward_bilateral_interest_collaboration
-            for id_pair in it.combinations(sorted([student.student_id for student in group.students]), 2)
-            if id_pair in self.bilateral_pairs
-        )
+        bilateral_counts = self.state.bilateral_counts
+        bilateral_reward_loss = (
+            sum(bilateral_counts[student_id][group.slot] for student_id in self.state.slot_members[group.slot]) // 2
+        ) * self.reward_bilateral_interest_collaboration
         reward_one_less_group = (
             project.penalty_extra_group if project.num_non_empty_groups() > project.offered_num_groups else 0
         )
@@ -557,60 +1365,497 @@ class VariableNeighborhoodSearch:
         self.objective_value += sum_departure_deltas + sum_arrival_deltas
 
     def _variable_neighborhood_descent(self, max_to_move: int, across_projects: bool, min_to_move: int = 1):
-        destinations = [(project, group) for project in self.projects for group in project.groups if group.students]
-        destinations.append(self.unassigned_students)
-
-        if max_to_move > (highest_saved_dimension := max(self.combinations_student_ids_by_dimension.keys())):
-            for num_in_combination in range(highest_saved_dimension + 1, max_to_move + 1):
-                self.combinations_student_ids_by_dimension[num_in_combination] = list(
-                    it.combinations(range(self.num_students), num_in_combination)
-                )
-
-        ordered_n_tuples_destinations_by_dimension = {
-            n: list(it.product(destinations, repeat=n)) for n in range(min_to_move, max_to_move + 1)
-        }
-
-        locations_students_by_id = {
-            student.student_id: (project, group)
-            for project in self.projects
-            for group in project.groups
-            for student in group.students
-        }
-        for student in self.unassigned_students:
-            locations_students_by_id[student.student_id] = self.unassigned_students
+        ordered_n_tuples_destinations_by_dimension = {}
 
         num_to_move = min_to_move
         while num_to_move <= max_to_move:
-            best_moves_local, delta = self._local_search_best_improvement(
-                ordered_n_tuples_destinations_by_dimension[num_to_move],
-                locations_students_by_id,
-                across_projects,
-                num_to_move,
-            )
+            candidates = self._local_search_candidates() if self.candidate_list else None
+            if num_to_move == 1:
+                best_moves_local, delta = self._local_search_single_moves(
+                    self.destinations, across_projects, candidates
+                )
+            elif num_to_move == 2:
+                best_moves_local, delta = self._local_search_pair_moves(self.destinations, across_projects, candidates)
+            else:
+                if num_to_move not in ordered_n_tuples_destinations_by_dimension:
+                    ordered_n_tuples_destinations_by_dimension[num_to_move] = list(
+                        it.product(self.destinations, repeat=num_to_move)
+                    )
+                best_moves_local, delta = self._local_search_best_improvement(
+                    ordered_n_tuples_destinations_by_dimension[num_to_move],
+                    self.student_locations,
+                    across_projects,
+                    num_to_move,
+                    candidates,
+                )
             if delta > 0:
                 self.objective_value += delta
                 for departure, arrival in best_moves_local:
                     self._move_student(departure, arrival)
-
-                    if arrival[0] is not self.unassigned_students:
-                        project, group, student = arrival
-                        locations_students_by_id[student.student_id] = (project, group)
-
-                    else:
-                        student = arrival[-1]
-                        locations_students_by_id[student.student_id] = self.unassigned_students
                 self.move_reversals += [move[::-1] for move in best_moves_local]
                 num_to_move = min_to_move
 
             else:
                 num_to_move += 1
 
+    def _local_search_candidates(self) -> np.ndarray:
+        student_slots = np.array(self.state.student_slots, dtype=np.int64)
+        changed_slots = [location[1].slot for move in self.move_reversals for location in move if len(location) == 3]
+        candidates = np.isin(student_slots, changed_slots) | (student_slots == UNASSIGNED)
+        first_ids, second_ids = self.bilateral_pair_ids
+        apart = (student_slots[first_ids] != student_slots[second_ids]) | (student_slots[first_ids] == UNASSIGNED)
+        candidates[first_ids[apart]] = True
+        candidates[second_ids[apart]] = True
+        return candidates
+
+    def _local_search_single_moves(
+        self,
+        destinations: list[tuple[Project, ProjectGroup] | list[Student]],
+        across_projects: bool,
+        candidates: np.ndarray | None = None,
+    ) -> (
+        tuple[
+            list[
+                tuple[
+                    tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                    tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                ]
+            ],
+            int,
+        ]
+        | tuple[None, 0]
+    ):
+        if len(destinations) == 1:
+            return None, 0
+        self.delta_cache.refresh()
+        destination_slots = np.array([group.slot for _, group in destinations[:-1]], dtype=np.int64)
+        source_indices, leaving_deltas = self._move_sources(destination_slots)
+        best_deltas, best_destination_indices = self._rank_single_moves(
+            destinations, destination_slots, source_indices, leaving_deltas, across_projects
+        )
+        if candidates is not None:
+            best_deltas = np.where(candidates, best_deltas, INFEASIBLE_DELTA)
+        student_id = int(np.argmax(best_deltas > 0 if self.first_improvement else best_deltas))
+        if (best_delta := int(best_deltas[student_id])) <= 0:
+            return None, 0
+        destination_index = int(best_destination_indices[student_id])
+        if self.first_improvement:
+            deltas = self._single_move_deltas(
+                np.array([student_id]),
+                np.arange(len(destinations)),
+                destination_slots,
+                source_indices,
+                leaving_deltas,
+                across_projects,
+            )[0]
+            destination_index = int(np.argmax(deltas > 0))
+            best_delta = int(deltas[destination_index])
+
+        student = self.students[student_id]
+        departure = self._location_specifications(destinations[source_indices[student_id]], student)
+        arrival = self._location_specifications(destinations[destination_index], student)
+        return [(departure, arrival)], best_delta
+
+    def _rank_single_moves(
+        self,
+        destinations: list[tuple[Project, ProjectGroup] | list[Student]],
+        destination_slots: np.ndarray,
+        source_indices: np.ndarray,
+        leaving_deltas: np.ndarray,
+        across_projects: bool,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        num_groups = len(destinations) - 1
+        all_student_ids = np.arange(self.num_students)
+        stamps = [(group, group.version) for _, group in destinations[:-1]]
+        ranking = self.single_move_rankings.get(across_projects)
+
+        if (
+            ranking is None
+            or len(ranking["stamps"]) != num_groups
+            or any(old_group is not group for (old_group, _), (group, _) in zip(ranking["stamps"], stamps))
+        ):
+            deltas = self._single_move_deltas(
+                all_student_ids,
+                np.arange(num_groups + 1),
+                destination_slots,
+                source_indices,
+                leaving_deltas,
+                across_projects,
+            )
+            best_destination_indices = np.argmax(deltas, axis=1)
+            best_deltas = deltas[all_student_ids, best_destination_indices]
+        else:
+            best_deltas, best_destination_indices = ranking["best_deltas"], ranking["best_destination_indices"]
+            changed_indices = np.array(
+                [
+                    index
+                    for index, ((_, old_version), (_, version)) in enumerate(zip(ranking["stamps"], stamps))
+                    if old_version != version
+                ],
+                dtype=np.int64,
+            )
+            # Students whose group changed or whose best move went to a changed group
+            # are ranked anew, all others only have to be compared with the changed groups.
+            outdated = (
+                (source_indices != ranking["source_indices"])
+                | np.isin(source_indices, changed_indices)
+                | np.isin(best_destination_indices, changed_indices)
+            )
+            if len(outdated_ids := np.flatnonzero(outdated)):
+                deltas = self._single_move_deltas(
+                    outdated_ids,
+                    np.arange(num_groups + 1),
+                    destination_slots,
+                    source_indices,
+                    leaving_deltas,
+                    across_projects,
+                )
+                best_destination_indices[outdated_ids] = np.argmax(deltas, axis=1)
+                best_deltas[outdated_ids] = deltas[
+                    np.arange(len(outdated_ids)), best_destination_indices[outdated_ids]
+                ]
+            if len(changed_indices) and len(current_ids := np.flatnonzero(~outdated)):
+                deltas = self._single_move_deltas(
+                    current_ids, changed_indices, destination_slots, source_indices, leaving_deltas, across_projects
+                )
+                columns = np.argmax(deltas, axis=1)
+                candidate_deltas = deltas[np.arange(len(current_ids)), columns]
+                candidate_indices = changed_indices[columns]
+                better = (candidate_deltas > best_deltas[current_ids]) | (
+                    (candidate_deltas == best_deltas[current_ids])
+                    & (candidate_indices < best_destination_indices[current_ids])
+                )
+                best_deltas[current_ids[better]] = candidate_deltas[better]
+                best_destination_indices[current_ids[better]] = candidate_indices[better]
+
+        self.single_move_rankings[across_projects] = {
+            "stamps": stamps,
+            "source_indices": source_indices,
+            "best_deltas": best_deltas,
+            "best_destination_indices": best_destination_indices,
+        }
+        return best_deltas, best_destination_indices
+
+    def _single_move_deltas(
+        self,
+        student_ids: np.ndarray,
+        destination_indices: np.ndarray,
+        destination_slots: np.ndarray,
+        source_indices: np.ndarray,
+        leaving_deltas: np.ndarray,
+        across_projects: bool,
+    ) -> np.ndarray:
+        state = self.state
+        num_groups = len(destination_slots)
+        slot_sizes = np.array(state.slot_sizes, dtype=np.int64)
+        into_group = destination_indices != num_groups
+        slots = destination_slots[np.where(into_group, destination_indices, 0)]
+        student_source_indices = source_indices[student_ids]
+        unassigned = student_source_indices == num_groups
+        source_slots = destination_slots[np.where(unassigned, 0, student_source_indices)]
+
+        feasible = destination_indices[None, :] != student_source_indices[:, None]
+        feasible &= (~into_group | (slot_sizes[slots] < state.slot_max_sizes[slots]))[None, :]
+        feasible &= (unassigned | (slot_sizes[source_slots] > state.slot_min_sizes[source_slots]))[:, None]
+        if not across_projects:
+            feasible &= (
+                ~into_group[None, :]
+                | unassigned[:, None]
+                | (state.slot_project_ids[slots][None, :] == state.slot_project_ids[source_slots][:, None])
+            )
+        arrival_deltas = np.where(
+            into_group[None, :],
+            self.delta_cache.arrival_deltas[np.ix_(slots, student_ids)].T,
+            -self.penalty_student_not_assigned,
+        )
+        self.num_moves_evaluated += len(student_ids) * len(destination_indices)
+        return np.where(feasible, leaving_deltas[student_ids][:, None] + arrival_deltas, INFEASIBLE_DELTA)
+
+    def _local_search_pair_moves(
+        self,
+        destinations: list[tuple[Project, ProjectGroup] | list[Student]],
+        across_projects: bool,
+        candidates: np.ndarray | None = None,
+    ) -> (
+        tuple[
+            list[
+                tuple[
+                    tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                    tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student],
+                ]
+            ],
+            int,
+        ]
+        | tuple[None, 0]
+    ):
+        if len(destinations) == 1:
+            return None, 0
+        source_indices, destination_slots, destination_sizes, leaving_deltas, arrival_deltas, allowed = (
+            self._move_delta_tables(destinations, across_projects)
+        )
+        state = self.state
+        reward = self.reward_bilateral_interest_collaboration
+        num_groups = len(destinations) - 1
+        group_indices = np.arange(num_groups)
+        min_sizes = state.slot_min_sizes[destination_slots]
+        ideal_sizes = state.slot_ideal_sizes[destination_slots]
+        size_penalties = state.slot_size_penalties[destination_slots]
+
+        # Changes of the size terms of arrival and leaving deltas if the other
+        # student of the pair has left or joined the group beforehand.
+        arrival_size_terms = np.where(destination_sizes < ideal_sizes, size_penalties, -size_penalties)
+        arrival_correction_one_less = (
+            np.where(destination_sizes - 1 < ideal_sizes, size_penalties, -size_penalties) - arrival_size_terms
+        )
+        arrival_correction_one_more = (
+            np.where(destination_sizes + 1 < ideal_sizes, size_penalties, -size_penalties) - arrival_size_terms
+        )
+        leaving_correction_one_less = np.where(
+            destination_sizes - 1 > ideal_sizes, size_penalties, -size_penalties
+        ) - np.where(destination_sizes > ideal_sizes, size_penalties, -size_penalties)
+        has_capacity = np.append(destination_sizes < state.slot_max_sizes[destination_slots], True)
+        has_capacity_for_two = destination_sizes + 1 < state.slot_max_sizes[destination_slots]
+        can_lose_one = destination_sizes - 1 >= min_sizes
+        can_lose_two = destination_sizes - 2 >= min_sizes
+        at_min_size = destination_sizes == min_sizes
+
+        best_move_combination = None
+        best_delta = 0
+        is_partner = np.zeros(self.num_students, dtype=np.int64)
+        chunk_size = max(1, PAIR_MOVES_BLOCK_SIZE // (num_groups + 1) ** 2)
+
+        for first_id, all_second_ids in self._pairs_by_first_student():
+            if self.first_improvement and best_move_combination is not None:
+                break
+            if candidates is not None and not candidates[first_id]:
+                all_second_ids = all_second_ids[candidates[all_second_ids]]
+            first_index = int(source_indices[first_id])
+            first_assigned = first_index != num_groups
+            is_partner[:] = 0
+            is_partner[list(self.bilateral_partners[first_id])] = 1
+
+            for chunk_start in range(0, len(all_second_ids), chunk_size):
+                second_ids = all_second_ids[chunk_start : chunk_start + chunk_size]
+                bilateral = is_partner[second_ids]
+                second_indices = source_indices[second_ids]
+                second_assigned = second_indices != num_groups
+                same_source = second_assigned & (second_indices == first_index)
+
+                deltas = (
+                    (leaving_deltas[first_id] + leaving_deltas[second_ids])[:, None, None]
+                    + arrival_deltas[first_id][None, :, None]
+                    + arrival_deltas[second_ids][:, None, :]
+                )
+                feasible = allowed[first_id][None, :, None] & allowed[second_ids][:, None, :]
+                second_has_capacity = has_capacity.copy()
+
+                if first_assigned:
+                    deltas += np.where(same_source, reward * bilateral + leaving_correction_one_less[first_index], 0)[
+                        :, None, None
+                    ]
+                    deltas[:, :, first_index] += (arrival_correction_one_less[first_index] - reward * bilateral)[
+                        :, None
+                    ]
+                    second_has_capacity[first_index] = True
+                    if not can_lose_two[first_index]:
+                        feasible[same_source] = False
+                    if not can_lose_one[first_index]:
+                        if at_min_size[first_index]:
+                            feasible[~same_source, :, :first_index] = False
+                            feasible[~same_source, :, first_index + 1 :] = False
+                        else:
+                            feasible[~same_source] = False
+
+                rows = np.flatnonzero(second_assigned)
+                columns = second_indices[rows]
+                deltas[rows, columns, :] += (arrival_correction_one_less[columns] - reward * bilateral[rows])[:, None]
+                first_has_capacity = np.tile(has_capacity, (len(second_ids), 1))
+                first_has_capacity[rows, columns] = True
+                feasible &= first_has_capacity[:, :, None] & second_has_capacity[None, None, :]
+
+                rows_apart = rows[~same_source[rows]]
+                columns_apart = second_indices[rows_apart]
+                rows_apart_at_min = ~can_lose_one[columns_apart]
+                feasible[rows_apart[rows_apart_at_min & ~at_min_size[columns_apart]]] = False
+                rows_must_swap = rows_apart_at_min & at_min_size[columns_apart]
+                feasible[rows_apart[rows_must_swap]] &= (
+                    np.arange(num_groups + 1)[None, :] == columns_apart[rows_must_swap][:, None]
+                )[:, :, None]
+
+                deltas[:, group_indices, group_indices] += (
+                    reward * bilateral[:, None] + arrival_correction_one_more[None, :]
+                )
+                feasible[:, group_indices, group_indices] &= has_capacity_for_two[None, :]
+
+                deltas = np.where(feasible, deltas, INFEASIBLE_DELTA)
+                self.num_moves_evaluated += deltas.size
+                block_index = int(np.argmax(deltas > 0 if self.first_improvement else deltas))
+                if (block_delta := int(deltas.flat[block_index])) > best_delta:
+                    best_delta = block_delta
+                    row, first_destination_index, second_destination_index = np.unravel_index(
+                        block_index, deltas.shape
+                    )
+                    best_move_combination = (
+                        first_id,
+                        int(second_ids[row]),
+                        int(first_destination_index),
+                        int(second_destination_index),
+                    )
+                    if self.first_improvement:
+                        break
+
+        if best_move_combination is None:
+            return None, 0
+        first_id, second_id, first_destination_index, second_destination_index = best_move_combination
+        first_student, second_student = self.students[first_id], self.students[second_id]
+        return [
+            (
+                self._location_specifications(destinations[source_indices[first_id]], first_student),
+                self._location_specifications(destinations[first_destination_index], first_student),
+            ),
+            (
+                self._location_specifications(destinations[source_indices[second_id]], second_student),
+                self._location_specifications(destinations[second_destination_index], second_student),
+            ),
+        ], best_delta
+
+    def _pairs_by_first_student(self) -> Iterator[tuple[int, np.ndarray]]:
+        if self.max_combinations_per_pass is None or math.comb(self.num_students, 2) <= self.max_combinations_per_pass:
+            for first_id in range(self.num_students - 1):
+                yield first_id, np.arange(first_id + 1, self.num_students)
+            return
+        first_ids, second_ids = self._unrank_pairs(np.array(self._sampled_ranks(2), dtype=np.int64))
+        boundaries = np.flatnonzero(np.diff(first_ids)) + 1
+        for first_ids_here, second_ids_here in zip(np.split(first_ids, boundaries), np.split(second_ids, boundaries)):
+            yield int(first_ids_here[0]), second_ids_here
+
+    def _student_combinations(self, num_in_combination: int) -> Iterator[tuple[int, ...]]:
+        if (
+            self.max_combinations_per_pass is None
+            or math.comb(self.num_students, num_in_combination) <= self.max_combinations_per_pass
+        ):
+            yield from it.combinations(range(self.num_students), num_in_combination)
+            return
+        for rank in self._sampled_ranks(num_in_combination):
+            yield self._unrank_combination(rank, num_in_combination)
+
+    def _sampled_ranks(self, num_in_combination: int) -> list[int]:
+        num_combinations = math.comb(self.num_students, num_in_combination)
+        return sorted(self.rng.sample(range(num_combinations), self.max_combinations_per_pass))
+
+    def _unrank_pairs(self, ranks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # The pairs starting with a student ID smaller than i number
+        # i * (2n - i - 1) / 2, which is inverted in closed form. Rounding
+        # errors of the square root are off by at most one and corrected.
+        n = self.num_students
+
+        def num_pairs_before(first_ids: np.ndarray) -> np.ndarray:
+            return first_ids * (2 * n - first_ids - 1) // 2
+
+        first_ids = ((2 * n - 1 - np.sqrt((2 * n - 1) ** 2 - 8 * ranks.astype(np.float64))) // 2).astype(np.int64)
+        first_ids += num_pairs_before(first_ids + 1) <= ranks
+        first_ids -= num_pairs_before(first_ids) > ranks
+        return first_ids, ranks - num_pairs_before(first_ids) + first_ids + 1
+
+    def _unrank_combination(self, rank: int, num_in_combination: int) -> tuple[int, ...]:
+        # The first student ID of every position is found by bisection on the
+        # number of combinations starting with a smaller ID, so unranking takes
+        # O(num_in_combination * log(num_students)) binomial coefficients.
+        combination = []
+        smallest_id = 0
+        for remaining in range(num_in_combination, 0, -1):
+            num_combinations_left = math.comb(self.num_students - smallest_id, remaining)
+            candidate_ids = range(smallest_id, self.num_students - remaining + 1)
+            student_id = (
+                smallest_id
+                - 1
+                + bisect.bisect_right(
+                    candidate_ids,
+                    rank,
+                    key=lambda candidate_id: num_combinations_left
+                    - math.comb(self.num_students - candidate_id, remaining),
+                )
+            )
+            rank -= num_combinations_left - math.comb(self.num_students - student_id, remaining)
+            combination.append(student_id)
+            smallest_id = student_id + 1
+        return tuple(combination)
+
+    def _move_delta_tables(
+        self,
+        destinations: list[tuple[Project, ProjectGroup] | list[Student]],
+        across_projects: bool,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        state = self.state
+        num_groups = len(destinations) - 1
+        self.delta_cache.refresh()
+        destination_slots = np.array([group.slot for _, group in destinations[:-1]], dtype=np.int64)
+        source_indices, leaving_deltas = self._move_sources(destination_slots)
+        assigned = source_indices != num_groups
+        source_slots = destination_slots[np.where(assigned, source_indices, 0)]
+        slot_sizes = np.array(state.slot_sizes, dtype=np.int64)
+        arrival_deltas = np.column_stack(
+            (
+                self.delta_cache.arrival_deltas[destination_slots].T,
+                np.full(self.num_students, -self.penalty_student_not_assigned, dtype=np.int64),
+            )
+        )
+
+        allowed = np.arange(num_groups + 1) != source_indices[:, None]
+        if not across_projects:
+            allowed[:, :-1] &= ~assigned[:, None] | (
+                state.slot_project_ids[destination_slots] == state.slot_project_ids[source_slots][:, None]
+            )
+        return (
+            source_indices,
+            destination_slots,
+            slot_sizes[destination_slots],
+            leaving_deltas,
+            arrival_deltas,
+            allowed,
+        )
+
+    def _move_sources(self, destination_slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        state = self.state
+        student_ids = np.arange(self.num_students)
+        student_slots = np.array(state.student_slots, dtype=np.int64)
+        assigned = student_slots != UNASSIGNED
+        source_slots = np.where(assigned, student_slots, 0)
+        slot_sizes = np.array(state.slot_sizes, dtype=np.int64)
+
+        destination_indices_by_slot = np.full(len(slot_sizes), -1, dtype=np.int64)
+        destination_indices_by_slot[destination_slots] = np.arange(len(destination_slots))
+        source_indices = np.where(assigned, destination_indices_by_slot[source_slots], len(destination_slots))
+
+        source_size_penalties = state.slot_size_penalties[source_slots]
+        leaving_deltas = np.where(
+            assigned,
+            -state.preference_matrix[student_ids, state.slot_project_ids[source_slots]]
+            - self.delta_cache.bilateral_counts[source_slots, student_ids]
+            * self.reward_bilateral_interest_collaboration
+            + np.where(
+                slot_sizes[source_slots] > state.slot_ideal_sizes[source_slots],
+                source_size_penalties,
+                -source_size_penalties,
+            ),
+            self.penalty_student_not_assigned,
+        )
+        return source_indices, leaving_deltas
+
+    def _location_specifications(
+        self, location: tuple[Project, ProjectGroup] | list[Student], student: Student
+    ) -> tuple[Project, ProjectGroup, Student] | tuple[list[Student], Student]:
+        if location is self.unassigned_students:
+            return (self.unassigned_students, student)
+        return (*location, student)
+
     def _local_search_best_improvement(
         self,
         ordered_n_tuples_destinations: list[tuple[tuple[Project, ProjectGroup] | list[Student]]],
-        locations_students_by_id: dict[int : tuple[Project, ProjectGroup] | list[Student]],
+        locations_students_by_id: list[tuple[Project, ProjectGroup] | list[Student]],
         across_projects: bool,
         num_to_move: int,
+        candidates: np.ndarray | None = None,
     ) -> (
         tuple[
             list[
@@ -626,7 +1871,9 @@ class VariableNeighborhoodSearch:
         best_move_combination = None
         best_delta = 0
 
-        for combination_ids in self.combinations_student_ids_by_dimension[num_to_move]:
+        for combination_ids in self._student_combinations(num_to_move):
+            if candidates is not None and not candidates[list(combination_ids)].any():
+                continue
 
             locations_assigned_students_combination = [
                 location_student
@@ -730,6 +1977,8 @@ class VariableNeighborhoodSearch:
                 best_move_combination = [
                     (corresponding_departures[i], best_arrivals_combination[i]) for i in range(num_to_move)
                 ]
+                if self.first_improvement:
+                    break
 
         return best_move_combination, best_delta
 
@@ -751,7 +2000,7 @@ class VariableNeighborhoodSearch:
         combined_departure_delta = (num_to_move - len(group_departures)) * self.penalty_student_not_assigned
         for project, group, student in group_departures:
             combined_departure_delta += self._calculate_leaving_delta((project, group, student))
-            group.release_student(student)
+            self._release_student(group, student)
 
         arrival_delta_to_surpass = -combined_departure_delta
 
@@ -766,6 +2015,7 @@ class VariableNeighborhoodSearch:
         )
 
         for destinations in ordered_n_tuples_destinations:
+            self.num_moves_evaluated += 1
             group_arrivals = [
                 (*destination, moving_students[i])
                 for i, destination in enumerate(destinations)
@@ -797,12 +2047,11 @@ class VariableNeighborhoodSearch:
                         invalid_destinations = True
                         break
                     combined_arrival_delta += self._calculate_arrival_delta((project, group, student))
-                    group.accept_student(student)
+                    self._accept_student(group, student)
                     group_student_acceptances.append((group, student))
 
                 for group, student in group_student_acceptances:
-                    group: ProjectGroup
-                    group.release_student(student)
+                    self._release_student(group, student)
 
                 if invalid_destinations:
                     continue
@@ -819,9 +2068,11 @@ class VariableNeighborhoodSearch:
                     )
                     for i, destination in enumerate(destinations)
                 )
+                if self.first_improvement:
+                    break
 
         for _, group, student in group_departures:
-            group.accept_student(student)
+            self._accept_student(group, student)
 
         return best_arrivals_combination, arrival_delta_to_surpass + combined_departure_delta
 
@@ -837,20 +2088,54 @@ class VariableNeighborhoodSearch:
         if student_was_unassigned and student_will_be_unassigned:
             return
 
-        if student_was_unassigned and not student_will_be_unassigned:
+        if student_was_unassigned:
             self.unassigned_students.remove(moving_student)
-            arrival_group = arrival_specifications[-2]
-            arrival_group.accept_student(moving_student)
-            return
-        if not student_was_unassigned and student_will_be_unassigned:
-            departure_group = departure_specifications[-2]
-            departure_group.release_student(moving_student)
+        else:
+            departure_project, departure_group, _ = departure_specifications
+            self._release_student(departure_group, moving_student)
+            if not departure_group.size():
+                self.destinations.remove((departure_project, departure_group))
+
+        if student_will_be_unassigned:
             self.unassigned_students.append(moving_student)
+            self.student_locations[moving_student.student_id] = self.unassigned_students
             return
-        departure_group = departure_specifications[-2]
-        arrival_group = arrival_specifications[-2]
-        departure_group.release_student(moving_student)
-        arrival_group.accept_student(moving_student)
+        arrival_project, arrival_group, _ = arrival_specifications
+        self._accept_student(arrival_group, moving_student)
+        if arrival_group.size() == 1:
+            bisect.insort(
+                self.destinations,
+                (arrival_project, arrival_group),
+                hi=len(self.destinations) - 1,
+                key=lambda destination: (destination[0].project_id, destination[0].groups.index(destination[1])),
+            )
+        self.student_locations[moving_student.student_id] = (arrival_project, arrival_group)
+
+    def _locations_from_groups(
+        self,
+    ) -> tuple[list[tuple[Project, ProjectGroup] | list[Student]], list[tuple[Project, ProjectGroup] | list[Student]]]:
+        destinations = [(project, group) for project in self.projects for group in project.groups if group.size()]
+        destinations.append(self.unassigned_students)
+        student_locations = [self.unassigned_students] * self.num_students
+        for project, group in destinations[:-1]:
+            for student in group.students:
+                student_locations[student.student_id] = (project, group)
+        return destinations, student_locations
+
+    def _accept_student(self, group: ProjectGroup, student: Student):
+        group.accept_student(student)
+        self.state.add_student(student.student_id, group.slot)
+
+    def _release_student(self, group: ProjectGroup, student: Student):
+        group.release_student(student)
+        self.state.remove_student(student.student_id)
+
+    def _remove_empty_groups(self):
+        for project in self.projects:
+            for group in project.groups:
+                if not group.size():
+                    self.state.close_slot(group)
+            project.groups = [group for group in project.groups if group.size()]
 
     def _calculate_arrival_delta(
         self,
@@ -859,19 +2144,12 @@ class VariableNeighborhoodSearch:
         if arrival_specifications[0] is self.unassigned_students:
             return -self.penalty_student_not_assigned
         project, group, student = arrival_specifications
-        preference_gain = student.preference_value(project)
+        arriving_id = student.student_id
+        preference_gain = self.state.preferences[arriving_id][project.project_id]
         bilateral_reward_gain = (
-            sum(
-                (
-                    (arriving_id, present_id) in self.bilateral_pairs
-                    if (arriving_id := student.student_id) < (present_id := group_member.student_id)
-                    else (present_id, arriving_id) in self.bilateral_pairs
-                )
-                for group_member in group.students
-            )
-            * self.reward_bilateral_interest_collaboration
+            self.state.bilateral_counts[arriving_id][group.slot] * self.reward_bilateral_interest_collaboration
         )
-        if group.size() < project.ideal_group_size:
+        if self.state.slot_sizes[group.slot] < project.ideal_group_size:
             delta_group_size = project.penalty_deviation_from_ideal_group_size
         else:
             delta_group_size = -project.penalty_deviation_from_ideal_group_size
@@ -888,20 +2166,18 @@ class VariableNeighborhoodSearch:
             candidate_projects = [
                 project
                 for project in self.projects
-                if any((group.students and group.size() < project.max_group_size) for group in project.groups)
+                if any((0 < group.size() < project.max_group_size) for group in project.groups)
             ]
             if not candidate_projects:
                 return (self.unassigned_students, student)
-            chosen_project: Project = rd.choice(candidate_projects)
+            chosen_project: Project = self.rng.choice(candidate_projects)
             candidate_groups = [
-                group
-                for group in chosen_project.groups
-                if group.students and group.size() < chosen_project.max_group_size
+                group for group in chosen_project.groups if 0 < group.size() < chosen_project.max_group_size
             ]
-            chosen_group = rd.choice(candidate_groups)
+            chosen_group = self.rng.choice(candidate_groups)
             return (chosen_project, chosen_group, student)
 
-        if rd.random() < unassignment_probability:
+        if self.rng.random() < unassignment_probability:
             student = shake_departure[-1]
             return (self.unassigned_students, student)
 
@@ -914,13 +2190,13 @@ class VariableNeighborhoodSearch:
                 project
                 for project in self.projects
                 if project is not current_project
-                and any((group.students and group.size() < project.max_group_size) for group in project.groups)
+                and any((0 < group.size() < project.max_group_size) for group in project.groups)
             ]
 
             if not candidate_projects:
                 return (self.unassigned_students, student)
 
-            chosen_project = rd.choice(candidate_projects)
+            chosen_project = self.rng.choice(candidate_projects)
 
         candidate_groups = [
             group
@@ -930,7 +2206,7 @@ class VariableNeighborhoodSearch:
 
         if not candidate_groups:
             return (self.unassigned_students, student)
-        chosen_group = rd.choice(candidate_groups)
+        chosen_group = self.rng.choice(candidate_groups)
         return (chosen_project, chosen_group, student)
 
     def _calculate_leaving_delta(
@@ -940,20 +2216,12 @@ class VariableNeighborhoodSearch:
         if departure_specifications[0] is self.unassigned_students:
             return self.penalty_student_not_assigned
         project, group, student = departure_specifications
-        preference_loss = student.preference_value(project)
+        leaving_id = student.student_id
+        preference_loss = self.state.preferences[leaving_id][project.project_id]
         bilateral_reward_loss = (
-            sum(
-                (
-                    (leaving_id, remaining_id) in self.bilateral_pairs
-                    if (leaving_id := student.student_id) < (remaining_id := group_member.student_id)
-                    else (remaining_id, leaving_id) in self.bilateral_pairs
-                )
-                for group_member in group.students
-                if group_member is not student
-            )
-            * self.reward_bilateral_interest_collaboration
+            self.state.bilateral_counts[leaving_id][group.slot] * self.reward_bilateral_interest_collaboration
         )
-        if group.size() > project.ideal_group_size:
+        if self.state.slot_sizes[group.slot] > project.ideal_group_size:
             delta_group_size = project.penalty_deviation_from_ideal_group_size
         else:
             delta_group_size = -project.penalty_deviation_from_ideal_group_size
@@ -970,9 +2238,9 @@ class VariableNeighborhoodSearch:
             ]
 
             if unassigned_students_remaining and (
-                rd.random() < len(unassigned_students_remaining) / self.num_students * assignment_bias
+                self.rng.random() < len(unassigned_students_remaining) / self.num_students * assignment_bias
             ):
-                student_to_move: Student = rd.choice(unassigned_students_remaining)
+                student_to_move: Student = self.rng.choice(unassigned_students_remaining)
                 departing_students.append(student_to_move)
                 departures_specifications.append(
                     (
@@ -992,20 +2260,22 @@ class VariableNeighborhoodSearch:
                 if unassigned_students_remaining:
                     departures_specifications += [
                         (self.unassigned_students, student)
-                        for student in rd.choices(
+                        for student in self.rng.choices(
                             unassigned_students_remaining, k=min(len(unassigned_students_remaining), num_to_move - i)
                         )
                     ]
                 break
 
-            chosen_project: Project = rd.choice(candidate_projects)
+            chosen_project: Project = self.rng.choice(candidate_projects)
             candidate_groups = [
                 group
                 for group in chosen_project.groups
                 if group.remaining_size(departing_students) > chosen_project.min_group_size
             ]
-            chosen_group = rd.choice(candidate_groups)
-            student_to_move = rd.choice(chosen_group.remaining_students(departing_students))
+            chosen_group = self.rng.choice(candidate_groups)
+            # Draws the same random number as rng.choice without listing the remaining students.
+            student_index = self.rng.randrange(chosen_group.remaining_size(departing_students))
+            student_to_move = next(it.islice(chosen_group.remaining_students(departing_students), student_index, None))
             departing_students.append(student_to_move)
             departures_specifications.append(
                 (
@@ -1033,37 +2303,43 @@ class VariableNeighborhoodSearch:
         )
 
     def _sum_preferences(self):
+        slot_projects = self.state.slot_projects
         return sum(
-            student.preference_value(project)
-            for project in self.projects
-            for group in project.groups
-            for student in group.students
+            self.state.preferences[student_id][slot_projects[slot]]
+            for student_id, slot in enumerate(self.state.student_slots)
+            if slot != UNASSIGNED
         )
 
     def _sum_join_rewards(self):
+        student_slots = self.state.student_slots
         return sum(
             self.reward_bilateral_interest_collaboration
-            for project in self.projects
-            for group in project.groups
-            for id_pair in it.combinations(sorted([student.student_id for student in group.students]), 2)
-            if id_pair in self.bilateral_pairs
+            for first_id, second_id in self.bilateral_pairs
+            if student_slots[first_id] == student_slots[second_id] != UNASSIGNED
         )
 
     def _sum_missing_assignment_penalties(self):
-        return len(self.unassigned_students) * self.penalty_student_not_assigned
+        return self.state.num_unassigned() * self.penalty_student_not_assigned
 
     def _sum_group_surplus_penalties(self):
+        num_non_empty_groups_by_project = Counter(
+            self.state.slot_projects[slot] for slot, size in enumerate(self.state.slot_sizes) if size
+        )
         return sum(
-            max(0, project.num_non_empty_groups() - project.offered_num_groups) * project.penalty_extra_group
+            max(0, num_non_empty_groups_by_project[project.project_id] - project.offered_num_groups)
+            * project.penalty_extra_group
             for project in self.projects
         )
 
     def _sum_group_size_penalties(self):
+        projects_slots = (
+            (self.projects[project_id], size)
+            for project_id, size in zip(self.state.slot_projects, self.state.slot_sizes)
+        )
         return sum(
-            abs(group.size() - project.ideal_group_size) * project.penalty_deviation_from_ideal_group_size
-            for project in self.projects
-            for group in project.groups
-            if group.students
+            abs(size - project.ideal_group_size) * project.penalty_deviation_from_ideal_group_size
+            for project, size in projects_slots
+            if size
         )
 
     def _initial_solution(self):
@@ -1075,7 +2351,7 @@ class VariableNeighborhoodSearch:
             )
             for project in self.projects
         }
-        assigned_students = []
+        assigned_students = set()
         any_group_added = True
         while len(assigned_students) < self.num_students and any_group_added:
             any_group_added = False
@@ -1087,7 +2363,98 @@ class VariableNeighborhoodSearch:
                 if len(unassigned_descending_preference) >= project.ideal_group_size:
                     now_assigned_students = unassigned_descending_preference[: project.ideal_group_size]
                     project.add_initial_group_ideal_size(now_assigned_students)
-                    assigned_students += now_assigned_students
+                    self.state.open_slot(project.groups[-1])
+                    assigned_students.update(now_assigned_students)
                     any_group_added = True
 
         self.unassigned_students = [student for student in self.students if student not in assigned_students]
+
+    def _regret_initial_solution(self):
+        preferences = self.state.preferences
+        units = []
+        paired_ids = set()
+        for first_id, second_id in sorted(self.bilateral_pairs):
+            if first_id not in paired_ids and second_id not in paired_ids:
+                paired_ids.update((first_id, second_id))
+                units.append((first_id, second_id))
+        units += [(student_id,) for student_id in range(self.num_students) if student_id not in paired_ids]
+
+        members_by_project = {
+            project.project_id: [[] for _ in range(project.offered_num_groups)] for project in self.projects
+        }
+        # The groups of every project with room left as a heap. A group below the minimum size
+        # comes first and the biggest of them first, so a group is filled up to the minimum size
+        # before the next one is opened. Groups which reached it come next, the smallest first.
+        open_groups_by_project = {
+            project.project_id: [(False, 0, 0, index) for index in range(project.offered_num_groups)]
+            for project in self.projects
+        }
+
+        def best_insertion(unit: tuple[int, ...]) -> tuple[int, int | None]:
+            best_value = second_value = -self.penalty_student_not_assigned * len(unit)
+            best_project_id = None
+            for project in self.projects:
+                open_groups = open_groups_by_project[project.project_id]
+                if not open_groups or (size := open_groups[0][2]) + len(unit) > project.max_group_size:
+                    continue
+                value = sum(preferences[student_id][project.project_id] for student_id in unit)
+                value += self.reward_bilateral_interest_collaboration * (len(unit) - 1)
+                for new_size in range(size, size + len(unit)):
+                    if new_size < project.ideal_group_size:
+                        value += project.penalty_deviation_from_ideal_group_size
+                    else:
+                        value -= project.penalty_deviation_from_ideal_group_size
+                if value > best_value:
+                    best_value, second_value, best_project_id = value, best_value, project.project_id
+                elif value > second_value:
+                    second_value = value
+            return best_value - second_value, best_project_id
+
+        # Units that would lose the most by not getting their best project are inserted first.
+        # Regrets are recalculated lazily when a unit is popped. Each evaluation scans all
+        # projects, as the best and second best project depend on the group sizes. After an
+        # insertion every other unit may be stale and evaluated again, so in the worst case
+        # this is O(units ** 2 * projects).
+        regrets_heap = []
+        for index, unit in enumerate(units):
+            regret, best_project_id = best_insertion(unit)
+            regrets_heap.append((-regret, index, best_project_id))
+        heapq.heapify(regrets_heap)
+        while regrets_heap:
+            negative_regret, index, best_project_id = heapq.heappop(regrets_heap)
+            regret, current_best_project_id = best_insertion(units[index])
+            if (regret, current_best_project_id) != (-negative_regret, best_project_id):
+                heapq.heappush(regrets_heap, (-regret, index, current_best_project_id))
+                continue
+            if best_project_id is None:
+                continue
+            open_groups = open_groups_by_project[best_project_id]
+            project = self.projects[best_project_id]
+            *_, size, group_index = heapq.heappop(open_groups)
+            members_by_project[best_project_id][group_index] += units[index]
+            if (size := size + len(units[index])) < project.max_group_size:
+                reached_min = size >= project.min_group_size
+                heapq.heappush(open_groups, (reached_min, size if reached_min else -size, size, group_index))
+
+        for project in self.projects:
+            for members in members_by_project[project.project_id]:
+                if len(members) >= project.min_group_size:
+                    project.add_initial_group([self.students[student_id] for student_id in members])
+                    self.state.open_slot(project.groups[-1])
+        self.unassigned_students = [
+            student for student in self.students if self.state.student_slots[student.student_id] == UNASSIGNED
+        ]
+
+        for student in list(self.unassigned_students):
+            arrivals_with_deltas = [
+                ((project, group), self._calculate_arrival_delta((project, group, student)))
+                for project in self.projects
+                for group in project.groups
+                if group.size() < project.max_group_size
+            ]
+            if not arrivals_with_deltas:
+                break
+            (project, group), delta = max(arrivals_with_deltas, key=lambda arrival_with_delta: arrival_with_delta[-1])
+            if delta > -self.penalty_student_not_assigned:
+                self.unassigned_students.remove(student)
+                self._accept_student(group, student)
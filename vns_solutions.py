@@ -1,15 +1,75 @@
 """Contains function to benchmark VNS."""
 
-import json
 import time as t
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import pandas as pd
-
+from instance_loader import load_instance_arrays
+from results_sink import ResultsSink
 from settings import BenchmarkSettingsVNS
 from vns_on_student_assignment import VariableNeighborhoodSearch
 
 
+def solve_benchmark_instance(
+    dimension: str,
+    instance_number: int,
+    time_limit: int,
+    seed: int,
+    construction: str,
+    checkpoint_path: Path | None = None,
+    checkpoint_interval: float = 60,
+) -> tuple[list[dict], dict]:
+    """Solves one benchmark instance with VNS.
+
+    Args:
+        dimension: The number of projects and the number of students of
+            the instance joined by an underscore.
+        instance_number: The number of the instance among the instances
+            of its dimension.
+        time_limit: How long the instance should be solved.
+        seed: Random seed passed to the run_general_vns_best_improvement
+            method.
+        construction: How the initial solution is constructed, either
+            "greedy" or by "regret".
+        checkpoint_path: Where the state of the run is saved at intervals
+            and continued from if the run was interrupted. None means no
+            checkpoints are saved.
+        checkpoint_interval: The time in seconds between two checkpoints.
+
+    Returns:
+        The solutions which improved on the best found solution before as
+        returned by run_general_vns_best_improvement and the errors in the
+        final solution as returned by check_solution.
+    """
+    vns = VariableNeighborhoodSearch.from_arrays(
+        **load_instance_arrays(dimension, instance_number), construction=construction
+    )
+    solution_development = vns.run_general_vns_best_improvement(
+        benchmarking=True,
+        time_limit=time_limit,
+        seed=seed,
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=checkpoint_interval,
+    )
+    return solution_development, vns.check_solution()
+
+
+def error_description(seed: int, dimension: str, instance_number: int, error_report: dict) -> str:
+    """Returns the line of the error log describing the errors in the solution of an instance."""
+    error_description_elements = [f"Seed: {seed}; Instance: {dimension}_{instance_number}"]
+    if "claimed_obj" in error_report:
+        error_description_elements.append(
+            f"The objective value calculated with deltas is: {error_report["claimed_obj"]}; "
+            f"The actual objective value obtained by complete recalculation is {error_report["actual_obj"]}"
+        )
+    for issue in ["groups_too_small", "groups_too_big", "too_many_groups"]:
+        if issue in error_report:
+            error_description_elements += list(error_report[issue])
+    if "inconsistency_students" in error_report:
+        error_description_elements.append("There is a inconsistency in how students are distributed;")
+    return "; ".join(error_description_elements)
+
+
 def benchmark_vns(
     filename_results: str,
     filename_error_logs: str,
@@ -18,13 +78,25 @@ def benchmark_vns(
     instances_per_dimension: int = 10,
     time_limit: int = 300,
     seed: int = 100,
+    construction: str = "greedy",
+    num_workers: int = 1,
+    resume: bool = False,
+    checkpoint_interval: float | None = None,
 ) -> None:
     """Saves benchmarks of VNS in designated JSON.
 
     Loads one instance after another, initializes an instance
     of VariableNeighborhoodSearch with each one of them and
     solves each one with the run_general_vns_best_improvement
-    method with benchmarking == True.
+    method with benchmarking == True. With more than one worker
+    the instances are solved in parallel processes, one instance
+    per worker at a time. The result of every instance is appended to
+    a JSON Lines file next to the JSON as soon as it is solved. Once all
+    instances are solved, the results are saved in the JSON in the order
+    of the instances and the JSON Lines file is deleted.
+
+    An interrupted benchmark run is continued with resume == True. Instances
+    with results are skipped and runs with checkpoints continue from them.
 
     Args:
         filename_results: The name of the JSON in which the results
@@ -42,64 +114,107 @@ def benchmark_vns(
         time_limit: How long each instance should be solved.
         seed: Random seed passed to the run_general_vns_best_improvement
             method. I USED 100.
+        construction: How the initial solutions are constructed, either
+            "greedy" or by "regret". The first entry of every instance in
+            the results holds the objective value of the initial solution
+            and the time until it was constructed.
+        num_workers: How many instances are solved at the same time. Each
+            worker should have a core of its own, since the results depend
+            on how much search fits into the time limit.
+        resume: Set to True if an interrupted benchmark run with the same
+            filenames should be continued.
+        checkpoint_interval: The time in seconds between two checkpoints of
+            the run on an instance. The checkpoints are saved in a folder
+            named after the results in the folder checkpoints and deleted
+            once the instance is solved. None means no checkpoints are saved.
 
     Raises:
-        ValueError: Already a file where results are to be saved.
-        ValueError: Already a file where error logs are to be saved.
+        ValueError: Already a file where results are to be saved or
+            appended to and resume == False.
+        ValueError: Already a file where error logs are to be saved and
+            resume == False.
+        ValueError: Already checkpoints for the results and resume == False.
+        ValueError: num_workers is smaller than 1.
     """
-    results_path = Path(filename_results)
-    if results_path.is_file():
-        raise ValueError(f"{results_path} already exists!")
+    if num_workers < 1:
+        raise ValueError("At least one worker is needed.")
+    results_sink = ResultsSink(Path(filename_results))
     folder_error_logs = Path("error_logs")
-    folder_error_logs.mkdir(exist_ok=True)
     error_log_path = folder_error_logs / filename_error_logs
-    if error_log_path.is_file():
-        raise ValueError(f"{error_log_path} already exists!")
-
-    vns_solution_developments = {}
-    folder_projects = Path("instances_projects")
-    folder_students = Path("instances_students")
-
-    for project_quantity in project_quantities:
-        for student_quantity in student_quantities:
-            dimension = f"{project_quantity}_{student_quantity}"
-            dimension_subfolder = f"{dimension}_instances"
-            for instance_number in range(instances_per_dimension):
-                start = t.time()
-                filename_projects = f"generic_{dimension}_projects_{instance_number}.csv"
-                filename_students = f"generic_{dimension}_students_{instance_number}.csv"
-                filepath_projects = folder_projects / dimension_subfolder / filename_projects
-                filepath_students = folder_students / dimension_subfolder / filename_students
-                projects_info = pd.read_csv(filepath_projects)
-                students_info = pd.read_csv(filepath_students)
-                students_info["fav_partners"] = students_info["fav_partners"].apply(json.loads)
-                students_info["project_prefs"] = students_info["project_prefs"].apply(lambda x: tuple(json.loads(x)))
-                vns = VariableNeighborhoodSearch(projects_info, students_info)
-                vns_solution_developments[f"generic_{dimension}_{instance_number}"] = (
-                    vns.run_general_vns_best_improvement(benchmarking=True, time_limit=time_limit, seed=seed)
-                )
-                print(f"Done with instance {dimension}_{instance_number}!")
-                print(f"It took {t.time() - start} seconds")
-
-                if not (error_report := vns.check_solution()):
-                    results_path.write_text(json.dumps(vns_solution_developments, indent=4), encoding="utf-8")
-                    continue
-                error_description_elements = [f"Seed: {seed}; Instance: {dimension}_{instance_number}"]
-                if "claimed_obj" in error_report:
-                    error_description_elements.append(
-                        f"The objective value calculated with deltas is: {error_report["claimed_obj"]}; "
-                        f"The actual objective value obtained by complete recalculation is {error_report["actual_obj"]}"
-                    )
-                for issue in ["groups_too_small", "groups_too_big", "too_many_groups"]:
-                    if issue in error_report:
-                        error_description_elements += list(error_report[issue])
-                if "inconsistency_students" in error_report:
-                    error_description_elements.append("There is a inconsistency in how students are distributed;")
-                with error_log_path.open("a", encoding="utf-8") as f:
-                    f.write("; ".join(error_description_elements) + "\n")
-
-            print(f"Done with student quantity {student_quantity}!")
-        print(f"Done with project quantity {project_quantity}!")
+    folder_checkpoints = Path("checkpoints") / results_sink.path_results.stem
+    if not resume:
+        for path in (results_sink.path_results, results_sink.path_records, error_log_path):
+            if path.is_file():
+                raise ValueError(f"{path} already exists!")
+        if folder_checkpoints.is_dir() and any(folder_checkpoints.iterdir()):
+            raise ValueError(f"{folder_checkpoints} already has checkpoints!")
+    completed_keys = results_sink.load().keys()
+    folder_error_logs.mkdir(exist_ok=True)
+    if checkpoint_interval is not None:
+        folder_checkpoints.mkdir(parents=True, exist_ok=True)
+
+    instances = [
+        (f"{project_quantity}_{student_quantity}", instance_number)
+        for project_quantity in project_quantities
+        for student_quantity in student_quantities
+        for instance_number in range(instances_per_dimension)
+    ]
+    remaining_instances = [
+        (dimension, instance_number)
+        for dimension, instance_number in instances
+        if f"generic_{dimension}_{instance_number}" not in completed_keys
+    ]
+
+    def checkpoint_options(dimension: str, instance_number: int) -> dict:
+        if checkpoint_interval is None:
+            return {}
+        return {
+            "checkpoint_path": folder_checkpoints / f"generic_{dimension}_{instance_number}.json",
+            "checkpoint_interval": checkpoint_interval,
+        }
+
+    def record_instance(dimension: str, instance_number: int, solution_development: list[dict], error_report: dict):
+        results_sink.append(f"generic_{dimension}_{instance_number}", solution_development)
+        if checkpoint_interval is not None:
+            checkpoint_options(dimension, instance_number)["checkpoint_path"].unlink(missing_ok=True)
+        print(f"Done with instance {dimension}_{instance_number}!")
+        if error_report:
+            with error_log_path.open("a", encoding="utf-8") as f:
+                f.write(error_description(seed, dimension, instance_number, error_report) + "\n")
+
+    if num_workers == 1:
+        for dimension, instance_number in remaining_instances:
+            start = t.time()
+            record_instance(
+                dimension,
+                instance_number,
+                *solve_benchmark_instance(
+                    dimension,
+                    instance_number,
+                    time_limit,
+                    seed,
+                    construction,
+                    **checkpoint_options(dimension, instance_number),
+                ),
+            )
+            print(f"It took {t.time() - start} seconds")
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(
+                    solve_benchmark_instance,
+                    dimension,
+                    instance_number,
+                    time_limit,
+                    seed,
+                    construction,
+                    **checkpoint_options(dimension, instance_number),
+                ): (dimension, instance_number)
+                for dimension, instance_number in remaining_instances
+            }
+            for future in as_completed(futures):
+                record_instance(*futures[future], *future.result())
+    results_sink.finalize([f"generic_{dimension}_{instance_number}" for dimension, instance_number in instances])
 
 
 if __name__ == "__main__":
@@ -112,4 +227,8 @@ if __name__ == "__main__":
         instances_per_dimension=settings.instances_per_dimension,
         time_limit=settings.time_limit,
         seed=settings.seed,
+        construction=settings.construction,
+        num_workers=settings.num_workers,
+        resume=settings.resume,
+        checkpoint_interval=settings.checkpoint_interval,
     )